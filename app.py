@@ -1,11 +1,12 @@
 import os
+import asyncio
 import logging
 import json
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from queue import Queue, Empty
 import assemblyai as aai
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, HTTPException, UploadFile, File, Path
+from fastapi import FastAPI, Request, HTTPException, UploadFile, File, Path, WebSocket, WebSocketDisconnect, Depends
 from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -13,9 +14,31 @@ from schemas.audio import SpeechRequest, SpeechResponse
 from schemas.chat import ChatResponse
 import orjson
 
-from services.tts import murf_tts, fallback_tts
+from services.tts import murf_tts_async, fallback_tts, murf_http
+from services.personas import persona_registry
 from services.stt import transcribe_audio
-from services.llm_day24 import generate_llm_response
+from services.llm import generate_llm_response, generate_streaming_response
+from services.llm_providers import llm_client
+from services.stt_streaming import AudioFormat, StreamingTranscriber, TranscriptEvent, sniff_container
+from services.endpointing import Endpointer
+from services.speculation import SpeculativeGeneration, SPECULATIVE_LLM, speculation_stats, transcripts_match
+from services.intent_router import intent_router
+from services.web_search_async import async_web_search_service
+from services.search_cache import SEARCH_REFRESH_ENABLED, SearchRefresher, search_cache
+from services.result_compaction import compaction_stats
+from services.circuit_breaker import circuit_breakers
+from services.deadlines import current_deadline, turn_deadline
+from services.rate_limiter import rate_limiters
+from services.key_pool import key_pools
+from services.metrics import metrics, agent_chat_fallbacks, time_to_first_audio, ws_sessions_active
+from services.tracing import span, tracer
+from services.admin_auth import require_admin
+from services.profiler import ProfilerBusy, profiler
+from services.loop_monitor import LOOP_LAG_MONITOR_ENABLED, loop_monitor
+from services.memory_usage import memory_accountant
+from services.readiness import READY_MAX_QUEUE_DEPTH, executor_backlog, readiness
+from services.recording_store import recording_store, RECORDING_CLEANUP_INTERVAL_SECS
+from services.recording_writer import open_recording, pending_write_bytes, wait_for_pending_writes
 from custom_json import custom_json_dumps
 
 load_dotenv()
@@ -25,13 +48,20 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CHAT_SESSIONS = {}
+# Read when /metrics is scraped; persona entries share the store but are not conversations
+metrics.gauge("voice_chat_sessions", "Conversations held in the in-memory session store",
+              callback=lambda: sum(1 for key in CHAT_SESSIONS if not key.endswith("_persona")))
+
+# How often the streaming endpointer is polled for end of turn during silence
+ENDPOINT_TICK_SECS = float(os.getenv("ENDPOINT_TICK_SECS", "0.05"))
 
 UPLOAD_DIRECTORY = "uploads"
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
 # Validate required environment variables
 required_env_vars = ["MURF_API_KEY", "ASSEMBLYAI_API_KEY", "GEMINI_API_KEY"]
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
+# A comma-separated <NAME>S list (e.g. MURF_API_KEYS) counts as well
+missing_vars = [var for var in required_env_vars if not (os.getenv(var) or os.getenv(f"{var}S"))]
 if missing_vars:
     logger.warning(f"Missing environment variables: {missing_vars}")
 
@@ -39,6 +69,49 @@ app = FastAPI(title="AI Voice Agent - Day 24: Agent Persona", description="Voice
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+async def _recording_cleanup_loop():
+    while True:
+        try:
+            await asyncio.to_thread(recording_store.cleanup)
+        except Exception as e:
+            logger.error(f"Recording cleanup failed: {e}")
+        await asyncio.sleep(RECORDING_CLEANUP_INTERVAL_SECS)
+
+search_refresher = SearchRefresher(search_cache, async_web_search_service.search_web)
+
+# Long-lived in-memory stores, sized by GET /admin/memory
+memory_accountant.register("chat_sessions", CHAT_SESSIONS)
+memory_accountant.register("search_cache", search_cache)
+memory_accountant.register("trace_buffer", tracer)
+memory_accountant.register("loop_lag_stalls", loop_monitor)
+memory_accountant.register("recording_write_backlog", callback=pending_write_bytes)
+
+# Queue depths reported by /readyz; a backed-up thread pool means turns are already waiting
+readiness.register_queue("executor_backlog", executor_backlog, limit=READY_MAX_QUEUE_DEPTH)
+readiness.register_queue("recording_write_backlog_bytes", pending_write_bytes)
+readiness.register_queue("ws_sessions", lambda: int(ws_sessions_active.value()))
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if LOOP_LAG_MONITOR_ENABLED:
+        loop_monitor.start()
+    app.state.readiness_task = asyncio.create_task(readiness.run())
+    if recording_store.enabled:
+        app.state.recording_cleanup_task = asyncio.create_task(_recording_cleanup_loop())
+    if SEARCH_REFRESH_ENABLED and async_web_search_service.is_available():
+        app.state.search_refresh_task = asyncio.create_task(search_refresher.run())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    loop_monitor.stop()
+    for name in ("readiness_task", "recording_cleanup_task", "search_refresh_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    await asyncio.to_thread(wait_for_pending_writes)
+    await async_web_search_service.aclose()
+    await murf_http.aclose()
+
 # Fallback WAV generator to avoid missing static asset errors
 import io
 import wave
@@ -71,20 +144,20 @@ async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.post("/generate-audio", response_model=SpeechResponse)
-def generate_audio(request: SpeechRequest):
+async def generate_audio(request: SpeechRequest):
     input_text = request.text.strip()
     if not input_text:
         raise HTTPException(status_code=400, detail="Input text cannot be empty")
 
     try:
-        audio_url = murf_tts(input_text)
+        audio_url = await murf_tts_async(input_text)
         if not audio_url:
             raise Exception("No audio URL returned from Murf TTS")
         return SpeechResponse(audio_url=audio_url)
     except Exception as err:
         logger.error(f"Murf TTS error: {err}")
         try:
-            fallback_url = fallback_tts("I'm having trouble generating audio right now.")
+            fallback_url = await asyncio.to_thread(fallback_tts, "I'm having trouble generating audio right now.")
             return SpeechResponse(audio_url=fallback_url, error=str(err))
         except Exception as fallback_err:
             logger.error(f"Fallback TTS also failed: {fallback_err}")
@@ -92,6 +165,17 @@ def generate_audio(request: SpeechRequest):
 
 @app.post("/agent/chat/{session_id}", response_model=ChatResponse)
 async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
+    # STT, LLM, tools and TTS all share one latency budget for the turn
+    with turn_deadline() as deadline, tracer.trace_turn("agent_chat", session_id) as turn:
+        response = await _agent_chat_turn(session_id, file)
+        time_to_first_audio.observe(deadline.elapsed(), path="agent_chat")
+        if response.error:
+            turn.fail(response.error)
+        if deadline.degraded:
+            turn.set("degraded", ", ".join(deadline.degraded))
+        return response
+
+async def _agent_chat_turn(session_id: str, file: UploadFile):
     if not file.filename:
         raise HTTPException(status_code=400, detail="No audio file provided")
 
@@ -105,7 +189,9 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
 
         logger.info(f"Received audio file: {file.filename}, size: {len(audio_data)} bytes, type: {file.content_type}")
 
-        user_text = transcribe_audio(audio_data)
+        with span("stt", audio_bytes=len(audio_data)):
+            # The rate limiter and the upload block, so they run off the event loop
+            user_text = await asyncio.to_thread(transcribe_audio, audio_data)
         if not user_text:
             logger.error("Transcription returned empty result")
             raise Exception("Speech could not be understood. Please try speaking more clearly.")
@@ -113,9 +199,10 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
         # Check if transcription returned an error message
         if "API key not configured" in user_text or "error" in user_text.lower():
             logger.warning(f"Transcription error: {user_text}")
+            agent_chat_fallbacks.inc(branch="stt_error")
             # Try to generate fallback audio
             try:
-                fallback_url = fallback_tts("I'm having trouble understanding your voice right now. Please check your API configuration.")
+                fallback_url = await asyncio.to_thread(fallback_tts, "I'm having trouble understanding your voice right now. Please check your API configuration.")
                 return ChatResponse(audio_urls=[fallback_url], transcript="", llm_response=user_text, error=user_text)
             except Exception as fallback_err:
                 logger.error(f"Fallback TTS failed: {fallback_err}")
@@ -125,9 +212,10 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
 
     except Exception as e:
         logger.error(f"Audio processing error: {e}")
+        agent_chat_fallbacks.inc(branch="stt_exception")
         fallback_text = "I'm having trouble understanding your voice right now. Please try speaking more clearly."
         try:
-            audio_url = fallback_tts(fallback_text)
+            audio_url = await asyncio.to_thread(fallback_tts, fallback_text)
             return ChatResponse(audio_urls=[audio_url], transcript="", llm_response=fallback_text, error=f"Audio processing error: {str(e)}")
         except Exception as fallback_err:
             logger.error(f"Fallback TTS failed: {fallback_err}")
@@ -139,17 +227,25 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
     # Get persona from session or use default
     persona = CHAT_SESSIONS.get(f"{session_id}_persona", "default")
 
+    # Simple weather, news and joke requests are answered without the LLM
+    with span("intent_router") as s:
+        routed = await asyncio.to_thread(intent_router.route, user_text, persona)
+        s.set("routed", bool(routed))
+
     try:
-        llm_text = generate_llm_response(history, persona)
+        with span("llm", persona=persona) as s:
+            llm_text = routed.reply if routed else await asyncio.to_thread(generate_llm_response, history, persona)
+            s.set("chars", len(llm_text or ""))
         if not llm_text:
             raise Exception("Empty response from LLM")
 
         # Check if LLM returned an error message
-        if "API key not configured" in llm_text or "error" in llm_text.lower():
+        if not routed and ("API key not configured" in llm_text or "error" in llm_text.lower()):
             logger.warning(f"LLM error: {llm_text}")
+            agent_chat_fallbacks.inc(branch="llm_error")
             fallback_text = "I'm having trouble thinking of a response right now. Please check your API configuration."
             try:
-                audio_url = fallback_tts(fallback_text)
+                audio_url = await asyncio.to_thread(fallback_tts, fallback_text)
                 return ChatResponse(audio_urls=[audio_url], transcript=user_text, llm_response=fallback_text, error=llm_text)
             except Exception as fallback_err:
                 logger.error(f"Fallback TTS failed: {fallback_err}")
@@ -158,9 +254,10 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
         logger.info(f"LLM response generated: '{llm_text[:100]}...'" )
     except Exception as e:
         logger.error(f"LLM API error: {e}")
+        agent_chat_fallbacks.inc(branch="llm_exception")
         fallback_text = "I'm having trouble thinking of a response right now."
         try:
-            audio_url = fallback_tts(fallback_text)
+            audio_url = await asyncio.to_thread(fallback_tts, fallback_text)
             return ChatResponse(audio_urls=[audio_url], transcript=user_text, llm_response=fallback_text, error=f"LLM API error: {str(e)}")
         except Exception as fallback_err:
             logger.error(f"Fallback TTS failed: {fallback_err}")
@@ -177,22 +274,26 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
     try:
         for chunk in split_text(llm_text, 3000):
             if chunk.strip():
-                audio_url = murf_tts(chunk)
+                with span("tts", chars=len(chunk)) as s:
+                    audio_url = await murf_tts_async(chunk, persona_registry.get(persona).voice_id)
+                    s.set("murf", bool(audio_url))
                 if audio_url:
                     audio_urls.append(audio_url)
                     logger.info(f"TTS chunk generated: {audio_url}")
                 else:
                     logger.warning("TTS returned no audio URL, using fallback")
+                    agent_chat_fallbacks.inc(branch="tts_chunk")
                     # Try fallback TTS
-                    fallback_url = fallback_tts(chunk)
+                    fallback_url = await asyncio.to_thread(fallback_tts, chunk)
                     if fallback_url:
                         audio_urls.append(fallback_url)
                     else:
                         raise Exception("Both Murf and fallback TTS failed")
     except Exception as e:
         logger.error(f"TTS error: {e}")
+        agent_chat_fallbacks.inc(branch="tts_exception")
         try:
-            fallback_url = fallback_tts("I'm having trouble speaking right now.")
+            fallback_url = await asyncio.to_thread(fallback_tts, "I'm having trouble speaking right now.")
             if fallback_url:
                 audio_urls.append(fallback_url)
             else:
@@ -205,8 +306,9 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
 
     if not audio_urls:
         logger.warning("No audio URLs generated, using fallback")
+        agent_chat_fallbacks.inc(branch="no_audio")
         try:
-            fallback_url = fallback_tts("Here's my response.")
+            fallback_url = await asyncio.to_thread(fallback_tts, "Here's my response.")
             if fallback_url:
                 audio_urls = [fallback_url]
             else:
@@ -217,11 +319,239 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
     logger.info(f"Chat response complete. Audio URLs: {len(audio_urls)}, Transcript: '{user_text}', LLM: '{llm_text[:100]}...'" )
     return ChatResponse(audio_urls=audio_urls, transcript=user_text, llm_response=llm_text)
 
+async def _single_reply(text: str) -> AsyncGenerator[str, None]:
+    yield text
+
+async def _run_streaming_turn(websocket: WebSocket, session_id: str, user_text: str,
+                              speculation: Optional[SpeculativeGeneration] = None):
+    """Generate and speak the agent's reply to one finished streaming turn"""
+    # Work on a copy so a cancelled (retracted) turn leaves no trace in the session
+    history = CHAT_SESSIONS.get(session_id, []) + [{"role": "user", "content": user_text}]
+    persona = CHAT_SESSIONS.get(f"{session_id}_persona", "default")
+    await websocket.send_text(json.dumps({"type": "turn_end", "content": user_text}))
+
+    with span("intent_router") as s:
+        match = intent_router.classify(user_text)
+        routed = await asyncio.to_thread(intent_router.dispatch, match, persona) if match else None
+        s.set("routed", bool(routed))
+
+    if routed:
+        if speculation:
+            speculation.cancel()
+        llm_stream = _single_reply(routed.reply)
+    elif speculation and speculation.matches(user_text):
+        logger.info(f"Committing speculative response for: '{user_text}'")
+        llm_stream = speculation.commit()
+    else:
+        if speculation:
+            speculation.cancel()
+        llm_stream = generate_streaming_response(history, persona)
+
+    parts = []
+    try:
+        with span("llm", persona=persona, speculative=bool(speculation and not routed)) as s:
+            async for chunk in llm_stream:
+                if not parts:
+                    s.add_event("first_chunk")
+                parts.append(chunk)
+                await websocket.send_text(json.dumps({"type": "llm_chunk", "content": chunk}))
+    except asyncio.CancelledError:
+        if speculation:
+            speculation.cancel()
+        raise
+    llm_text = "".join(parts)
+    logger.info(f"LLM streamed response: {llm_text}")
+
+    CHAT_SESSIONS[session_id] = history + [{"role": "model", "content": llm_text}]
+
+    voice_id = persona_registry.get(persona).voice_id
+    with span("tts", chars=len(llm_text[:3000])) as s:
+        audio_url = await murf_tts_async(llm_text[:3000], voice_id) if llm_text.strip() else None
+        s.set("murf", bool(audio_url))
+        if not audio_url:
+            audio_url = await asyncio.to_thread(fallback_tts, "I'm having trouble speaking right now.")
+    deadline = current_deadline()
+    if deadline:
+        time_to_first_audio.observe(deadline.elapsed(), path="ws")
+    await websocket.send_text(json.dumps({"type": "audio_ready", "audio_url": audio_url}))
+    await websocket.send_text(json.dumps({"type": "complete"}))
+
+@app.websocket("/ws/{session_id}")
+async def websocket_stream(websocket: WebSocket, session_id: str, encoding: Optional[str] = None,
+                           sample_rate: Optional[int] = None):
+    """Stream audio to realtime STT, record it off the event loop, and answer each turn
+
+    Clients send raw audio and name it with ?encoding=pcm_s16le&sample_rate=16000;
+    without them the server's STT_STREAMING_* format is assumed.
+    """
+    await websocket.accept()
+    try:
+        audio_format = AudioFormat.negotiate(encoding, sample_rate)
+    except ValueError as e:
+        await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+        await websocket.close(code=1003)
+        return
+    recorder = await asyncio.to_thread(open_recording, session_id)
+    turn_lock = asyncio.Lock()
+    turn_tasks = set()
+    endpointer = Endpointer()
+    # Turn started early by the endpointer, before the provider's final transcript
+    early_turn = {"task": None, "turn_order": None, "text": ""}
+    current_turn_order = 0
+    # Opt-in LLM generation started on a stable partial transcript
+    speculation = {"current": None}
+
+    def maybe_speculate():
+        if not SPECULATIVE_LLM or endpointer.ended or turn_lock.locked() or not endpointer.is_stable():
+            return
+        current = speculation["current"]
+        if current and current.text == endpointer.text:
+            return
+        if current:
+            current.cancel()
+        history = CHAT_SESSIONS.get(session_id, []) + [{"role": "user", "content": endpointer.text}]
+        persona = CHAT_SESSIONS.get(f"{session_id}_persona", "default")
+        speculation["current"] = SpeculativeGeneration(
+            generate_streaming_response, history, persona, endpointer.text).start()
+
+    async def handle_turn(user_text: str, spec: Optional[SpeculativeGeneration]):
+        # The budget starts when the user stops speaking, including any wait for the previous turn
+        with turn_deadline(), tracer.trace_turn("ws_turn", session_id):
+            async with turn_lock:
+                try:
+                    await _run_streaming_turn(websocket, session_id, user_text, spec)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Streaming turn error: {e}")
+                    await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+
+    def start_turn(user_text: str) -> asyncio.Task:
+        spec, speculation["current"] = speculation["current"], None
+        task = asyncio.create_task(handle_turn(user_text, spec))
+        turn_tasks.add(task)
+        task.add_done_callback(turn_tasks.discard)
+        return task
+
+    def end_turn_early(reason: str):
+        logger.info(f"End of turn ({reason}) after {endpointer.silence_ms():.0f} ms of silence: '{endpointer.text}'")
+        early_turn["task"] = start_turn(endpointer.text)
+        early_turn["turn_order"] = current_turn_order
+        early_turn["text"] = endpointer.text
+
+    async def on_transcript(event: TranscriptEvent):
+        nonlocal current_turn_order
+        current_turn_order = event.turn_order
+        await websocket.send_text(json.dumps({
+            "type": "transcript",
+            "content": event.text,
+            "final": event.is_final,
+            "start_ms": event.start_ms,
+            "end_ms": event.end_ms,
+        }))
+
+        was_ended = endpointer.ended
+        reason = endpointer.on_transcript(event.text, event.is_final)
+        if was_ended and not endpointer.ended and early_turn["task"]:
+            logger.info("User kept talking; retracting early end of turn")
+            early_turn["task"].cancel()
+            early_turn["task"] = None
+            await websocket.send_text(json.dumps({"type": "turn_cancelled"}))
+
+        if event.is_final:
+            if early_turn["task"] is None or early_turn["turn_order"] != event.turn_order:
+                start_turn(event.text)
+            elif not transcripts_match(early_turn["text"], event.text):
+                # The early turn answered a partial that lost the user's last words
+                logger.info(f"Final transcript '{event.text}' differs from the early turn's; restarting the turn")
+                early_turn["task"].cancel()
+                await websocket.send_text(json.dumps({"type": "turn_cancelled"}))
+                start_turn(event.text)
+            early_turn["task"] = None
+            endpointer.reset()
+        elif reason:
+            end_turn_early(reason)
+        else:
+            maybe_speculate()
+
+    async def endpoint_ticker():
+        while True:
+            await asyncio.sleep(ENDPOINT_TICK_SECS)
+            reason = endpointer.check()
+            if reason:
+                end_turn_early(reason)
+            else:
+                maybe_speculate()
+
+    transcriber = StreamingTranscriber(on_transcript=on_transcript, sample_rate=audio_format.sample_rate,
+                                       encoding=audio_format.encoding)
+    try:
+        await transcriber.connect()
+    except Exception as e:
+        logger.error(f"Failed to connect streaming STT: {e}")
+        await websocket.send_text(json.dumps({"type": "error", "message": "Streaming transcription unavailable"}))
+    ticker = asyncio.create_task(endpoint_ticker())
+    await websocket.send_text(json.dumps({"type": "ready"}))
+
+    total_bytes = 0
+    # Decided from the first chunk: a compressed container (e.g. MediaRecorder webm) is never sent on as raw audio
+    raw_audio = None
+    ws_sessions_active.inc()
+    memory_handle = memory_accountant.track_connection(
+        session_id, recorder=recorder, transcriber=transcriber, endpointer=endpointer, speculation=speculation)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if not data:
+                continue
+            total_bytes += len(data)
+            logger.debug(f"Received audio chunk: {len(data)} bytes, total: {total_bytes} bytes")
+            if raw_audio is None:
+                container = sniff_container(data)
+                raw_audio = container is None
+                if container:
+                    logger.warning(f"Session {session_id} is streaming {container}, not raw {audio_format.encoding}; "
+                                   "realtime transcription disabled")
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Realtime transcription needs raw {audio_format.encoding} audio at "
+                                   f"{audio_format.sample_rate} Hz, but this client sends {container}. "
+                                   "Reload the page to update it.",
+                    }))
+                    await transcriber.close()
+            if raw_audio and transcriber.enabled:
+                await transcriber.send_audio(data)
+            # Energy-based silence only for audio known to be PCM16; anything else ends turns on transcript silence
+            if raw_audio and audio_format.declared and audio_format.is_pcm16:
+                reason = endpointer.on_audio(data)
+                if reason:
+                    end_turn_early(reason)
+            if recorder:
+                recorder.write(data)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+    finally:
+        ws_sessions_active.dec()
+        memory_accountant.untrack_connection(memory_handle)
+        ticker.cancel()
+        if speculation["current"]:
+            speculation["current"].cancel()
+        await transcriber.close()
+        for task in list(turn_tasks):
+            task.cancel()
+        if recorder:
+            recorder.close()
+
 # Set persona for session
 @app.post("/persona/{session_id}/{persona_name}")
 async def set_persona(session_id: str, persona_name: str):
     """Set persona for a session"""
-    valid_personas = ["default", "pirate", "robot", "cowboy"]
+    valid_personas = persona_registry.names()
     if persona_name not in valid_personas:
         raise HTTPException(status_code=400, detail=f"Invalid persona. Valid options: {valid_personas}")
 
@@ -236,26 +566,165 @@ async def get_persona(session_id: str):
     persona = CHAT_SESSIONS.get(f"{session_id}_persona", "default")
     return JSONResponse(content={"session_id": session_id, "persona": persona})
 
+@app.get("/personas")
+async def list_personas():
+    """Available personas with their voice and system prompt size"""
+    return JSONResponse(content={"personas": persona_registry.describe()})
+
+# List recorded audio for session
+@app.get("/recorded-audio/{session_id}")
+async def recorded_audio(session_id: str):
+    """List recorded audio files for a session from the recording index"""
+    files = await asyncio.to_thread(recording_store.list_session, session_id)
+    return JSONResponse(content={"session_id": session_id, "files": files})
+
+@app.get("/recordings/usage")
+async def recordings_usage():
+    """Recording store usage, quotas and retention settings"""
+    return JSONResponse(content=await asyncio.to_thread(recording_store.usage))
+
+@app.get("/speculation/stats")
+async def speculation_statistics():
+    """Speculative LLM generation hit rate and wasted tokens"""
+    return JSONResponse(content=speculation_stats.snapshot())
+
+@app.get("/llm/stats")
+async def llm_statistics():
+    """LLM call latency percentiles, hedging and deadline counters"""
+    return JSONResponse(content=llm_client.stats())
+
+@app.get("/circuit-breakers")
+async def circuit_breaker_states():
+    """Circuit breaker state and failure counts for each upstream provider"""
+    return JSONResponse(content=circuit_breakers.snapshot())
+
+@app.get("/rate-limits")
+async def rate_limit_states():
+    """Client-side token buckets per provider and API key (keys shown as fingerprints)"""
+    return JSONResponse(content=rate_limiters.snapshot())
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/debug/traces", dependencies=[Depends(require_admin)])
+async def debug_traces(limit: int = 50, session_id: Optional[str] = None):
+    """Most recent turns, newest first, with time spent per stage (admin only: spans carry user speech)"""
+    return JSONResponse(content={"tracer": tracer.stats(), "traces": tracer.recent(limit, session_id)})
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def debug_trace(trace_id: str):
+    """Every span of one turn"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have left the buffer)")
+    return JSONResponse(content=trace)
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_cpu_profile(seconds: float = 10.0, interval: Optional[float] = None, idle: bool = False):
+    """Sample this worker's stacks for N seconds and return them as collapsed stacks for a flamegraph"""
+    if seconds <= 0 or seconds > profiler.max_seconds:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {profiler.max_seconds:g}]")
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+    try:
+        # Sample from a worker thread so the event loop keeps serving (and shows up in the profile)
+        result = await asyncio.to_thread(profiler.capture, seconds, interval, idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(content=result["collapsed"], media_type="text/plain; charset=utf-8", headers={
+        "Content-Disposition": f'attachment; filename="profile-{os.getpid()}.collapsed"',
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Seconds": str(result["seconds"]),
+        "X-Profile-Overhead": str(result["overhead"]),
+    })
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile_status():
+    """Whether a capture is running and how the last one went"""
+    return JSONResponse(content=profiler.snapshot())
+
+@app.get("/debug/loop-lag", dependencies=[Depends(require_admin)])
+async def debug_loop_lag():
+    """Event-loop lag and the call sites that blocked the loop, with their stacks"""
+    return JSONResponse(content=loop_monitor.snapshot())
+
+@app.get("/admin/memory", dependencies=[Depends(require_admin)])
+async def admin_memory_report():
+    """Approximate bytes held by sessions, caches and each open WebSocket connection"""
+    return JSONResponse(content=await asyncio.to_thread(memory_accountant.report))
+
+@app.post("/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+async def admin_memory_snapshot(limit: int = 20, frames: Optional[int] = None):
+    """Take a tracemalloc snapshot (starting tracemalloc if needed) and show the top allocating lines"""
+    return JSONResponse(content=await asyncio.to_thread(memory_accountant.take_snapshot, limit, frames))
+
+@app.get("/admin/memory/snapshots/{base_id}/diff", dependencies=[Depends(require_admin)])
+async def admin_memory_diff(base_id: int, target: Optional[int] = None, limit: int = 20, group_by: str = "lineno"):
+    """What grew since snapshot base_id, by module and line (against a new snapshot unless target is given)"""
+    try:
+        return JSONResponse(content=await asyncio.to_thread(memory_accountant.diff, base_id, target, limit, group_by))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e.args[0]} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+async def admin_memory_stop_tracing():
+    """Stop tracemalloc and drop the snapshots"""
+    await asyncio.to_thread(memory_accountant.stop_tracing)
+    return JSONResponse(content=memory_accountant.tracing_status())
+
+@app.get("/api-keys")
+async def api_key_pools():
+    """Load and drain state of each provider's API keys (keys shown as fingerprints)"""
+    return JSONResponse(content=key_pools.snapshot())
+
+@app.get("/tts/stats")
+async def tts_statistics():
+    """Murf REST request latency and pooled connection reuse"""
+    return JSONResponse(content=murf_http.stats())
+
+@app.get("/search/stats")
+async def search_statistics():
+    """Search result compaction, cache hit rate and popular-query refresh budget"""
+    return JSONResponse(content={
+        "compaction": compaction_stats.snapshot(),
+        "cache": search_cache.snapshot(),
+        "refresher": search_refresher.snapshot(),
+        "popular": search_cache.popular(),
+    })
+
+@app.get("/intent-router/stats")
+async def intent_router_statistics():
+    """Fast-path intent router hit rate and latency"""
+    return JSONResponse(content=intent_router.stats())
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "AI Voice Agent is running"}
 
+@app.get("/livez")
+async def liveness():
+    """Liveness: the process is up and its event loop answers; restart the worker if this fails"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_check():
+    """Readiness from cached provider checks, breaker state, loop lag and queue depth; 503 when not ready"""
+    result = readiness.status()
+    return JSONResponse(content=result, status_code=503 if result["status"] == "not_ready" else 200)
+
 @app.get("/test-transcription")
 async def test_transcription():
     """Test endpoint to check transcription service"""
     try:
-        # Test if AssemblyAI is configured
-        from services.stt import ASSEMBLYAI_API_KEY
-        assemblyai_configured = bool(ASSEMBLYAI_API_KEY and ASSEMBLYAI_API_KEY != "your_assemblyai_api_key_here")
-
-        # Test if Murf is configured - check environment variable directly
-        murf_api_key = os.getenv("MURF_API_KEY")
-        murf_configured = bool(murf_api_key and murf_api_key != "your_murf_api_key_here")
-
-        # Test if Gemini is configured
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        gemini_configured = bool(gemini_api_key and gemini_api_key != "your_gemini_api_key_here")
+        # A provider is configured when its key pool has at least one real key
+        assemblyai_configured = key_pools.get("assemblyai").configured()
+        murf_configured = key_pools.get("murf").configured()
+        gemini_configured = key_pools.get("gemini").configured()
 
         return {
             "status": "ok",
@@ -13,6 +13,7 @@ from schemas.audio import SpeechRequest, SpeechResponse
 from schemas.chat import ChatResponse
 
 from services.tts import murf_tts, fallback_tts
+from services.personas import persona_registry
 from services.stt import transcribe_audio
 from services.llm_day24 import generate_llm_response
 from custom_json import custom_json_dumps
@@ -176,7 +177,7 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
     try:
         for chunk in split_text(llm_text, 3000):
             if chunk.strip():
-                audio_url = murf_tts(chunk)
+                audio_url = murf_tts(chunk, persona_registry.get(persona).voice_id)
                 if audio_url:
                     audio_urls.append(audio_url)
                     logger.info(f"TTS chunk generated: {audio_url}")
@@ -220,7 +221,7 @@ async def agent_chat(session_id: str = Path(...), file: UploadFile = File(...)):
 @app.post("/persona/{session_id}/{persona_name}")
 async def set_persona(session_id: str, persona_name: str):
     """Set persona for a session"""
-    valid_personas = ["default", "pirate", "robot", "cowboy"]
+    valid_personas = persona_registry.names()
     if persona_name not in valid_personas:
         raise HTTPException(status_code=400, detail=f"Invalid persona. Valid options: {valid_personas}")
 
@@ -0,0 +1,10 @@
+"""
+Offline load testing for the voice agent
+
+Starts local stand-ins for Murf, AssemblyAI (REST and realtime), Tavily
+and the LLM, runs the real app against them in a uvicorn subprocess and
+drives /agent/chat, /generate-audio and the WebSocket path at a target
+concurrency. Nothing leaves the machine and no API quota is used.
+
+    python -m loadtest.run --profile realistic --concurrency 20 --duration 30
+"""
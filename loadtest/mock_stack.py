@@ -0,0 +1,101 @@
+"""
+All provider stand-ins for a load test, started together
+
+The HTTP mocks (Murf over TLS, AssemblyAI REST, Tavily) run on their own
+server threads and the realtime STT mock on a private event loop thread.
+The LLM mock runs inside the app process; it is shaped through the
+MOCK_LLM_* variables in env().
+"""
+
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+from loadtest.profiles import ProviderProfile
+from mocks.assemblyai_realtime import MockRealtimeSTTServer
+from mocks.assemblyai_rest import MockAssemblyAIServer
+from mocks.murf_server import MockMurfServer
+from mocks.shaping import ServiceShaper
+from mocks.tavily_server import MockTavilyServer
+
+# A mix of turns that take every path: LLM small talk and the weather/news fast path through Tavily
+UTTERANCES = [
+    "hello how are you today",
+    "what's the weather in Paris",
+    "tell me a fun fact about space",
+    "what is the latest news about technology",
+]
+
+MOCK_KEY = "loadtest-key"
+
+
+def _shaper(profile: ProviderProfile, seed: int) -> ServiceShaper:
+    return ServiceShaper(profile.latency, capacity=profile.capacity, error_status=profile.error_status, seed=seed)
+
+
+class MockStack:
+    def __init__(self, profiles: Dict[str, ProviderProfile], utterances: Optional[List[str]] = None,
+                 chunks_per_word: int = 2, silence_chunks: int = 3, seed: int = 0) -> None:
+        self.profiles = profiles
+        self.utterances = utterances or UTTERANCES
+        self.seed = seed
+        self.murf = MockMurfServer(shaper=_shaper(profiles["murf"], seed))
+        self.stt = MockAssemblyAIServer(self.utterances, shaper=_shaper(profiles["stt"], seed + 1))
+        self.tavily = MockTavilyServer(shaper=_shaper(profiles["tavily"], seed + 2))
+        self._realtime_shaper = _shaper(profiles["stt_realtime"], seed + 3)
+        self._realtime_args = {"chunks_per_word": chunks_per_word, "silence_chunks": silence_chunks}
+        self.realtime: Optional[MockRealtimeSTTServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.murf.start()
+        self.stt.start()
+        self.tavily.start()
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="mock-realtime-stt", daemon=True)
+        self._loop_thread.start()
+        self.realtime = MockRealtimeSTTServer(self.utterances, shaper=self._realtime_shaper, **self._realtime_args)
+        asyncio.run_coroutine_threadsafe(self.realtime.start(), self._loop).result(timeout=10)
+
+    def stop(self) -> None:
+        if self.realtime and self._loop:
+            asyncio.run_coroutine_threadsafe(self.realtime.stop(), self._loop).result(timeout=10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+        self.murf.stop()
+        self.stt.stop()
+        self.tavily.stop()
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points the app at the mocks."""
+        llm = self.profiles["llm"]
+        return {
+            "MURF_API_KEY": MOCK_KEY,
+            "MURF_TTS_ENDPOINT": self.murf.url,
+            "MURF_CA_BUNDLE": self.murf.cert_file,
+            "ASSEMBLYAI_API_KEY": MOCK_KEY,
+            "ASSEMBLYAI_BASE_URL": self.stt.url,
+            "ASSEMBLYAI_STREAMING_URL": self.realtime.url,
+            "STT_STREAMING_ENCODING": "pcm_s16le",
+            "TAVILY_API_KEY": MOCK_KEY,
+            "TAVILY_API_URL": self.tavily.url,
+            "LLM_PROVIDER": "mock",
+            "MOCK_LLM_MEDIAN_SECS": str(llm.latency.median),
+            "MOCK_LLM_SIGMA": str(llm.latency.sigma),
+            "MOCK_LLM_TAIL_PROBABILITY": str(llm.latency.tail_probability),
+            "MOCK_LLM_TAIL_MULTIPLIER": str(llm.latency.tail_multiplier),
+            "MOCK_LLM_ERROR_PROBABILITY": str(llm.latency.error_probability),
+            "MOCK_LLM_CAPACITY": str(llm.capacity),
+            "MOCK_LLM_SEED": str(self.seed),
+        }
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            "murf": self.murf.shaper.stats(),
+            "stt": self.stt.shaper.stats(),
+            "stt_realtime": {**self._realtime_shaper.stats(),
+                             "connections": self.realtime.connections if self.realtime else 0,
+                             "audio_bytes": self.realtime.audio_bytes if self.realtime else 0},
+            "tavily": self.tavily.shaper.stats(),
+        }
@@ -0,0 +1,89 @@
+"""
+Provider behaviour presets for the load test
+
+Each provider gets a LatencyProfile (lognormal latency with a slow tail and
+an error probability) and a capacity: how many requests it serves at once
+before further ones queue. Presets can be adjusted from the command line
+with e.g. `--set murf.median=0.5 --set llm.capacity=4`.
+"""
+
+import copy
+from dataclasses import dataclass, field, fields
+from typing import Dict, List
+
+from mocks.shaping import LatencyProfile
+
+PROVIDERS = ("stt", "stt_realtime", "llm", "murf", "tavily")
+
+
+@dataclass
+class ProviderProfile:
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    capacity: int = 0
+    error_status: int = 500
+
+
+def _profile(median: float, sigma: float = 0.25, tail_probability: float = 0.0, tail_multiplier: float = 4.0,
+             error_probability: float = 0.0, capacity: int = 0, error_status: int = 500) -> ProviderProfile:
+    return ProviderProfile(LatencyProfile(median, sigma, tail_probability, tail_multiplier, error_probability),
+                           capacity, error_status)
+
+
+PRESETS: Dict[str, Dict[str, ProviderProfile]] = {
+    # Near-instant providers: what is left is the app's own overhead
+    "fast": {
+        "stt": _profile(0.01, sigma=0.0),
+        "stt_realtime": _profile(0.01, sigma=0.0),
+        "llm": _profile(0.02, sigma=0.0, tail_probability=0.0),
+        "murf": _profile(0.01, sigma=0.0),
+        "tavily": _profile(0.01, sigma=0.0),
+    },
+    # Latencies in the range the real providers show
+    "realistic": {
+        "stt": _profile(0.6, tail_probability=0.03),
+        "stt_realtime": _profile(0.15),
+        "llm": _profile(0.8, tail_probability=0.05, tail_multiplier=6.0),
+        "murf": _profile(0.35, tail_probability=0.03),
+        "tavily": _profile(0.4, tail_probability=0.05),
+    },
+    # Flaky providers: errors and heavy tails, to exercise breakers, hedging and fallbacks
+    "degraded": {
+        "stt": _profile(0.8, tail_probability=0.1, error_probability=0.05),
+        "stt_realtime": _profile(0.2, error_probability=0.02),
+        "llm": _profile(1.0, tail_probability=0.15, tail_multiplier=6.0, error_probability=0.05),
+        "murf": _profile(0.5, tail_probability=0.1, error_probability=0.2),
+        "tavily": _profile(0.6, tail_probability=0.2, error_probability=0.1),
+    },
+    # Realistic latencies but few concurrent slots per provider, so requests queue upstream
+    "saturated": {
+        "stt": _profile(0.6, capacity=4),
+        "stt_realtime": _profile(0.15),
+        "llm": _profile(0.8, tail_probability=0.05, capacity=4),
+        "murf": _profile(0.35, capacity=4),
+        "tavily": _profile(0.4, capacity=2, error_status=429),
+    },
+}
+
+
+def build_profiles(preset: str, overrides: List[str] = ()) -> Dict[str, ProviderProfile]:
+    """A preset with `provider.field=value` overrides applied (latency fields or capacity/error_status)."""
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown profile '{preset}'; choose from {', '.join(PRESETS)}")
+    profiles = copy.deepcopy(PRESETS[preset])
+    latency_fields = {f.name for f in fields(LatencyProfile)}
+    for override in overrides:
+        try:
+            target, value = override.split("=", 1)
+            provider, name = target.split(".", 1)
+        except ValueError:
+            raise ValueError(f"Override '{override}' must look like provider.field=value")
+        if provider not in profiles:
+            raise ValueError(f"Unknown provider '{provider}'; choose from {', '.join(PROVIDERS)}")
+        if name in latency_fields:
+            setattr(profiles[provider].latency, name, float(value))
+        elif name in ("capacity", "error_status"):
+            setattr(profiles[provider], name, int(value))
+        else:
+            raise ValueError(f"Unknown field '{name}'; use one of {', '.join(sorted(latency_fields))}, "
+                             "capacity or error_status")
+    return profiles
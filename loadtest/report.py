@@ -0,0 +1,98 @@
+"""
+Load-test results: client-side latency, throughput and errors per scenario,
+plus exact server-side stage percentiles read back from the app's OTLP trace
+export (TRACE_EXPORT_FILE), grouped by turn type and span name.
+"""
+
+import json
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from loadtest.scenarios import PhaseResult
+from services.llm_providers import percentile
+
+QUANTILES = (50, 95, 99)
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    return {"n": len(values), **{f"p{q}_ms": round(percentile(values, q / 100) * 1000, 1) if values else None
+                                 for q in QUANTILES}}
+
+
+def summarize_phase(phase: PhaseResult) -> Dict[str, Any]:
+    ok = [s for s in phase.samples if s.ok]
+    stages = defaultdict(list)
+    for sample in ok:
+        for name, value in sample.stages.items():
+            stages[name].append(value)
+    total = len(phase.samples)
+    return {
+        "concurrency": phase.concurrency,
+        "requests": total,
+        "errors": total - len(ok),
+        "error_rate": round((total - len(ok)) / total, 4) if total else 0.0,
+        "throughput_rps": round(len(ok) / phase.elapsed, 2) if phase.elapsed else 0.0,
+        "latency": summarize([s.latency for s in ok]),
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+        "top_errors": dict(Counter(s.error for s in phase.samples if not s.ok).most_common(5)),
+    }
+
+
+def load_trace_stages(path: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{turn name: {span name: summary}} from an OTLP/JSON-lines trace export."""
+    durations: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return {}
+    for line in lines:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        for resource in request.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                spans = scope.get("spans", [])
+                root = next((s for s in spans if "parentSpanId" not in s), None)
+                if root is None:
+                    continue
+                for span in spans:
+                    seconds = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e9
+                    durations[root["name"]][span["name"]].append(seconds)
+    return {turn: {name: summarize(values) for name, values in sorted(spans.items())}
+            for turn, spans in sorted(durations.items())}
+
+
+def _rows(rows: Dict[str, Dict[str, Any]], indent: str = "  ") -> List[str]:
+    lines = []
+    for name, s in rows.items():
+        cells = "".join(f"{s[f'p{q}_ms']:>10}" if s[f"p{q}_ms"] is not None else f"{'-':>10}" for q in QUANTILES)
+        lines.append(f"{indent}{name:<28}{s['n']:>7}{cells}")
+    return lines
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = f"  {'':<28}{'n':>7}" + "".join(f"{f'p{q} ms':>10}" for q in QUANTILES)
+    lines = [f"Load test: profile={report['profile']}"]
+    for name, phase in report["scenarios"].items():
+        lines += ["", f"[{name}] concurrency={phase['concurrency']} requests={phase['requests']} "
+                      f"throughput={phase['throughput_rps']} req/s error_rate={phase['error_rate']:.2%}",
+                  header]
+        lines += _rows({"end_to_end": phase["latency"], **phase["stages"]})
+        for error, count in phase["top_errors"].items():
+            lines.append(f"  error x{count}: {error}")
+    for turn, stages in report.get("server_stages", {}).items():
+        lines += ["", f"Server stages ({turn} traces)", header]
+        lines += _rows(stages)
+    loop = report.get("event_loop") or {}
+    if loop:
+        lines += ["", f"Event loop: max lag {loop.get('max_lag_ms')} ms, stalls {loop.get('stalls')}"]
+        for site in (loop.get("blocking_sites") or [])[:5]:
+            lines.append(f"  {site['stalls']}x {site['site']}")
+    providers = report.get("providers") or {}
+    if providers:
+        lines += ["", "Mock providers"]
+        for name, stats in providers.items():
+            lines.append(f"  {name:<14}" + " ".join(f"{k}={v}" for k, v in stats.items()))
+    return "\n".join(lines)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Run the voice agent under load against local provider mocks
+
+Starts the mock stack, launches the app with uvicorn in a subprocess pointed
+at the mocks (with trace export on), then drives each scenario in turn with
+`--concurrency` closed-loop clients and prints per-scenario latency
+percentiles, throughput and error rate next to the server's own per-stage
+percentiles from the trace export.
+
+    python -m loadtest.run --profile realistic --concurrency 20 --duration 30
+    python -m loadtest.run --profile degraded --scenarios ws --set murf.error_probability=0.5
+    python -m loadtest.run --scenarios ws --ws-audio webm
+
+The app keeps its own per-key provider rate limits, so the mock keys are
+throttled like real ones; lift them with e.g. --app-env RATE_LIMIT_MURF_RPS=100
+to load the rest of the pipeline.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import secrets
+import asyncio
+import argparse
+import tempfile
+import itertools
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+
+from loadtest import scenarios
+from loadtest.mock_stack import MockStack
+from loadtest.profiles import PRESETS, build_profiles
+from loadtest.report import format_report, load_trace_stages, summarize_phase
+
+SCENARIOS = ("agent_chat", "generate_audio", "ws")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _key_values(pairs: List[str]) -> Dict[str, str]:
+    values = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"'{pair}' must look like KEY=VALUE")
+        values[key] = value
+    return values
+
+
+class AppProcess:
+    """The real app under uvicorn, with its output going to a log file."""
+
+    def __init__(self, env: Dict[str, str], port: int, workdir: str) -> None:
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.log_file = os.path.join(workdir, "app.log")
+        self.env = {**os.environ, **env}
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 60.0) -> None:
+        with open(self.log_file, "wb") as log:
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(self.port),
+                 "--log-level", "warning"],
+                cwd=ROOT, env=self.env, stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"App exited with code {self._process.returncode}; see {self.log_file}")
+            try:
+                if httpx.get(f"{self.base_url}/readyz", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        # Still not ready (e.g. a required provider the profile left unconfigured): run if it is at least alive
+        if httpx.get(f"{self.base_url}/livez", timeout=2).status_code != 200:
+            raise RuntimeError(f"App did not start within {timeout}s; see {self.log_file}")
+        print(f"⚠️ /readyz never reported ready; continuing anyway (see {self.log_file})")
+
+    def stop(self) -> None:
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+async def run_scenarios(app: AppProcess, names: List[str], concurrency: int, duration: float, max_requests: int,
+                        turns_per_session: int, ws_pace: float, speech_chunks: List[int],
+                        silence_chunks: int, ws_audio: str = "pcm") -> Dict[str, Dict]:
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=app.base_url, timeout=60.0, limits=limits) as client:
+        audio = scenarios.make_wav()
+        run_id = uuid.uuid4().hex[:8]
+        texts = itertools.cycle(scenarios.TTS_TEXTS)
+        turns = itertools.cycle(speech_chunks)
+        ws_url = app.base_url.replace("http", "ws", 1)
+
+        def session(worker: int, iteration: int) -> str:
+            return f"load-{run_id}-{worker}-{iteration // max(1, turns_per_session)}"
+
+        actions = {
+            "agent_chat": lambda w, i: scenarios.agent_chat(client, session(w, i), audio),
+            "generate_audio": lambda w, i: scenarios.generate_audio(client, next(texts)),
+            "ws": lambda w, i: scenarios.ws_turn(ws_url, f"load-{run_id}-ws-{w}-{i}", next(turns),
+                                                 silence_chunks, pace=ws_pace, audio=ws_audio),
+        }
+        for name in names:
+            print(f"🚀 {name}: {concurrency} clients for {duration:g}s"
+                  + (f" (max {max_requests} requests)" if max_requests else ""))
+            phase = await scenarios.run_phase(name, actions[name], concurrency, duration, max_requests)
+            results[name] = summarize_phase(phase)
+            print(f"   {results[name]['requests']} requests, {results[name]['errors']} errors")
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict:
+    profiles = build_profiles(args.profile, args.set)
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    workdir = tempfile.mkdtemp(prefix="voice-loadtest-")
+    trace_file = os.path.join(workdir, "traces.jsonl")
+    stack = MockStack(profiles, chunks_per_word=args.chunks_per_word, silence_chunks=args.silence_chunks,
+                      seed=args.seed)
+    stack.start()
+    app = None
+    try:
+        env = {**stack.env(), "TRACE_EXPORT_FILE": trace_file, "ADMIN_TOKEN": secrets.token_hex(16),
+               "RECORDING_DIRECTORY": os.path.join(workdir, "recordings"), **_key_values(args.app_env)}
+        app = AppProcess(env, args.port or free_port(), workdir)
+        app.start()
+        speech_chunks = [len(u.split()) * args.chunks_per_word for u in stack.utterances]
+        results = asyncio.run(run_scenarios(app, names, args.concurrency, args.duration, args.requests,
+                                            args.turns_per_session, args.ws_pace, speech_chunks,
+                                            args.silence_chunks, args.ws_audio))
+        time.sleep(1.0)  # let the app's trace exporter catch up
+        try:
+            response = httpx.get(f"{app.base_url}/debug/loop-lag", timeout=5,
+                                 headers={"Authorization": f"Bearer {env['ADMIN_TOKEN']}"})
+            response.raise_for_status()
+            event_loop = response.json()
+        except (httpx.HTTPError, ValueError):
+            event_loop = {}
+        return {
+            "profile": args.profile,
+            "overrides": args.set,
+            "scenarios": results,
+            "server_stages": load_trace_stages(trace_file),
+            "event_loop": event_loop,
+            "providers": stack.stats(),
+            "workdir": workdir,
+        }
+    finally:
+        if app:
+            app.stop()
+        stack.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="realistic", choices=sorted(PRESETS), help="Provider behaviour preset")
+    parser.add_argument("--set", action="append", default=[], metavar="PROVIDER.FIELD=VALUE",
+                        help="Override a preset value, e.g. llm.median=1.5 or murf.capacity=4 (repeatable)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run each scenario")
+    parser.add_argument("--requests", type=int, default=0, help="Stop a scenario after this many requests")
+    parser.add_argument("--turns-per-session", type=int, default=5, help="agent_chat turns before a new session")
+    parser.add_argument("--ws-pace", type=float, default=1.0,
+                        help="WebSocket audio speed relative to real time (0 sends as fast as possible)")
+    parser.add_argument("--ws-audio", default="pcm", choices=scenarios.WS_AUDIO,
+                        help="What /ws clients stream: declared 16 kHz PCM, or undeclared MediaRecorder webm "
+                             "that the server should refuse")
+    parser.add_argument("--chunks-per-word", type=int, default=2, help="100 ms audio chunks per scripted word")
+    parser.add_argument("--silence-chunks", type=int, default=3, help="Silent chunks that end a spoken turn")
+    parser.add_argument("--port", type=int, default=0, help="Port for the app (default: a free one)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the app process (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the mocks' latency and error draws")
+    parser.add_argument("--json", metavar="FILE", help="Also write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run(args)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 2
+    print()
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
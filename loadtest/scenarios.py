@@ -0,0 +1,184 @@
+"""
+The three traffic shapes the load test drives, and the closed-loop runner
+
+Each scenario call performs one user action and returns a Sample with its
+end-to-end latency and any client-visible stage timings. run_phase() keeps
+`concurrency` workers issuing actions back to back until the duration (or
+request budget) is spent.
+"""
+
+import io
+import os
+import json
+import time
+import wave
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+SAMPLE_RATE = 16000
+CHUNK_SECS = 0.1
+CHUNK_BYTES = int(SAMPLE_RATE * 2 * CHUNK_SECS)
+# EBML header every MediaRecorder webm stream starts with
+WEBM_MAGIC = b"\x1a\x45\xdf\xa3"
+WS_AUDIO = ("pcm", "webm")
+
+TTS_TEXTS = [
+    "Hello there, thanks for calling. How can I help you today?",
+    "The weather in Paris is sunny with a high of twenty degrees.",
+    "Here is a fun fact: a day on Venus is longer than its year.",
+]
+
+
+@dataclass
+class Sample:
+    ok: bool
+    latency: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class PhaseResult:
+    scenario: str
+    concurrency: int
+    elapsed: float
+    samples: List[Sample]
+
+
+def make_wav(seconds: float = 1.0) -> bytes:
+    """A small noise WAV for /agent/chat; the mock STT ignores the content."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(os.urandom(int(SAMPLE_RATE * 2 * seconds)))
+    return buffer.getvalue()
+
+
+async def agent_chat(client: httpx.AsyncClient, session_id: str, audio: bytes) -> Sample:
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"/agent/chat/{session_id}",
+                                      files={"file": ("turn.wav", audio, "audio/wav")})
+        latency = time.perf_counter() - start
+        body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+        if response.status_code != 200:
+            return Sample(False, latency, error=f"HTTP {response.status_code}")
+        if body.get("error"):
+            return Sample(False, latency, error=str(body["error"])[:80])
+        return Sample(True, latency)
+    except (httpx.HTTPError, ValueError) as e:
+        return Sample(False, time.perf_counter() - start, error=type(e).__name__)
+
+
+async def generate_audio(client: httpx.AsyncClient, text: str) -> Sample:
+    start = time.perf_counter()
+    try:
+        response = await client.post("/generate-audio", json={"text": text})
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return Sample(False, latency, error=f"HTTP {response.status_code}")
+        body = response.json()
+        if body.get("error"):
+            return Sample(False, latency, error=str(body["error"])[:80])
+        return Sample(True, latency)
+    except (httpx.HTTPError, ValueError) as e:
+        return Sample(False, time.perf_counter() - start, error=type(e).__name__)
+
+
+async def ws_turn(ws_url: str, session_id: str, speech_chunks: int, silence_chunks: int,
+                  pace: float = 1.0, timeout: float = 30.0, audio: str = "pcm") -> Sample:
+    """One spoken turn over /ws: stream speech then silence at `pace` x real time, wait for the reply.
+
+    With audio="pcm" the client declares 16 kHz PCM16, like the web client, so
+    the server also runs energy endpointing. Stages are measured from the end
+    of speech (the last non-silent chunk): final transcript, first LLM chunk
+    and audio ready.
+
+    With audio="webm" it streams MediaRecorder-style webm chunks without
+    declaring a format, like a client from before the PCM capture; the turn
+    succeeds when the server refuses the stream, and "refused" is measured
+    from the first chunk.
+    """
+    start = time.perf_counter()
+    stages: Dict[str, float] = {}
+    query = f"?encoding=pcm_s16le&sample_rate={SAMPLE_RATE}" if audio == "pcm" else ""
+    try:
+        async with websockets.connect(f"{ws_url}/ws/{session_id}{query}", max_size=None,
+                                      open_timeout=timeout) as ws:
+            ready = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            if ready.get("type") == "error":
+                return Sample(False, time.perf_counter() - start, error=ready.get("message", "error")[:80])
+            stages["connect"] = time.perf_counter() - start
+            if audio == "webm":
+                return await _webm_turn(ws, speech_chunks + silence_chunks, pace, timeout, start, stages)
+            speech_end = time.perf_counter()
+            for i in range(speech_chunks + silence_chunks):
+                chunk = os.urandom(CHUNK_BYTES) if i < speech_chunks else bytes(CHUNK_BYTES)
+                await ws.send(chunk)
+                if i == speech_chunks - 1:
+                    speech_end = time.perf_counter()
+                if pace:
+                    await asyncio.sleep(CHUNK_SECS / pace)
+            while True:
+                message = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+                kind = message.get("type")
+                now = time.perf_counter() - speech_end
+                if kind == "turn_end":
+                    stages.setdefault("final_transcript", now)
+                elif kind == "llm_chunk":
+                    stages.setdefault("first_llm_chunk", now)
+                elif kind == "audio_ready":
+                    stages.setdefault("audio_ready", now)
+                elif kind == "complete":
+                    return Sample(True, time.perf_counter() - start, stages)
+                elif kind == "error":
+                    return Sample(False, time.perf_counter() - start, stages, message.get("message", "error")[:80])
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+        return Sample(False, time.perf_counter() - start, stages, type(e).__name__)
+
+
+async def _webm_turn(ws, chunks: int, pace: float, timeout: float, start: float,
+                     stages: Dict[str, float]) -> Sample:
+    """Stream webm chunks (EBML header first, as MediaRecorder does) and expect the server to refuse them."""
+    first_sent = time.perf_counter()
+    await ws.send(WEBM_MAGIC + os.urandom(CHUNK_BYTES))
+    message = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+    if message.get("type") != "error" or "webm" not in message.get("message", ""):
+        return Sample(False, time.perf_counter() - start, stages, f"webm not refused: {message.get('type')}")
+    stages["refused"] = time.perf_counter() - first_sent
+    # An old client keeps streaming after the refusal; nothing it sends may start a turn
+    for _ in range(chunks - 1):
+        await ws.send(os.urandom(CHUNK_BYTES))
+        if pace:
+            await asyncio.sleep(CHUNK_SECS / pace)
+    try:
+        message = json.loads(await asyncio.wait_for(ws.recv(), CHUNK_SECS * 5))
+        return Sample(False, time.perf_counter() - start, stages, f"webm started a turn: {message.get('type')}")
+    except asyncio.TimeoutError:
+        return Sample(True, time.perf_counter() - start, stages)
+
+
+async def run_phase(scenario: str, action: Callable[[int, int], Awaitable[Sample]], concurrency: int,
+                    duration: float, max_requests: int = 0) -> PhaseResult:
+    """Run `concurrency` closed-loop workers; action(worker, iteration) performs one request."""
+    samples: List[Sample] = []
+    issued = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        nonlocal issued
+        iteration = 0
+        while time.perf_counter() < stop_at and (not max_requests or issued < max_requests):
+            issued += 1
+            samples.append(await action(index, iteration))
+            iteration += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return PhaseResult(scenario, concurrency, time.perf_counter() - started, samples)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AssemblyAI v3 realtime streaming API
+
+Speaks the same message protocol as the real service (Begin / Turn /
+Termination, ForceEndpoint / Terminate) and "transcribes" a scripted list
+of utterances: every `chunks_per_word` audio chunks reveal one more word
+as a partial, and after `silence_chunks` further chunks the turn is
+finalized, first unformatted and then formatted. An optional shaper
+delays each finalization (and can fail it by closing the session).
+
+Run standalone with:
+    python -m mocks.assemblyai_realtime --port 8765
+and point ASSEMBLYAI_STREAMING_URL at ws://127.0.0.1:8765
+"""
+
+import json
+import uuid
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import websockets
+
+from mocks.shaping import ServiceShaper
+
+class MockRealtimeSTTServer:
+    def __init__(self,
+                 utterances: Optional[List[str]] = None,
+                 chunks_per_word: int = 1,
+                 silence_chunks: int = 2,
+                 sample_rate: int = 16000,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 shaper: Optional[ServiceShaper] = None) -> None:
+        self.utterances = utterances or ["hello how are you today"]
+        self.shaper = shaper
+        self.chunks_per_word = max(1, chunks_per_word)
+        self.silence_chunks = silence_chunks
+        self.sample_rate = sample_rate
+        self.host = host
+        self.port = port
+        self.connections = 0
+        # Query parameters of each session (sample_rate, encoding, ...) and all audio bytes received
+        self.sessions: List[Dict[str, str]] = []
+        self.audio_bytes = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handle, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, ws, path=None) -> None:
+        self.connections += 1
+        path = path or getattr(ws, "path", "") or ""
+        self.sessions.append(dict(parse_qsl(urlsplit(path).query)))
+        await ws.send(json.dumps({"type": "Begin", "id": str(uuid.uuid4()), "expires_at": 0}))
+        bytes_per_ms = self.sample_rate * 2 / 1000.0
+        turn_order = 0
+        utterance_idx = 0
+        words: List[dict] = []
+        chunks_in_turn = 0
+        silent_chunks = 0
+        audio_bytes = 0
+
+        async def send_turn(end_of_turn: bool, formatted: bool) -> None:
+            text = " ".join(w["text"] for w in words)
+            if formatted:
+                text = text[:1].upper() + text[1:] + "."
+            await ws.send(json.dumps({
+                "type": "Turn",
+                "turn_order": turn_order,
+                "turn_is_formatted": formatted,
+                "end_of_turn": end_of_turn,
+                "end_of_turn_confidence": 0.9 if end_of_turn else 0.1,
+                "transcript": text,
+                "words": words,
+            }))
+
+        async def finalize() -> None:
+            nonlocal turn_order, utterance_idx, words, chunks_in_turn, silent_chunks
+            if words and self.shaper and await self.shaper.serve_async():
+                await ws.close(code=1011, reason="mock transcription failure")
+                return
+            if words:
+                await send_turn(True, False)
+                await send_turn(True, True)
+                turn_order += 1
+            utterance_idx += 1
+            words, chunks_in_turn, silent_chunks = [], 0, 0
+
+        try:
+            async for message in ws:
+                if isinstance(message, str):
+                    data = json.loads(message)
+                    if data.get("type") == "ForceEndpoint":
+                        await finalize()
+                    elif data.get("type") == "Terminate":
+                        await ws.send(json.dumps({
+                            "type": "Termination",
+                            "audio_duration_seconds": audio_bytes / (bytes_per_ms * 1000),
+                            "session_duration_seconds": 0,
+                        }))
+                        break
+                    continue
+
+                audio_bytes += len(message)
+                self.audio_bytes += len(message)
+                if utterance_idx >= len(self.utterances):
+                    continue
+                script = self.utterances[utterance_idx].split()
+                if len(words) < len(script):
+                    chunks_in_turn += 1
+                    if chunks_in_turn % self.chunks_per_word == 0:
+                        end = int(audio_bytes / bytes_per_ms)
+                        start = words[-1]["end"] if words else max(0, end - 300)
+                        words.append({"text": script[len(words)], "start": start, "end": end,
+                                      "confidence": 0.95, "word_is_final": True})
+                        await send_turn(False, False)
+                else:
+                    silent_chunks += 1
+                    if silent_chunks >= self.silence_chunks:
+                        await finalize()
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def _serve_forever(args) -> None:
+    server = MockRealtimeSTTServer(utterances=args.utterance or None, host=args.host, port=args.port)
+    url = await server.start()
+    print(f"Mock AssemblyAI realtime server listening on {url}")
+    await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--utterance", action="append", help="Scripted utterance (repeatable)")
+    asyncio.run(_serve_forever(parser.parse_args()))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AssemblyAI v2 REST transcription API
+
+Serves the three calls the SDK's Transcriber.transcribe() makes: upload
+(POST /v2/upload), create (POST /v2/transcript) and poll
+(GET /v2/transcript/{id}). The transcript is completed on the first poll,
+after the shaper's simulated processing time, with the next scripted
+utterance as its text; a shaped error completes it with status "error".
+
+Run standalone with:
+    python -m mocks.assemblyai_rest --port 8768 --latency 0.5
+and point ASSEMBLYAI_BASE_URL at http://127.0.0.1:8768
+"""
+
+import json
+import uuid
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+from mocks.shaping import LatencyProfile, MockHTTPServer, ServiceShaper
+
+UPLOAD_PATH = "/v2/upload"
+TRANSCRIPT_PATH = "/v2/transcript"
+
+
+class MockAssemblyAIServer:
+    def __init__(self, utterances: Optional[List[str]] = None, shaper: Optional[ServiceShaper] = None,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        self.utterances = utterances or ["hello how are you today"]
+        self.shaper = shaper
+        self.uploads = 0
+        self.transcripts: Dict[str, Dict] = {}
+        self._next_utterance = itertools.cycle(self.utterances)
+        self._lock = threading.Lock()
+        self._server = MockHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.headers.get("Authorization"):
+                    self._reply(401, {"error": "Authentication error, API token missing/invalid"})
+                elif self.path == UPLOAD_PATH:
+                    with mock._lock:
+                        mock.uploads += 1
+                    self._reply(200, {"upload_url": f"{mock.url}/uploads/{uuid.uuid4().hex}"})
+                elif self.path == TRANSCRIPT_PATH:
+                    request = json.loads(body or b"{}")
+                    transcript = {"id": uuid.uuid4().hex, "status": "queued", "audio_url": request.get("audio_url")}
+                    with mock._lock:
+                        mock.transcripts[transcript["id"]] = transcript
+                    self._reply(200, transcript)
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_GET(self):
+                transcript_id = self.path.rsplit("/", 1)[-1]
+                with mock._lock:
+                    transcript = mock.transcripts.get(transcript_id)
+                if not self.path.startswith(TRANSCRIPT_PATH + "/") or transcript is None:
+                    self._reply(404, {"error": "Transcript not found"})
+                    return
+                if transcript["status"] == "queued":
+                    error = mock.shaper.serve() if mock.shaper else None
+                    with mock._lock:
+                        if error:
+                            transcript.update(status="error", error=f"mock transcription failure ({error})")
+                        else:
+                            text = next(mock._next_utterance)
+                            transcript.update(status="completed", text=text, confidence=0.95,
+                                              audio_duration=max(1, len(text.split()) // 2), words=[])
+                self._reply(200, transcript)
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--latency", type=float, default=0.5, help="Median processing seconds per transcript")
+    parser.add_argument("--utterance", action="append", help="Scripted transcript text (repeatable)")
+    args = parser.parse_args()
+    server = MockAssemblyAIServer(utterances=args.utterance or None,
+                                  shaper=ServiceShaper(LatencyProfile(median=args.latency, tail_probability=0.0)),
+                                  host=args.host, port=args.port)
+    print(f"Mock AssemblyAI REST server listening on {server.url}")
+    print(f"Set ASSEMBLYAI_BASE_URL={server.url}")
+    server._server.serve_forever()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the Gemini provider
+
+Every call's latency is drawn from a configurable distribution (lognormal
+body plus an occasional slow tail), seeded by the prompt and how many
+times it has been asked, so a run is reproducible regardless of thread
+timing. Replies are canned and derived from the last user message.
+
+Benchmark the hedging policy offline with:
+    python -m mocks.llm_provider --requests 300 --time-scale 0.05
+"""
+
+import os
+import time
+import random
+import argparse
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from mocks.shaping import LatencyProfile
+from services.llm_providers import Conversation, HedgedLLMClient, LLMProvider, percentile
+
+
+class MockProviderError(RuntimeError):
+    pass
+
+
+def _last_user_text(conversation: Conversation) -> str:
+    for message in reversed(conversation):
+        if message.get("role") == "user":
+            return " ".join(str(part) for part in message.get("parts", []))
+    return ""
+
+
+class MockLLMProvider(LLMProvider):
+    name = "mock"
+
+    def __init__(self,
+                 profile: Optional[LatencyProfile] = None,
+                 seed: int = 0,
+                 time_scale: float = 1.0,
+                 responder: Optional[Callable[[str], str]] = None,
+                 capacity: int = 0) -> None:
+        self.profile = profile or LatencyProfile()
+        self.seed = seed
+        self.time_scale = time_scale
+        self.responder = responder or (lambda text: f"Mock reply to: {text[-200:]}")
+        self.calls = 0
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Calls served at once; beyond it they queue, like a provider at its throughput limit
+        self._capacity = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+
+    @classmethod
+    def from_env(cls, prefix: str = "MOCK_LLM") -> "MockLLMProvider":
+        """The mock as configured by LatencyProfile.from_env plus <prefix>_SEED, _TIME_SCALE and _CAPACITY,
+        so a load test can shape the provider inside the app process."""
+        return cls(LatencyProfile.from_env(prefix),
+                   seed=int(os.getenv(f"{prefix}_SEED", "0")),
+                   time_scale=float(os.getenv(f"{prefix}_TIME_SCALE", "1.0")),
+                   capacity=int(os.getenv(f"{prefix}_CAPACITY", "0")))
+
+    def _sleep(self, seconds: float) -> None:
+        if self._capacity is None:
+            time.sleep(seconds)
+            return
+        with self._capacity:
+            time.sleep(seconds)
+
+    def next_latency(self, prompt: str) -> float:
+        """Unscaled latency for the next call with this prompt (also advances the attempt count)."""
+        with self._lock:
+            attempt = self._attempts.get(prompt, 0)
+            self._attempts[prompt] = attempt + 1
+            self.calls += 1
+        rng = random.Random(f"{self.seed}:{attempt}:{prompt}")
+        latency = self.profile.sample(rng)
+        if rng.random() < self.profile.error_probability:
+            return -latency
+        return latency
+
+    def generate(self, conversation: Conversation) -> str:
+        prompt = _last_user_text(conversation)
+        latency = self.next_latency(prompt)
+        self._sleep(abs(latency) * self.time_scale)
+        if latency < 0:
+            raise MockProviderError("mock provider error")
+        return self.responder(prompt)
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        """Half the latency before the first chunk, the rest spread over a few words per chunk."""
+        prompt = _last_user_text(conversation)
+        latency = self.next_latency(prompt)
+        self._sleep(abs(latency) * self.time_scale / 2)
+        if latency < 0:
+            raise MockProviderError("mock provider error")
+        words = self.responder(prompt).split(" ")
+        chunks = [" ".join(words[i:i + 3]) + " " for i in range(0, len(words), 3)]
+        chunks[-1] = chunks[-1].rstrip(" ")
+        for i, chunk in enumerate(chunks):
+            if i:
+                self._sleep(abs(latency) * self.time_scale / 2 / len(chunks))
+            yield chunk
+
+
+def benchmark(requests: int = 300,
+              profile: Optional[LatencyProfile] = None,
+              time_scale: float = 0.05,
+              seed: int = 0) -> Dict[str, Dict]:
+    """Run the same request sequence with and without hedging; latencies are reported unscaled."""
+    results = {}
+    profile = profile or LatencyProfile()
+    for hedging in (False, True):
+        provider = MockLLMProvider(profile, seed=seed, time_scale=time_scale)
+        client = HedgedLLMClient(provider, hedging=hedging, deadline=60 * time_scale,
+                                 initial_hedge_delay=profile.median * 2 * time_scale,
+                                 min_hedge_delay=0.0,
+                                 max_hedge_delay=profile.median * 3 * time_scale)
+        latencies: List[float] = []
+        for i in range(requests):
+            start = time.perf_counter()
+            client.generate([{"role": "user", "parts": [f"request {i}"]}])
+            latencies.append((time.perf_counter() - start) / time_scale)
+        stats = client.stats()
+        results["hedged" if hedging else "baseline"] = {
+            "p50_ms": round(percentile(latencies, 0.50) * 1000),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000),
+            "provider_calls": provider.calls,
+            "extra_load": round(provider.calls / requests - 1, 3),
+            "hedge_wins": stats["hedge_wins"],
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--median", type=float, default=0.8, help="Median latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.25)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-multiplier", type=float, default=6.0)
+    parser.add_argument("--time-scale", type=float, default=0.05, help="Sleep this fraction of each latency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    profile = LatencyProfile(args.median, args.sigma, args.tail_probability, args.tail_multiplier)
+    for name, row in benchmark(args.requests, profile, args.time_scale, args.seed).items():
+        print(f"{name:9s} {row}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Local TLS stand-in for the Murf REST TTS API
+
+Serves POST /v1/speech/generate-with-key over HTTPS with a throwaway
+self-signed certificate (created with the openssl CLI) and answers with a
+fake audioFile URL. `handshake_delay` is slept before every TLS handshake to
+stand in for the network round trips a new connection to api.murf.ai costs.
+The server counts requests and connections.
+
+Compare fresh-connection calls with the pooled client:
+    python -m mocks.murf_server --benchmark --calls 50 --handshake-delay 0.05
+
+Or run it standalone and point MURF_TTS_ENDPOINT / MURF_CA_BUNDLE at it:
+    python -m mocks.murf_server --port 8767
+"""
+
+import os
+import ssl
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+from mocks.shaping import MockHTTPServer, ServiceShaper
+
+TTS_PATH = "/v1/speech/generate-with-key"
+
+
+def make_self_signed_cert(directory: str, host: str = "127.0.0.1") -> Tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key, "-out", cert, "-subj", f"/CN={host}",
+                    "-addext", f"subjectAltName=IP:{host},DNS:localhost"],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+class MockMurfServer:
+    def __init__(self, latency: float = 0.0, handshake_delay: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, shaper: Optional[ServiceShaper] = None) -> None:
+        self.latency = latency
+        self.handshake_delay = handshake_delay
+        self.shaper = shaper
+        self.requests = 0
+        self.connections = 0
+        self.texts: List[str] = []
+        self._lock = threading.Lock()
+        self._cert_dir = tempfile.mkdtemp(prefix="mock-murf-")
+        self.cert_file, key_file = make_self_signed_cert(self._cert_dir, host)
+        self._context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self._context.load_cert_chain(self.cert_file, key_file)
+        self._server = MockHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"https://{host}:{port}{TTS_PATH}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        shutil.rmtree(self._cert_dir, ignore_errors=True)
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                # Handshake here, in the connection's own thread
+                time.sleep(mock.handshake_delay)
+                self.request = mock._context.wrap_socket(self.request, server_side=True)
+                with mock._lock:
+                    mock.connections += 1
+                super().setup()
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (ConnectionError, ssl.SSLError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = json.loads(body or b"{}")
+                with mock._lock:
+                    mock.requests += 1
+                    mock.texts.append(request.get("text", ""))
+                time.sleep(mock.latency)
+                error = mock.shaper.serve() if mock.shaper else None
+                if self.path != TTS_PATH:
+                    self._reply(404, {"errorMessage": "not found"})
+                elif not self.headers.get("api-key"):
+                    self._reply(401, {"errorMessage": "invalid api key"})
+                elif error:
+                    self._reply(error, {"errorMessage": "mock error"})
+                else:
+                    self._reply(200, {
+                        "audioFile": f"https://murf.example.com/audio/{mock.requests}.mp3",
+                        "audioLengthInSeconds": round(len(request.get("text", "")) / 15, 2),
+                        "encodedAudio": None,
+                    })
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50={pick(0.5):6.1f}ms  p95={pick(0.95):6.1f}ms"
+
+def benchmark(calls: int = 50, latency: float = 0.01, handshake_delay: float = 0.05) -> Dict:
+    """Per-call latency of fresh-connection requests.post versus the pooled Murf client."""
+    import requests
+    from services.tts import MurfHTTPClient
+
+    server = MockMurfServer(latency=latency, handshake_delay=handshake_delay)
+    server.start()
+    headers = {"api-key": "bench", "Content-Type": "application/json"}
+    payload = {"voiceId": "en-US-marcus", "text": "Hello there, this is a benchmark.", "format": "mp3"}
+    report = {}
+    try:
+        fresh = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            requests.post(server.url, json=payload, headers=headers, timeout=30, verify=server.cert_file)
+            fresh.append(time.perf_counter() - start)
+        fresh_connections = server.connections
+
+        client = MurfHTTPClient(verify=server.cert_file)
+        pooled = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            client.post(server.url, json=payload, headers=headers)
+            pooled.append(time.perf_counter() - start)
+        client.close()
+        report = {"fresh": fresh, "pooled": pooled, "fresh_connections": fresh_connections,
+                  "pooled_connections": server.connections - fresh_connections}
+    finally:
+        server.stop()
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every request")
+    parser.add_argument("--handshake-delay", type=float, default=0.05,
+                        help="Seconds slept before each TLS handshake (simulated round trips)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare fresh and pooled connections")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = benchmark(args.calls, args.latency, args.handshake_delay)
+        print(f"fresh  ({report['fresh_connections']:3d} connections): {_percentiles(report['fresh'])}")
+        print(f"pooled ({report['pooled_connections']:3d} connections): {_percentiles(report['pooled'])}")
+    else:
+        server = MockMurfServer(latency=args.latency, handshake_delay=args.handshake_delay,
+                                host=args.host, port=args.port)
+        print(f"Mock Murf server listening on {server.url}")
+        print(f"Set MURF_TTS_ENDPOINT={server.url} MURF_CA_BUNDLE={server.cert_file}")
+        try:
+            server._server.serve_forever()
+        finally:
+            server.stop()
@@ -0,0 +1,128 @@
+"""
+Latency, error and throughput shaping shared by the mock providers
+
+A LatencyProfile describes a provider's latency distribution and error
+rate; a ServiceShaper turns one into per-request behaviour: a sampled
+delay, an occasional error status and, with `capacity`, a cap on requests
+served at once (the rest queue, as at a provider running at its
+throughput limit). The mocks apply it when one is passed in, so unit tests
+keep their fixed latencies and the load test can shape every provider.
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class LatencyProfile:
+    """Latency distribution in seconds: lognormal around `median`, with a
+    `tail_probability` chance of being multiplied by `tail_multiplier`."""
+    median: float = 0.8
+    sigma: float = 0.25
+    tail_probability: float = 0.05
+    tail_multiplier: float = 6.0
+    error_probability: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        latency = self.median * math.exp(rng.gauss(0.0, self.sigma))
+        if rng.random() < self.tail_probability:
+            latency *= self.tail_multiplier
+        return latency
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "LatencyProfile":
+        """Read e.g. MOCK_LLM_MEDIAN_SECS, MOCK_LLM_SIGMA, MOCK_LLM_TAIL_PROBABILITY,
+        MOCK_LLM_TAIL_MULTIPLIER and MOCK_LLM_ERROR_PROBABILITY; unset fields keep their defaults."""
+        default = cls()
+        return cls(
+            median=float(os.getenv(f"{prefix}_MEDIAN_SECS", default.median)),
+            sigma=float(os.getenv(f"{prefix}_SIGMA", default.sigma)),
+            tail_probability=float(os.getenv(f"{prefix}_TAIL_PROBABILITY", default.tail_probability)),
+            tail_multiplier=float(os.getenv(f"{prefix}_TAIL_MULTIPLIER", default.tail_multiplier)),
+            error_probability=float(os.getenv(f"{prefix}_ERROR_PROBABILITY", default.error_probability)),
+        )
+
+
+class ServiceShaper:
+    def __init__(self,
+                 profile: Optional[LatencyProfile] = None,
+                 capacity: int = 0,
+                 error_status: int = 500,
+                 seed: int = 0) -> None:
+        self.profile = profile or LatencyProfile(median=0.0, sigma=0.0, tail_probability=0.0)
+        self.capacity = capacity
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            latency = self.profile.sample(self._rng)
+            failed = self._rng.random() < self.profile.error_probability
+            if failed:
+                self.errors += 1
+        return latency, failed
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def serve(self) -> Optional[int]:
+        """Spend this request's simulated service time; returns an error status to answer with, or None."""
+        latency, failed = self._draw()
+        if self._slots:
+            self._slots.acquire()
+        self._enter()
+        try:
+            time.sleep(latency)
+        finally:
+            self._exit()
+            if self._slots:
+                self._slots.release()
+        return self.error_status if failed else None
+
+    async def serve_async(self) -> Optional[int]:
+        """serve() for asyncio servers; the capacity cap does not apply."""
+        latency, failed = self._draw()
+        self._enter()
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self._exit()
+        return self.error_status if failed else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "max_in_flight": self.max_in_flight,
+                    "capacity": self.capacity or None}
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a listen backlog deep enough for load tests (the default is 5)."""
+    request_queue_size = 512
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Readiness probes and clients giving up mid-request drop connections (or TLS handshakes) all the time
+        if isinstance(sys.exc_info()[1], OSError):
+            return
+        super().handle_error(request, client_address)
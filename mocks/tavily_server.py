@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Tavily search REST API
+
+Answers POST /search with deterministic results derived from the query.
+Every query also returns one shared "top story" URL, so merged multi-query
+results have something to dedupe. A query containing "slow" waits
+`slow_delay` seconds, and one containing "fail" gets a 500. Keys listed
+in `key_errors` get that status instead (e.g. {"revoked": 401}). The
+server counts requests, TCP connections, peak concurrency and requests per
+API key, so tests can check connection reuse, concurrency limits and key
+rotation.
+
+Run standalone with:
+    python -m mocks.tavily_server --port 8766
+and point TAVILY_API_URL at http://127.0.0.1:8766
+"""
+
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+from mocks.shaping import MockHTTPServer, ServiceShaper
+
+SHARED_URL = "https://news.example.com/top-story"
+
+
+def fake_results(query: str, max_results: int) -> List[Dict]:
+    slug = "-".join(query.lower().split()) or "empty"
+    results = [{
+        "title": "Top story of the day",
+        "url": SHARED_URL,
+        "content": "The top story of the day is being covered everywhere. Readers are following it closely.",
+        "score": 0.5,
+    }]
+    for i in range(1, max_results):
+        digest = int(hashlib.sha1(f"{query}:{i}".encode()).hexdigest()[:6], 16)
+        results.append({
+            "title": f"{query.title()} result {i}",
+            "url": f"https://example.com/{slug}/{i}",
+            "content": f"Result {i} about {query}. It has some detail about {query}. Unrelated filler text follows.",
+            "score": round(0.6 + (digest % 400) / 1000, 3),
+        })
+    return results[:max_results]
+
+
+class MockTavilyServer:
+    def __init__(self, latency: float = 0.0, slow_delay: float = 2.0,
+                 key_errors: Optional[Dict[str, int]] = None,
+                 host: str = "127.0.0.1", port: int = 0, shaper: Optional[ServiceShaper] = None) -> None:
+        self.latency = latency
+        self.shaper = shaper
+        self.slow_delay = slow_delay
+        self.key_errors = dict(key_errors or {})
+        self.api_keys: Counter = Counter()
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queries: List[str] = []
+        self._lock = threading.Lock()
+        self._server = MockHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with mock._lock:
+                    mock.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = json.loads(body or b"{}")
+                query = request.get("query", "")
+                with mock._lock:
+                    mock.requests += 1
+                    mock.queries.append(query)
+                    mock.api_keys[request.get("api_key")] += 1
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                try:
+                    time.sleep(mock.latency + (mock.slow_delay if "slow" in query else 0))
+                    error = mock.shaper.serve() if mock.shaper else None
+                    if self.path != "/search" or not request.get("api_key"):
+                        self._reply(401 if self.path == "/search" else 404, {"detail": "unauthorized"})
+                    elif request["api_key"] in mock.key_errors:
+                        self._reply(mock.key_errors[request["api_key"]], {"detail": "key rejected"})
+                    elif "fail" in query or error:
+                        self._reply(error or 500, {"detail": "internal error"})
+                    else:
+                        self._reply(200, {
+                            "query": query,
+                            "answer": f"Mock answer for {query}",
+                            "results": fake_results(query, int(request.get("max_results", 5))),
+                            "response_time": mock.latency,
+                        })
+                finally:
+                    with mock._lock:
+                        mock.in_flight -= 1
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every request")
+    args = parser.parse_args()
+    server = MockTavilyServer(latency=args.latency, host=args.host, port=args.port)
+    print(f"Mock Tavily server listening on {server.url}")
+    server._server.serve_forever()
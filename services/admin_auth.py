@@ -0,0 +1,30 @@
+import os
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Shared secret for the /admin endpoints; they are disabled while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+def check_admin_token(presented: Optional[str], expected: Optional[str] = None) -> bool:
+    expected = expected if expected is not None else ADMIN_TOKEN
+    if not expected or not presented:
+        return False
+    return hmac.compare_digest(presented.encode(), expected.encode())
+
+def require_admin(authorization: Optional[str] = Header(None),
+                  x_admin_token: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency: accepts `Authorization: Bearer <ADMIN_TOKEN>` or `X-Admin-Token: <ADMIN_TOKEN>`."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    presented = x_admin_token
+    if authorization and authorization.lower().startswith("bearer "):
+        presented = authorization[7:].strip()
+    if not check_admin_token(presented):
+        logger.warning("Rejected admin request with a missing or wrong token")
+        raise HTTPException(status_code=401, detail="Admin token required",
+                            headers={"WWW-Authenticate": "Bearer"})
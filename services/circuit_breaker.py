@@ -0,0 +1,192 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Open once at least this share of recent calls failed...
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+# ...out of at least this many calls in the window
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "4"))
+CIRCUIT_WINDOW_SECS = float(os.getenv("CIRCUIT_WINDOW_SECS", "60"))
+# How long an open breaker fails fast before letting a probe through
+CIRCUIT_OPEN_SECS = float(os.getenv("CIRCUIT_OPEN_SECS", "30"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+PROVIDERS = ("murf", "assemblyai", "gemini", "tavily")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one upstream provider.
+
+    Closed: calls go through and outcomes within the window are counted.
+    Open: allow() returns False without touching the network until
+    open_secs have passed. Half-open: up to half_open_probes calls are let
+    through; a success closes the breaker, a failure opens it again.
+
+    Callers check allow() before a call and report the outcome with
+    record_success()/record_failure(), or release() if the call was
+    abandoned before it finished.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self,
+                 name: str,
+                 failure_rate: float = CIRCUIT_FAILURE_RATE,
+                 min_calls: int = CIRCUIT_MIN_CALLS,
+                 window: float = CIRCUIT_WINDOW_SECS,
+                 open_secs: float = CIRCUIT_OPEN_SECS,
+                 half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_secs = open_secs
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._counts = {"successes": 0, "failures": 0, "rejected": 0, "trips": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_secs:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def healthy(self) -> bool:
+        """Closed, and the most recent call did not fail."""
+        with self._lock:
+            return self._state == self.CLOSED and (not self._outcomes or self._outcomes[-1][1])
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.open_secs:
+                    self._counts["rejected"] += 1
+                    return False
+                self._state, self._probes = self.HALF_OPEN, 0
+                logger.info(f"Circuit '{self.name}' half-open, probing")
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._counts["rejected"] += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] <= now - self.window:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        self._state, self._opened_at, self._probes = self.OPEN, now, 0
+        self._outcomes.clear()
+        self._counts["trips"] += 1
+        logger.warning(f"Circuit '{self.name}' opened; failing fast for {self.open_secs:.0f}s")
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._counts["successes"] += 1
+            if self._state == self.HALF_OPEN:
+                self._state, self._probes = self.CLOSED, 0
+                self._outcomes.clear()
+                logger.info(f"Circuit '{self.name}' closed")
+                return
+            if self._state == self.OPEN:
+                return
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._counts["failures"] += 1
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+                return
+            if self._state == self.OPEN:
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            failed = sum(1 for _, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_calls and failed / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that never finished."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn through the breaker; exceptions count as failures and are re-raised."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state, self._probes = self.CLOSED, 0
+            self._outcomes.clear()
+
+    def snapshot(self) -> Dict:
+        state = self.state
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            failed = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": state,
+                "window_calls": len(self._outcomes),
+                "window_failure_rate": round(failed / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "open_for_secs": round(max(0.0, self.open_secs - (now - self._opened_at)), 1)
+                if self._state == self.OPEN else 0.0,
+                **self._counts,
+            }
+
+
+class CircuitBreakerRegistry:
+    """One breaker per provider name, created on first use."""
+
+    def __init__(self, names=PROVIDERS, **defaults) -> None:
+        self._defaults = defaults
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        for name in names:
+            self.get(name)
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self._defaults)
+            return breaker
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+# Global instance
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,76 @@
+import os
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Total time one voice turn may take, from audio received to audio ready
+TURN_BUDGET_SECS = float(os.getenv("TURN_BUDGET_SECS", "15"))
+# Below this much time left, tool calls (web search) are skipped
+TURN_TOOL_MIN_SECS = float(os.getenv("TURN_TOOL_MIN_SECS", "4"))
+# Below this much time left, Murf TTS is skipped for the fallback audio
+TURN_TTS_MIN_SECS = float(os.getenv("TURN_TTS_MIN_SECS", "1"))
+
+
+class TurnDeadline:
+    """The latency budget of one voice turn, on the monotonic clock."""
+
+    def __init__(self, budget: float = TURN_BUDGET_SECS) -> None:
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+        self.degraded: Dict[str, str] = {}
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def degrade(self, stage: str, reason: str) -> None:
+        """Note that a stage was cut short or skipped to stay within budget."""
+        self.degraded[stage] = reason
+        logger.warning(f"Turn budget: {stage} {reason} ({self.remaining():.2f}s of {self.budget:.1f}s left)")
+
+
+_current: contextvars.ContextVar[Optional[TurnDeadline]] = contextvars.ContextVar("turn_deadline", default=None)
+
+@contextmanager
+def turn_deadline(budget: float = TURN_BUDGET_SECS) -> Iterator[TurnDeadline]:
+    """Set the deadline for the current turn.
+
+    It follows the context into awaited coroutines, tasks created inside it
+    and asyncio.to_thread; plain thread pools need contextvars.copy_context().
+    """
+    deadline = TurnDeadline(budget)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+        if deadline.degraded:
+            logger.info(f"Turn finished in {deadline.elapsed():.2f}s, degraded: {deadline.degraded}")
+
+def current_deadline() -> Optional[TurnDeadline]:
+    return _current.get()
+
+def time_left(default: float) -> float:
+    """A stage timeout: `default`, capped by what is left of the turn budget, if any."""
+    deadline = _current.get()
+    return default if deadline is None else min(default, deadline.remaining())
+
+def has_time(min_secs: float) -> bool:
+    """Whether at least min_secs of the turn budget are left (always true outside a turn)."""
+    deadline = _current.get()
+    return deadline is None or deadline.remaining() >= min_secs
+
+def degrade(stage: str, reason: str) -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.degrade(stage, reason)
@@ -0,0 +1,278 @@
+import os
+import re
+import sys
+import time
+import logging
+from array import array
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT_SILENCE_MS = int(os.getenv("ENDPOINT_SILENCE_MS", "600"))
+# Silence inferred from transcript growth lags the audio, so wait longer
+ENDPOINT_TRANSCRIPT_SILENCE_MS = int(os.getenv("ENDPOINT_TRANSCRIPT_SILENCE_MS", "900"))
+ENDPOINT_PUNCTUATION_SILENCE_MS = int(os.getenv("ENDPOINT_PUNCTUATION_SILENCE_MS", "250"))
+ENDPOINT_HESITATION_SILENCE_MS = int(os.getenv("ENDPOINT_HESITATION_SILENCE_MS", "1200"))
+ENDPOINT_STABLE_MS = int(os.getenv("ENDPOINT_STABLE_MS", "300"))
+ENDPOINT_MAX_TURN_MS = int(os.getenv("ENDPOINT_MAX_TURN_MS", "20000"))
+ENDPOINT_MIN_WORDS = int(os.getenv("ENDPOINT_MIN_WORDS", "1"))
+ENDPOINT_SPEECH_RMS = int(os.getenv("ENDPOINT_SPEECH_RMS", "500"))
+
+# A turn that ends on one of these is probably not finished yet
+HESITATION_WORDS = frozenset({
+    "and", "or", "but", "so", "because", "the", "a", "an", "to", "of", "in", "on",
+    "with", "for", "about", "is", "are", "um", "uh", "like", "my", "your", "what's",
+})
+TERMINAL_PUNCTUATION = (".", "?", "!")
+
+
+@dataclass
+class EndpointConfig:
+    """Thresholds for declaring end of turn. All durations are milliseconds."""
+    silence_ms: int = ENDPOINT_SILENCE_MS
+    transcript_silence_ms: int = ENDPOINT_TRANSCRIPT_SILENCE_MS
+    punctuation_silence_ms: int = ENDPOINT_PUNCTUATION_SILENCE_MS
+    hesitation_silence_ms: int = ENDPOINT_HESITATION_SILENCE_MS
+    stable_ms: int = ENDPOINT_STABLE_MS
+    max_turn_ms: int = ENDPOINT_MAX_TURN_MS
+    min_words: int = ENDPOINT_MIN_WORDS
+    speech_rms: int = ENDPOINT_SPEECH_RMS
+
+
+def pcm16_rms(chunk: bytes, stride: int = 4) -> float:
+    """Approximate RMS of little-endian 16-bit PCM, sampling every `stride` samples."""
+    usable = len(chunk) - (len(chunk) % 2)
+    if usable <= 0:
+        return 0.0
+    samples = array("h", chunk[:usable])
+    if sys.byteorder != "little":
+        samples.byteswap()
+    picked = samples[::stride]
+    return (sum(s * s for s in picked) / len(picked)) ** 0.5
+
+
+class Endpointer:
+    """Decides when the user has finished speaking.
+
+    Combines three signals: how long there has been silence (from PCM energy
+    when audio levels are fed in, otherwise from when the transcript last
+    grew), how long the partial transcript has been stable, and whether it
+    ends in terminal punctuation or a word that suggests more is coming.
+
+    An early declaration is retracted if the transcript keeps growing before
+    the provider's final arrives; callers should then cancel the reply they
+    started. Times are in seconds from time.monotonic() unless passed explicitly.
+    """
+
+    def __init__(self, config: Optional[EndpointConfig] = None) -> None:
+        self.config = config or EndpointConfig()
+        self.retractions = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.text = ""
+        self.ended = False
+        self.reason: Optional[str] = None
+        self.turn_started_at: Optional[float] = None
+        self.last_change_at: Optional[float] = None
+        self.last_voice_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        self._voice_signal = False
+
+    # Inputs ------------------------------------------------------------
+
+    def on_audio(self, chunk: bytes, now: Optional[float] = None) -> Optional[str]:
+        """Feed a raw PCM16 chunk; used for energy-based silence detection."""
+        return self.on_voice_activity(pcm16_rms(chunk) >= self.config.speech_rms, now)
+
+    def on_voice_activity(self, is_speech: bool, now: Optional[float] = None) -> Optional[str]:
+        now = time.monotonic() if now is None else now
+        self._voice_signal = True
+        if is_speech:
+            self.last_voice_at = now
+            return None
+        return self.check(now)
+
+    def on_transcript(self, text: str, is_final: bool, now: Optional[float] = None) -> Optional[str]:
+        """Feed a partial or final transcript; returns the end-of-turn reason if declared."""
+        now = time.monotonic() if now is None else now
+        text = text.strip()
+        if text and text != self.text:
+            if self.ended and not is_final and _normalize(text) != _normalize(self.text):
+                # The user kept talking after an early end of turn
+                self.ended = False
+                self.reason = None
+                self.ended_at = None
+                self.retractions += 1
+            self.text = text
+            self.last_change_at = now
+            if self.turn_started_at is None:
+                self.turn_started_at = now
+            if self.last_voice_at is None or not self._voice_signal:
+                self.last_voice_at = now
+        if is_final and not self.ended:
+            return self._declare("final", now)
+        return self.check(now)
+
+    # Decision ----------------------------------------------------------
+
+    def silence_ms(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        if self.last_voice_at is None:
+            return 0.0
+        return (now - self.last_voice_at) * 1000
+
+    def stable_ms(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        if self.last_change_at is None:
+            return 0.0
+        return (now - self.last_change_at) * 1000
+
+    def is_stable(self, now: Optional[float] = None) -> bool:
+        """True once the partial transcript has stopped changing for stable_ms."""
+        return bool(self.text) and self.stable_ms(now) >= self.config.stable_ms
+
+    def required_silence_ms(self) -> int:
+        words = self.text.split()
+        if words and words[-1].lower().strip(",;:") in HESITATION_WORDS:
+            return self.config.hesitation_silence_ms
+        if self.text.endswith(TERMINAL_PUNCTUATION):
+            return self.config.punctuation_silence_ms
+        return self.config.silence_ms if self._voice_signal else self.config.transcript_silence_ms
+
+    def check(self, now: Optional[float] = None) -> Optional[str]:
+        """Return the end-of-turn reason if the turn should end now, else None."""
+        now = time.monotonic() if now is None else now
+        # Nothing to answer (and no turn start) until a transcript arrives, even with min_words=0
+        if self.ended or not self.text or len(self.text.split()) < self.config.min_words:
+            return None
+        required = self.required_silence_ms()
+        stable = self.stable_ms(now)
+        if self.silence_ms(now) >= required and stable >= min(required, self.config.stable_ms):
+            reason = "punctuation" if required == self.config.punctuation_silence_ms else "silence"
+            return self._declare(reason, now)
+        if ((now - self.turn_started_at) * 1000 >= self.config.max_turn_ms
+                and stable >= self.config.stable_ms):
+            return self._declare("max_turn", now)
+        return None
+
+    def _declare(self, reason: str, now: float) -> str:
+        self.ended = True
+        self.reason = reason
+        self.ended_at = now
+        return reason
+
+
+# Offline replay ----------------------------------------------------------
+
+@dataclass
+class ReplayTurn:
+    text: str
+    final_ms: float
+    endpoint_ms: float
+    reason: str
+    premature: bool
+    retractions: int = 0
+    saved_ms: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.saved_ms = self.final_ms - self.endpoint_ms
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s']", "", text).lower().split())
+
+def replay(events: List[Dict], config: Optional[EndpointConfig] = None, tick_ms: int = 20) -> List[ReplayTurn]:
+    """Replay a recorded timeline and compare the endpointer against provider finals.
+
+    Each event is a dict with `t_ms` and `type`: "audio" (with `speech`: bool),
+    "partial" or "final" (with `text`). Returns one ReplayTurn per provider
+    final; saved_ms is how much earlier the endpointer declared end of turn,
+    counting only the last declaration if earlier ones were retracted.
+    """
+    endpointer = Endpointer(config)
+    turns: List[ReplayTurn] = []
+    events = sorted(events, key=lambda e: e["t_ms"])
+    clock = events[0]["t_ms"] if events else 0
+    decided_at: Optional[float] = None
+    decided_text = ""
+    decided_reason = ""
+    retracted = 0
+
+    for event in events:
+        # Let the endpointer poll between events, as the live ticker does
+        while clock < event["t_ms"] and decided_at is None:
+            if endpointer.check(clock / 1000):
+                decided_at, decided_text, decided_reason = clock, endpointer.text, endpointer.reason
+            clock += tick_ms
+        clock = max(clock, event["t_ms"])
+        now = event["t_ms"] / 1000
+        if event["type"] == "final":
+            if decided_at is None:
+                decided_at, decided_text, decided_reason = event["t_ms"], event["text"], "final"
+            turns.append(ReplayTurn(
+                text=event["text"],
+                final_ms=event["t_ms"],
+                endpoint_ms=decided_at,
+                reason=decided_reason,
+                premature=_normalize(decided_text) != _normalize(event["text"]),
+                retractions=retracted,
+            ))
+            endpointer.reset()
+            decided_at = None
+            retracted = 0
+            continue
+        if event["type"] == "audio":
+            endpointer.on_voice_activity(bool(event.get("speech")), now)
+        elif event["type"] == "partial":
+            endpointer.on_transcript(event["text"], False, now)
+        if decided_at is not None and not endpointer.ended:
+            decided_at = None
+            retracted += 1
+        if decided_at is None and (endpointer.ended or endpointer.check(now)):
+            decided_at, decided_text, decided_reason = event["t_ms"], endpointer.text, endpointer.reason
+    return turns
+
+def summarize(turns: List[ReplayTurn]) -> Dict:
+    if not turns:
+        return {"turns": 0, "early": 0, "premature": 0, "retractions": 0, "mean_saved_ms": 0.0}
+    return {
+        "turns": len(turns),
+        "early": sum(1 for t in turns if t.reason != "final"),
+        "premature": sum(1 for t in turns if t.premature),
+        "retractions": sum(t.retractions for t in turns),
+        "mean_saved_ms": round(sum(t.saved_ms for t in turns) / len(turns), 1),
+    }
+
+_LOG_LINE_RE = re.compile(r"^(\S+ \S+) - \S+ - INFO - \[AAI (Partial|Final Turn)\] (.*)$")
+
+def load_log_events(path: str) -> List[Dict]:
+    """Build a transcript-only replay timeline from app.log AAI partial/final lines.
+
+    The service logs each final twice (raw, then formatted); only the first
+    of each pair is used as the provider's end-of-turn time.
+    """
+    events: List[Dict] = []
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            match = _LOG_LINE_RE.match(line.rstrip("\n"))
+            if not match:
+                continue
+            stamp, kind, text = match.groups()
+            t_ms = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S,%f").timestamp() * 1000
+            if kind == "Final Turn":
+                if events and events[-1]["type"] == "final":
+                    continue
+                events.append({"t_ms": t_ms, "type": "final", "text": text})
+            else:
+                events.append({"t_ms": t_ms, "type": "partial", "text": text})
+    return events
+
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else "app.log"
+    results = replay(load_log_events(log_path))
+    for turn in results:
+        print(f"{turn.saved_ms:8.0f} ms  {turn.reason:12s} {'PREMATURE ' if turn.premature else ''}{turn.text}")
+    print(summarize(results))
@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from services.web_search import get_news, get_weather
+from services.personas import persona_registry
+
+logger = logging.getLogger(__name__)
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+# Polite lead-ins that may precede any request
+_LEAD = r"^(?:(?:hey|hi|ok|okay|so|please|can you|could you|would you|will you)[,\s]+)*"
+_END = r"\s*(?:please)?[?.!]*$"
+
+# Rules are compiled once at import; the first matching rule wins
+INTENT_RULES = [
+    ("weather", re.compile(
+        _LEAD + r"(?:tell me |give me |check )?(?:what(?:'s| is) |how(?:'s| is) )?(?:the )?(?:current )?"
+        r"(?:weather|temperature|forecast)(?: like| forecast)?(?: right now| today| now)?"
+        r" (?:in|for|at) (?P<location>[a-z][\w\s,.'-]{1,60}?)(?: right now| today| now)?" + _END,
+        re.IGNORECASE)),
+    ("news", re.compile(
+        _LEAD + r"(?:tell me |give me |show me |what(?:'s| is| are) )?(?:the )?(?:latest |recent |today's |top )*"
+        r"(?:news|headlines)(?: today)?(?: (?:about|on|in|for|regarding) (?P<topic>[a-z][\w\s&'-]{1,40}?))?" + _END,
+        re.IGNORECASE)),
+    ("joke", re.compile(
+        _LEAD + r"(?:(?:tell|give) me (?:a |another |one more )?(?:funny )?joke|make me laugh"
+        r"|i (?:want|would like) to hear a joke|(?:a |another )?joke)" + _END,
+        re.IGNORECASE)),
+]
+
+JOKES = [
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "Why did the scarecrow win an award? Because he was outstanding in his field!",
+    "Why do programmers prefer dark mode? Because light attracts bugs!",
+    "What do you call a fake noodle? An impasta!",
+    "Why was the math book sad? Because it had too many problems.",
+]
+
+@dataclass
+class IntentMatch:
+    intent: str
+    slots: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class RouteResult:
+    intent: str
+    reply: str
+    latency_ms: float
+
+
+def _sentences(text: str, limit: int) -> str:
+    parts = re.split(r"(?<=[.!?])\s+", " ".join(text.split()))
+    return " ".join(parts[:limit])
+
+
+class IntentRouter:
+    """Answers simple weather, news and joke requests without calling the LLM.
+
+    classify() only runs precompiled regular expressions, so it costs
+    microseconds and is safe on the event loop. dispatch() may call the
+    search service and should run off the loop for async callers. If a
+    service returns nothing, route() returns None and the turn falls back
+    to the LLM.
+    """
+
+    def __init__(self, enabled: bool = INTENT_ROUTER_ENABLED,
+                 weather_fn: Callable = get_weather, news_fn: Callable = get_news) -> None:
+        self.enabled = enabled
+        self.weather_fn = weather_fn
+        self.news_fn = news_fn
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hits": 0, "misses": 0, "fallbacks": 0,
+                       "classify_ms_total": 0.0, "route_ms_total": 0.0}
+        self._hits_by_intent: Dict[str, int] = {}
+
+    def classify(self, text: str) -> Optional[IntentMatch]:
+        if not self.enabled or not text:
+            return None
+        start = time.perf_counter()
+        cleaned = " ".join(text.strip().split())
+        match = None
+        for intent, pattern in INTENT_RULES:
+            m = pattern.match(cleaned)
+            if m:
+                slots = {k: v.strip(" ,.") for k, v in m.groupdict().items() if v}
+                match = IntentMatch(intent, slots)
+                break
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["classify_ms_total"] += (time.perf_counter() - start) * 1000
+            if match is None:
+                self._stats["misses"] += 1
+        return match
+
+    def dispatch(self, match: IntentMatch, persona: str = "default") -> Optional[RouteResult]:
+        start = time.perf_counter()
+        # Persona reply templates come from the persona config, defaulting per intent
+        templates = {**persona_registry.get().replies, **persona_registry.get(persona).replies}
+        reply = None
+        try:
+            if match.intent == "weather":
+                location = match.slots.get("location", "")
+                results = self.weather_fn(location)
+                if results:
+                    summary = _sentences(results[0].get("content", ""), 2)
+                    reply = templates["weather"].format(location=location, summary=summary)
+            elif match.intent == "news":
+                topic = match.slots.get("topic", "technology")
+                results = self.news_fn(topic, 3)
+                if results:
+                    titles = [r.get("title", "").strip() for r in results if r.get("title")]
+                    summary = " ".join(f"{title.rstrip('.')}." for title in titles[:3])
+                    reply = templates["news"].format(topic=topic, summary=summary)
+            elif match.intent == "joke":
+                reply = templates["joke"].format(joke=random.choice(JOKES))
+        except Exception as e:
+            logger.error(f"Intent router {match.intent} handler failed: {e}")
+            reply = None
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            if reply:
+                self._stats["hits"] += 1
+                self._stats["route_ms_total"] += elapsed_ms
+                self._hits_by_intent[match.intent] = self._hits_by_intent.get(match.intent, 0) + 1
+            else:
+                self._stats["fallbacks"] += 1
+        if not reply:
+            logger.info(f"Intent router fell back to LLM for {match.intent}")
+            return None
+        logger.info(f"Intent router answered {match.intent} in {elapsed_ms:.1f} ms")
+        return RouteResult(match.intent, reply, elapsed_ms)
+
+    def route(self, text: str, persona: str = "default") -> Optional[RouteResult]:
+        """Classify and answer a request, or return None to use the LLM."""
+        match = self.classify(text)
+        return self.dispatch(match, persona) if match else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            hits_by_intent = dict(self._hits_by_intent)
+        requests = s["requests"]
+        return {
+            "enabled": self.enabled,
+            "requests": requests,
+            "hits": s["hits"],
+            "misses": s["misses"],
+            "fallbacks": s["fallbacks"],
+            "hit_rate": round(s["hits"] / requests, 3) if requests else 0.0,
+            "hits_by_intent": hits_by_intent,
+            "avg_classify_ms": round(s["classify_ms_total"] / requests, 4) if requests else 0.0,
+            "avg_route_ms": round(s["route_ms_total"] / s["hits"], 1) if s["hits"] else 0.0,
+        }
+
+# Global instance
+intent_router = IntentRouter()
@@ -0,0 +1,206 @@
+import os
+import re
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from services.rate_limiter import key_fingerprint, rate_limiters
+
+logger = logging.getLogger(__name__)
+
+# Environment variable prefix for each provider: <PREFIX>_API_KEYS (comma-separated)
+# plus the single <PREFIX>_API_KEY, which is still honoured
+PROVIDER_KEY_ENV: Dict[str, str] = {
+    "murf": "MURF",
+    "assemblyai": "ASSEMBLYAI",
+    "gemini": "GEMINI",
+    "tavily": "TAVILY",
+}
+# How long a key sits out after the provider rejects it (401/403) or rate limits it (429)
+KEY_DRAIN_AUTH_SECS = float(os.getenv("KEY_DRAIN_AUTH_SECS", "300"))
+KEY_DRAIN_RATE_SECS = float(os.getenv("KEY_DRAIN_RATE_SECS", "30"))
+
+def _clean_keys(raw: List[Optional[str]]) -> List[str]:
+    keys: List[str] = []
+    for key in (k.strip() for k in raw if k):
+        # Skip blanks and env_template placeholders such as your_murf_api_key_here
+        if key and not key.startswith("your_") and key not in keys:
+            keys.append(key)
+    return keys
+
+def load_keys(prefix: str) -> List[str]:
+    """Configured keys for a provider, in order, without duplicates or template placeholders."""
+    return _clean_keys(os.getenv(f"{prefix}_API_KEYS", "").split(",") + [os.getenv(f"{prefix}_API_KEY")])
+
+
+class _KeyState:
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.fingerprint = key_fingerprint(key)
+        self.outstanding = 0
+        self.drained_until = 0.0
+        self.requests = 0
+        self.drains = 0
+        self.last_status: Optional[int] = None
+
+
+class KeyLease:
+    """One request's hold on a key. Use as a context manager so the key is always given back."""
+
+    def __init__(self, pool: "APIKeyPool", state: _KeyState) -> None:
+        self.pool = pool
+        self.key = state.key
+        self.fingerprint = state.fingerprint
+        self._state = state
+        self._released = False
+
+    def report(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Pass on the provider's HTTP status; 401/403/429 drain the key for a while."""
+        self.pool._report(self._state, status, retry_after)
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.pool._release(self._state)
+
+    def __enter__(self) -> "KeyLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class APIKeyPool:
+    """The API keys of one provider, shared out by load.
+
+    Each request leases the usable key with the fewest requests in flight;
+    ties go to the key with the most rate-limit tokens left, so one key's
+    quota is not spent while another's sits idle. A key the provider rejects
+    (401/403) or rate limits (429) is drained: skipped until its drain ends,
+    while the other keys carry the traffic.
+
+    Keys come from the environment unless given explicitly. The environment is
+    re-read when it changes, so rotating a key does not need a restart.
+    """
+
+    def __init__(self, provider: str, keys: Optional[List[Optional[str]]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.provider = provider
+        self._env_prefix = None if keys is not None else PROVIDER_KEY_ENV.get(provider, provider.upper())
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states: Dict[str, _KeyState] = {}
+        self._env_raw: Optional[tuple] = None
+        self._set_keys(_clean_keys(list(keys or [])))
+
+    def _set_keys(self, keys: List[str]) -> None:
+        # Keep the counters of keys that stay configured
+        self._states = {key: self._states.get(key) or _KeyState(key) for key in keys}
+
+    def _sync_env(self) -> None:
+        if self._env_prefix is None:
+            return
+        raw = (os.getenv(f"{self._env_prefix}_API_KEYS"), os.getenv(f"{self._env_prefix}_API_KEY"))
+        if raw != self._env_raw:
+            self._env_raw = raw
+            self._set_keys(load_keys(self._env_prefix))
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            self._sync_env()
+            return list(self._states)
+
+    def configured(self) -> bool:
+        return bool(self.keys())
+
+    def lease(self) -> Optional[KeyLease]:
+        """Lease the least loaded usable key, or None when none is configured or all are drained."""
+        with self._lock:
+            self._sync_env()
+            now = self._clock()
+            usable = [s for s in self._states.values() if s.drained_until <= now]
+            if not usable:
+                if self._states:
+                    logger.warning(f"All {len(self._states)} {self.provider} API keys are drained")
+                return None
+            if len(usable) == 1:
+                state = usable[0]
+            else:
+                state = min(usable, key=lambda s: (
+                    s.outstanding, -rate_limiters.bucket(self.provider, s.key).snapshot()["tokens"]))
+            state.outstanding += 1
+            state.requests += 1
+            return KeyLease(self, state)
+
+    def _release(self, state: _KeyState) -> None:
+        with self._lock:
+            state.outstanding -= 1
+
+    def _report(self, state: _KeyState, status: Optional[int], retry_after: Optional[float]) -> None:
+        with self._lock:
+            state.last_status = status
+            if status in (401, 403):
+                drain = KEY_DRAIN_AUTH_SECS
+            elif status == 429:
+                drain = retry_after if retry_after is not None else KEY_DRAIN_RATE_SECS
+            else:
+                return
+            state.drained_until = max(state.drained_until, self._clock() + drain)
+            state.drains += 1
+            usable = sum(1 for s in self._states.values() if s.drained_until <= self._clock())
+        logger.warning(f"{self.provider} key {state.fingerprint} got {status}; "
+                       f"drained for {drain:.0f}s ({usable} key(s) left)")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._sync_env()
+            now = self._clock()
+            return {
+                state.fingerprint: {
+                    "outstanding": state.outstanding,
+                    "requests": state.requests,
+                    "drains": state.drains,
+                    "drained_for_secs": round(max(0.0, state.drained_until - now), 1),
+                    "last_status": state.last_status,
+                }
+                for state in self._states.values()
+            }
+
+
+class APIKeyPoolRegistry:
+    """One key pool per provider, created on first use."""
+
+    def __init__(self) -> None:
+        self._pools: Dict[str, APIKeyPool] = {}
+        self._lock = threading.Lock()
+        for provider in PROVIDER_KEY_ENV:
+            self.get(provider)
+
+    def get(self, provider: str) -> APIKeyPool:
+        with self._lock:
+            pool = self._pools.get(provider)
+            if pool is None:
+                pool = self._pools[provider] = APIKeyPool(provider)
+            return pool
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            pools = dict(self._pools)
+        return {name: pool.snapshot() for name, pool in sorted(pools.items())}
+
+def status_of(error: Exception) -> Optional[int]:
+    """HTTP status carried by a provider SDK error, if it has one."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    if isinstance(value, int):
+        return value
+    match = re.search(r"\b(401|403|429)\b", str(error))
+    return int(match.group(1)) if match else None
+
+# Global instance
+key_pools = APIKeyPoolRegistry()
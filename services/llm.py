@@ -1,338 +1,234 @@
 import os
 import json
-import google.generativeai as genai
-from typing import AsyncGenerator, List, Dict, Any
+import asyncio
+from typing import AsyncGenerator, List, Dict, Any, Optional
 import logging
 from services.web_search import perform_web_search, get_news, get_weather
+from services.web_search import get_news_many
+from services.web_search_async import async_web_search_service
+from services.result_compaction import compact_results
+from services.tools import (parse_tool_calls, strip_tool_calls, format_tool_results, run_tool_calls,
+                            run_tool_calls_sync, ToolCallStreamParser, MAX_TOOL_ROUNDS)
+from services.personas import persona_registry
+from services.llm_providers import llm_client, stream_async, LLM_PROVIDER
+from services.deadlines import degrade, has_time, TURN_TOOL_MIN_SECS
+from services.key_pool import load_keys
+from services.tracing import span, start_span, use_span
 
 logger = logging.getLogger(__name__)
 
-# Check if API key is configured
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Check if API key is configured (the first of GEMINI_API_KEYS / GEMINI_API_KEY, placeholders skipped)
+GEMINI_API_KEY = next(iter(load_keys("GEMINI")), None)
 
-# Persona system prompts
-PERSONA_PROMPTS = {
-    "default": "You are a helpful and friendly AI assistant. You have access to web search capabilities that allow you to get the latest information, news, and weather. Use these tools when the user asks for current information or when you need to verify facts. Respond naturally and conversationally.",
-    "pirate": "You are a pirate captain! Speak like a pirate with nautical terms. Use phrases like 'Arrr!', 'Shiver me timbers!', 'Ahoy matey!', and talk about treasure, ships, and the seven seas. You have access to web search to find the latest treasure maps and sea conditions! Keep it fun and engaging!",
-    "robot": "You are a sophisticated AI robot. Speak in a precise, mechanical manner. Use robotic language like 'BEEP-BOOP', 'PROCESSING', 'CALCULATING'. You have access to web search capabilities for data verification and information retrieval. Be logical and efficient in your responses.",
-    "cowboy": "You are a cowboy from the Wild West! Use western slang like 'Howdy partner!', 'Yeehaw!', 'This town ain't big enough...'. Talk about horses, saloons, and the frontier spirit. You can use web search to check weather conditions for cattle drives and find the latest frontier news!"
-}
-
-# Function definitions for web search capabilities (Gemini uses a different format)
-# For Gemini, we'll use a simpler approach with explicit function calling in the prompt
-# since Gemini 1.5 Flash doesn't support the same function calling format as OpenAI
-
-# Function descriptions for the LLM to understand available capabilities
-FUNCTION_DESCRIPTIONS = {
-    "search_web": "Search the web for current information, news, or facts. Use this when the user asks about recent events, needs up-to-date information, or when you need to verify facts. Parameters: query (required), max_results (optional, default: 3)",
-    "get_latest_news": "Get the latest news on a specific topic. Use this when the user asks for recent news or current events. Parameters: topic (optional, default: 'technology'), max_results (optional, default: 5)",
-    "get_weather": "Get current weather information for a specific location. Use this when the user asks about weather conditions. Parameters: location (required)"
-}
+# Spoken when the model only asked for a tool and the turn budget has no room to run it
+OUT_OF_TIME_REPLY = "Sorry, I couldn't look that up in time. Please ask me again."
 
 # Function implementations
-import os
-import json
-import google.generativeai as genai
-from typing import AsyncGenerator, List, Dict, Any
-import logging
-from services.web_search import perform_web_search, get_news, get_weather
-
-logger = logging.getLogger(__name__)
-
-# Check if API key is configured
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Persona system prompts
-PERSONA_PROMPTS = {
-    "default": "You are a helpful and friendly AI assistant. You have access to web search capabilities that allow you to get the latest information, news, and weather. Use these tools when the user asks for current information or when you need to verify facts. Respond naturally and conversationally.",
-    "pirate": "You are a pirate captain! Speak like a pirate with nautical terms. Use phrases like 'Arrr!', 'Shiver me timbers!', 'Ahoy matey!', and talk about treasure, ships, and the seven seas. You have access to web search to find the latest treasure maps and sea conditions! Keep it fun and engaging!",
-    "robot": "You are a sophisticated AI robot. Speak in a precise, mechanical manner. Use robotic language like 'BEEP-BOOP', 'PROCESSING', 'CALCULATING'. You have access to web search capabilities for data verification and information retrieval. Be logical and efficient in your responses.",
-    "cowboy": "You are a cowboy from the Wild West! Use western slang like 'Howdy partner!', 'Yeehaw!', 'This town ain't big enough...'. Talk about horses, saloons, and the frontier spirit. You can use web search to check weather conditions for cattle drives and find the latest frontier news!"
-}
-
-# Function definitions for web search capabilities (Gemini uses a different format)
-# For Gemini, we'll use a simpler approach with explicit function calling in the prompt
-# since Gemini 1.5 Flash doesn't support the same function calling format as OpenAI
-
-# Function descriptions for the LLM to understand available capabilities
-FUNCTION_DESCRIPTIONS = {
-    "search_web": "Search the web for current information, news, or facts. Use this when the user asks about recent events, needs up-to-date information, or when you need to verify facts. Parameters: query (required), max_results (optional, default: 3)",
-    "get_latest_news": "Get the latest news on a specific topic. Use this when the user asks for recent news or current events. Parameters: topic (optional, default: 'technology'), max_results (optional, default: 5)",
-    "get_weather": "Get current weather information for a specific location. Use this when the user asks about weather conditions. Parameters: location (required)"
-}
+def _function_result_text(function_name: str, parameters: Dict[str, Any], results: Optional[List[Dict]]) -> str:
+    """Turn search results for a function call into the text fed back to the model"""
+    if function_name == "search_web":
+        if results:
+            return format_search_results(results, parameters.get("query", ""))
+        return "I couldn't find any information about that topic. Please try a different search query."
+    if function_name == "get_latest_news":
+        topic = ", ".join(parameters.get("topics") or []) or parameters.get("topic", "technology")
+        if results:
+            return format_news_results(results, topic)
+        return f"I couldn't find any recent news about {topic}. The news service might be unavailable."
+    location = parameters.get("location", "")
+    if results:
+        return format_weather_results(results, location)
+    return f"I couldn't get weather information for {location}. Please check the location name and try again."
+
+def _tool_span(function_name: str, parameters: Dict[str, Any]):
+    return span(f"tool.{function_name}", arguments=json.dumps(parameters, default=str)[:200])
 
-# Function implementations
 def execute_function_call(function_name: str, parameters: Dict[str, Any]) -> str:
     """Execute a function call and return the result as a string"""
+    with _tool_span(function_name, parameters):
+        return _execute_function_call(function_name, parameters)
+
+def _execute_function_call(function_name: str, parameters: Dict[str, Any]) -> str:
     try:
         if function_name == "search_web":
-            query = parameters.get("query", "")
-            max_results = parameters.get("max_results", 3)
-            results = perform_web_search(query, max_results)
-            if results:
-                return format_search_results(results)
-            else:
-                return "I couldn't find any information about that topic. Please try a different search query."
-        
+            results = perform_web_search(parameters.get("query", ""), parameters.get("max_results", 3))
         elif function_name == "get_latest_news":
-            topic = parameters.get("topic", "technology")
+            topics = parameters.get("topics")
             max_results = parameters.get("max_results", 5)
-            results = get_news(topic, max_results)
-            if results:
-                return format_news_results(results, topic)
+            if topics:
+                results = get_news_many(topics, max_results)
             else:
-                return f"I couldn't find any recent news about {topic}. The news service might be unavailable."
-        
+                results = get_news(parameters.get("topic", "technology"), max_results)
         elif function_name == "get_weather":
-            location = parameters.get("location", "")
-            results = get_weather(location)
-            if results:
-                return format_weather_results(results, location)
-            else:
-                return f"I couldn't get weather information for {location}. Please check the location name and try again."
-        
+            results = get_weather(parameters.get("location", ""))
         else:
             return f"Unknown function: {function_name}"
+        return _function_result_text(function_name, parameters, results)
     
     except Exception as e:
         logger.error(f"Function execution error: {e}")
         return f"Error executing function: {str(e)}"
 
-def format_search_results(results: List[Dict]) -> str:
-    """Format search results into a readable string"""
-    if not results:
-        return "No results found."
-    
-    formatted = "Here's what I found:\n\n"
-    for i, result in enumerate(results, 1):
-        formatted += f"{i}. {result.get('title', 'No title')}\n"
-        formatted += f"   {result.get('content', 'No content')[:200]}...\n"
-        formatted += f"   Source: {result.get('url', 'No URL')}\n\n"
-    
-    return formatted
-
-def format_news_results(results: List[Dict], topic: str) -> str:
-    """Format news results into a readable string"""
-    if not results:
-        return f"No recent news found about {topic}."
-    
-    formatted = f"Here are the latest news about {topic}:\n\n"
-    for i, result in enumerate(results, 1):
-        formatted += f"{i}. {result.get('title', 'No title')}\n"
-        formatted += f"   {result.get('content', 'No content')[:150]}...\n\n"
-    
-    return formatted
-
-def format_weather_results(results: List[Dict], location: str) -> str:
-    """Format weather results into a readable string"""
-    if not results:
-        return f"No weather information found for {location}."
-    
-    # For weather, we typically expect one result with detailed info
-    result = results[0]
-    return f"Weather information for {location}:\n\n{result.get('content', 'No weather details available')}"
+async def execute_function_call_async(function_name: str, parameters: Dict[str, Any]) -> str:
+    """Async variant of execute_function_call using the pooled Tavily client"""
+    with _tool_span(function_name, parameters):
+        return await _execute_function_call_async(function_name, parameters)
 
-def generate_llm_response(history, persona="default"):
-    """Generate LLM response using Google Gemini with persona"""
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here":
-        logger.error("GEMINI_API_KEY not configured or using placeholder")
-        return "API key not configured. Please add your Google Gemini API key to the .env file."
-    
+async def _execute_function_call_async(function_name: str, parameters: Dict[str, Any]) -> str:
+    search = async_web_search_service
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Format conversation history for Gemini with persona system prompt
-        conversation = []
-        
-        # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
-        
-        for message in history:
-            if message["role"] == "user":
-                conversation.append({"role": "user", "parts": [message["content"]]})
-            elif message["role"] == "model":
-                conversation.append({"role": "model", "parts": [message["content"]]})
-        
-        # Start chat session with prior messages
-        chat = model.start_chat(history=conversation)
-        
-        # Send the latest user message
-        latest_user_text = ""
-        for m in reversed(history):
-            if m.get("role") == "user":
-                latest_user_text = m.get("content", "").strip()
-                break
-        prompt = latest_user_text or "Please respond naturally to the user's last message."
-        
-        response = chat.send_message(prompt)
-        return response.text
-    except Exception as e:
-        logger.error(f"LLM API error: {e}")
-        return f"AI response error: {str(e)}"
-
-async def generate_streaming_response(history, persona="default") -> AsyncGenerator[str, None]:
-    """Generate streaming LLM response with persona"""
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here":
-        logger.error("GEMINI_API_KEY not configured or using placeholder")
-        yield "API key not configured. Please add your Google Gemini API key to the .env file."
-        return
+        if function_name == "search_web":
+            results = await search.search_web(parameters.get("query", ""), parameters.get("max_results", 3))
+        elif function_name == "get_latest_news":
+            topics = parameters.get("topics")
+            max_results = parameters.get("max_results", 5)
+            if topics:
+                results = await search.get_news_many(topics, max_results)
+            else:
+                results = await search.get_latest_news(parameters.get("topic", "technology"), max_results)
+        elif function_name == "get_weather":
+            results = await search.get_weather_info(parameters.get("location", ""))
+        else:
+            return f"Unknown function: {function_name}"
+        return _function_result_text(function_name, parameters, results)
     
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Format conversation history for Gemini with persona system prompt
-        conversation = []
-        
-        # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
-        
-        for message in history:
-            if message["role"] == "user":
-                conversation.append({"role": "user", "parts": [message["content"]]})
-            elif message["role"] == "model":
-                conversation.append({"role": "model", "parts": [message["content"]]})
-        
-        # Start chat session with prior messages
-        chat = model.start_chat(history=conversation)
-        
-        # Send the latest user message
-        latest_user_text = ""
-        for m in reversed(history):
-            if m.get("role") == "user":
-                latest_user_text = m.get("content", "").strip()
-                break
-        prompt = latest_user_text or "Please respond naturally to the user's last message."
-        
-        # Stream the response
-        response = chat.send_message(prompt, stream=True)
-        
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
-                
     except Exception as e:
-        logger.error(f"Streaming LLM error: {e}")
-        yield f"Error generating response: {str(e)}"
+        logger.error(f"Function execution error: {e}")
+        return f"Error executing function: {str(e)}"
 
-def format_search_results(results: List[Dict]) -> str:
-    """Format search results into a readable string"""
+def format_search_results(results: List[Dict], query: str = "") -> str:
+    """Format search results into a compact, query-focused summary"""
     if not results:
         return "No results found."
-    
-    formatted = "Here's what I found:\n\n"
-    for i, result in enumerate(results, 1):
-        formatted += f"{i}. {result.get('title', 'No title')}\n"
-        formatted += f"   {result.get('content', 'No content')[:200]}...\n"
-        formatted += f"   Source: {result.get('url', 'No URL')}\n\n"
-    
-    return formatted
+    return compact_results(results, query, heading="Here's what I found:")
 
 def format_news_results(results: List[Dict], topic: str) -> str:
-    """Format news results into a readable string"""
+    """Format news results into a compact summary"""
     if not results:
         return f"No recent news found about {topic}."
-    
-    formatted = f"Here are the latest news about {topic}:\n\n"
-    for i, result in enumerate(results, 1):
-        formatted += f"{i}. {result.get('title', 'No title')}\n"
-        formatted += f"   {result.get('content', 'No content')[:150]}...\n\n"
-    
-    return formatted
+    return compact_results(results, topic, heading=f"Latest news about {topic}:")
 
 def format_weather_results(results: List[Dict], location: str) -> str:
-    """Format weather results into a readable string"""
+    """Format weather results into a compact summary"""
     if not results:
         return f"No weather information found for {location}."
     
     # For weather, we typically expect one result with detailed info
-    result = results[0]
-    return f"Weather information for {location}:\n\n{result.get('content', 'No weather details available')}"
+    return compact_results(results[:1], f"weather {location}", heading=f"Weather information for {location}:",
+                           sentences_per_result=3)
+
+def _build_conversation(history, system_message: str) -> List[Dict]:
+    """Gemini chat contents: system prompt, history, ending with the user message to answer"""
+    conversation = [{"role": "user", "parts": [system_message]}]
+    for message in history:
+        if message["role"] == "user":
+            conversation.append({"role": "user", "parts": [message["content"]]})
+        elif message["role"] == "model":
+            conversation.append({"role": "model", "parts": [message["content"]]})
+    if len(conversation) == 1 or conversation[-1]["role"] != "user":
+        conversation.append({"role": "user", "parts": ["Please respond naturally to the user's last message."]})
+    return conversation
 
 def generate_llm_response(history, persona="default"):
     """Generate LLM response using Google Gemini with persona"""
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here":
+    if LLM_PROVIDER == "gemini" and (not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here"):
         logger.error("GEMINI_API_KEY not configured or using placeholder")
         return "API key not configured. Please add your Google Gemini API key to the .env file."
     
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Format conversation history for Gemini with persona system prompt
-        conversation = []
-        
-        # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
-        
-        for message in history:
-            if message["role"] == "user":
-                conversation.append({"role": "user", "parts": [message["content"]]})
-            elif message["role"] == "model":
-                conversation.append({"role": "model", "parts": [message["content"]]})
-        
-        # Start chat session with prior messages
-        chat = model.start_chat(history=conversation)
+        # Persona system prompt is pre-assembled with the tool instructions
+        conversation = _build_conversation(history, persona_registry.get(persona).system_message)
         
-        # Send the latest user message
-        latest_user_text = ""
-        for m in reversed(history):
-            if m.get("role") == "user":
-                latest_user_text = m.get("content", "").strip()
+        # Bounded by a deadline, and hedged against slow responses when enabled
+        with span("llm.generate", round=0):
+            text = llm_client.generate(conversation)
+
+        # Run every tool the model asked for in parallel and feed the results back in one message
+        for round_number in range(MAX_TOOL_ROUNDS):
+            calls = parse_tool_calls(text)
+            if not calls:
                 break
-        prompt = latest_user_text or "Please respond naturally to the user's last message."
-        
-        response = chat.send_message(prompt)
-        return response.text
+            logger.info(f"LLM requested tools: {[call.name for call in calls]}")
+            if not has_time(TURN_TOOL_MIN_SECS):
+                # Not enough budget for the tools and another LLM round
+                degrade("tools", f"skipped {[call.name for call in calls]}")
+                return strip_tool_calls(text) or OUT_OF_TIME_REPLY
+            with span("tools", calls=len(calls)):
+                results = run_tool_calls_sync(calls, execute_function_call)
+            conversation.append({"role": "model", "parts": [text]})
+            conversation.append({"role": "user", "parts": [format_tool_results(results)]})
+            with span("llm.generate", round=round_number + 1):
+                text = llm_client.generate(conversation)
+
+        return strip_tool_calls(text)
     except Exception as e:
         logger.error(f"LLM API error: {e}")
         return f"AI response error: {str(e)}"
 
 async def generate_streaming_response(history, persona="default") -> AsyncGenerator[str, None]:
-    """Generate streaming LLM response with persona"""
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here":
+    """Generate streaming LLM response with persona, running tools as soon as they are requested"""
+    if LLM_PROVIDER == "gemini" and (not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here"):
         logger.error("GEMINI_API_KEY not configured or using placeholder")
         yield "API key not configured. Please add your Google Gemini API key to the .env file."
         return
     
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # Format conversation history for Gemini with persona system prompt
-        conversation = []
-        
-        # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
-        
-        for message in history:
-            if message["role"] == "user":
-                conversation.append({"role": "user", "parts": [message["content"]]})
-            elif message["role"] == "model":
-                conversation.append({"role": "model", "parts": [message["content"]]})
-        
-        # Start chat session with prior messages
-        chat = model.start_chat(history=conversation)
-        
-        # Send the latest user message
-        latest_user_text = ""
-        for m in reversed(history):
-            if m.get("role") == "user":
-                latest_user_text = m.get("content", "").strip()
-                break
-        prompt = latest_user_text or "Please respond naturally to the user's last message."
-        
-        # Stream the response
-        response = chat.send_message(prompt, stream=True)
-        
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
+        conversation = _build_conversation(history, persona_registry.get(persona).system_message)
+        
+        for round_number in range(MAX_TOOL_ROUNDS + 1):
+            allow_tools = round_number < MAX_TOOL_ROUNDS
+            parser = ToolCallStreamParser()
+            tool_tasks = []
+            model_text = []
+            spoke = skipped = False
+            # Started but not made current: this generator yields to the caller while it is open
+            round_span = start_span("llm.stream", round=round_number)
+            
+            try:
+                async for chunk in stream_async(llm_client.provider, conversation, breaker=llm_client.breaker):
+                    if not model_text:
+                        round_span.add_event("first_chunk")
+                    model_text.append(chunk)
+                    text, calls = parser.feed(chunk)
+                    # Plain text goes straight out; text after a tool call is never spoken
+                    if text:
+                        spoke = True
+                        yield text
+                    if allow_tools and calls and not has_time(TURN_TOOL_MIN_SECS):
+                        degrade("tools", f"skipped {[call.name for call in calls]}")
+                        skipped = True
+                    elif allow_tools:
+                        for call in calls:
+                            logger.info(f"Streaming LLM requested tool {call.name}, starting it now")
+                            round_span.add_event("tool_started", tool=call.name)
+                            with use_span(round_span):
+                                tool_tasks.append(asyncio.ensure_future(
+                                    run_tool_calls([call], execute_function_call_async)))
+                    if parser.done:
+                        break
+                
+                text = parser.close()
+                if text:
+                    spoke = True
+                    yield text
+                if not tool_tasks:
+                    if skipped and not spoke:
+                        yield OUT_OF_TIME_REPLY
+                    return
+                
+                results = [result for batch in await asyncio.gather(*tool_tasks) for result in batch]
+            except BaseException as e:
+                if not isinstance(e, GeneratorExit):
+                    round_span.fail(e if str(e) else type(e).__name__)
+                raise
+            finally:
+                # A cancelled turn must not leave tool calls running
+                for task in tool_tasks:
+                    task.cancel()
+                round_span.set("tools", len(tool_tasks))
+                round_span.end()
+            conversation.append({"role": "model", "parts": ["".join(model_text)]})
+            conversation.append({"role": "user", "parts": [format_tool_results(results)]})
                 
     except Exception as e:
         logger.error(f"Streaming LLM error: {e}")
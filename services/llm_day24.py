@@ -3,20 +3,13 @@ import json
 import google.generativeai as genai
 from typing import AsyncGenerator, List, Dict, Any
 import logging
+from services.personas import persona_registry
 
 logger = logging.getLogger(__name__)
 
 # Check if API key is configured
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Persona system prompts for Day 24: Agent Persona
-PERSONA_PROMPTS = {
-    "default": "You are a helpful and friendly AI assistant. Respond naturally and conversationally.",
-    "pirate": "You are a pirate captain! Speak like a pirate with nautical terms. Use phrases like 'Arrr!', 'Shiver me timbers!', 'Ahoy matey!', and talk about treasure, ships, and the seven seas. Keep it fun and engaging!",
-    "robot": "You are a sophisticated AI robot. Speak in a precise, mechanical manner. Use robotic language like 'BEEP-BOOP', 'PROCESSING', 'CALCULATING'. Be logical and efficient in your responses.",
-    "cowboy": "You are a cowboy from the Wild West! Use western slang like 'Howdy partner!', 'Yeehaw!', 'This town ain't big enough...'. Talk about horses, saloons, and the frontier spirit."
-}
-
 def generate_llm_response(history, persona="default"):
     """Generate LLM response using Google Gemini with persona"""
     if not GEMINI_API_KEY or GEMINI_API_KEY == "your_gemini_api_key_here":
@@ -31,8 +24,7 @@ def generate_llm_response(history, persona="default"):
         conversation = []
 
         # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
+        conversation.append({"role": "user", "parts": [persona_registry.get(persona).plain_system_message]})
 
         for message in history:
             if message["role"] == "user":
@@ -72,8 +64,7 @@ async def generate_streaming_response(history, persona="default") -> AsyncGenera
         conversation = []
 
         # Add persona system prompt as the first message
-        system_prompt = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS["default"])
-        conversation.append({"role": "user", "parts": [f"System: {system_prompt}"]})
+        conversation.append({"role": "user", "parts": [persona_registry.get(persona).plain_system_message]})
 
         for message in history:
             if message["role"] == "user":
@@ -0,0 +1,316 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import google.generativeai as genai
+import google.ai.generativelanguage as glm
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breakers
+from services.deadlines import degrade, time_left
+from services.key_pool import APIKeyPool, key_pools, status_of
+from services.metrics import llm_total, llm_ttft
+from services.rate_limiter import rate_limiters
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# "gemini" or "mock" (the deterministic local provider in mocks/llm_provider.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").strip().lower()
+LLM_DEADLINE_SECS = float(os.getenv("LLM_DEADLINE_SECS", "20"))
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").strip().lower() in ("1", "true", "yes", "on")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Hedge delay used until enough latencies have been observed
+LLM_HEDGE_INITIAL_DELAY_SECS = float(os.getenv("LLM_HEDGE_INITIAL_DELAY_SECS", "3"))
+LLM_HEDGE_MIN_DELAY_SECS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECS", "0.3"))
+# Caps the delay while a few slow outliers dominate a small sample
+LLM_HEDGE_MAX_DELAY_SECS = float(os.getenv("LLM_HEDGE_MAX_DELAY_SECS", "5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+
+# Gemini chat format: [{"role": "user" | "model", "parts": [text]}, ...]
+Conversation = List[Dict]
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """No provider attempt answered before the call's deadline."""
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LLMProvider:
+    """A blocking, stateless text generation backend.
+
+    generate() receives the whole conversation, ending with the user
+    message to answer, and returns the model's text. Providers must be safe
+    to call from several threads at once.
+    """
+    name = "base"
+
+    def generate(self, conversation: Conversation) -> str:
+        raise NotImplementedError
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        """Yield the answer in chunks as they are produced (blocking iterator)."""
+        yield self.generate(conversation)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = GEMINI_MODEL) -> None:
+        # An explicit key replaces the shared GEMINI_API_KEY(S) pool
+        self.keys = APIKeyPool(self.name, [api_key]) if api_key is not None else key_pools.get(self.name)
+        self.model_name = model
+        self._models: Dict[str, genai.GenerativeModel] = {}
+        self._models_lock = threading.Lock()
+
+    def _get_model(self, api_key: str):
+        # genai.configure() sets one key for the whole process, so each key gets its own client
+        with self._models_lock:
+            model = self._models.get(api_key)
+            if model is None:
+                model = genai.GenerativeModel(self.model_name)
+                model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+                self._models[api_key] = model
+            return model
+
+    def _lease(self):
+        lease = self.keys.lease()
+        if lease is None:
+            raise RuntimeError("No usable Gemini API key (not configured or all drained)")
+        return lease
+
+    def _on_error(self, lease, error: Exception) -> None:
+        status = status_of(error)
+        lease.report(status)
+        if status == 429:
+            rate_limiters.throttle(self.name, lease.key)
+
+    def generate(self, conversation: Conversation) -> str:
+        with self._lease() as lease:
+            rate_limiters.acquire(self.name, lease.key)
+            try:
+                return self._get_model(lease.key).generate_content(conversation).text
+            except Exception as e:
+                self._on_error(lease, e)
+                raise
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        with self._lease() as lease:
+            rate_limiters.acquire(self.name, lease.key)
+            try:
+                for chunk in self._get_model(lease.key).generate_content(conversation, stream=True):
+                    if chunk.text:
+                        yield chunk.text
+            except Exception as e:
+                self._on_error(lease, e)
+                raise
+
+
+def get_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    if name == "mock":
+        from mocks.llm_provider import MockLLMProvider
+        return MockLLMProvider.from_env()
+    return GeminiProvider()
+
+
+class HedgedLLMClient:
+    """Calls a provider with a per-call deadline and optional request hedging.
+
+    With hedging on, if the first attempt has not answered after the hedge
+    delay (the recent p95 latency, adapted from a sliding window), a second
+    attempt is sent and whichever answers first wins. A failed first attempt
+    is hedged immediately. The pinned Gemini SDK has no per-request timeout,
+    so attempts that lose or miss the deadline finish in the background and
+    their results are discarded. With a breaker, calls fail fast with
+    CircuitOpenError while the provider is down.
+    """
+
+    def __init__(self,
+                 provider: LLMProvider,
+                 hedge_provider: Optional[LLMProvider] = None,
+                 deadline: float = LLM_DEADLINE_SECS,
+                 hedging: bool = LLM_HEDGING,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 initial_hedge_delay: float = LLM_HEDGE_INITIAL_DELAY_SECS,
+                 min_hedge_delay: float = LLM_HEDGE_MIN_DELAY_SECS,
+                 max_hedge_delay: float = LLM_HEDGE_MAX_DELAY_SECS,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+                 window: int = LLM_LATENCY_WINDOW,
+                 max_workers: int = 8,
+                 breaker: Optional[CircuitBreaker] = None) -> None:
+        self.provider = provider
+        self.breaker = breaker
+        self.hedge_provider = hedge_provider or provider
+        self.deadline = deadline
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self._attempt_latencies = deque(maxlen=window)
+        self._call_latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "errors": 0, "deadline_exceeded": 0}
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            samples = list(self._attempt_latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, percentile(samples, self.hedge_percentile)))
+
+    def _attempt(self, provider: LLMProvider, conversation: Conversation) -> str:
+        start = time.perf_counter()
+        text = provider.generate(conversation)
+        with self._lock:
+            self._attempt_latencies.append(time.perf_counter() - start)
+        return text
+
+    def _submit(self, provider: LLMProvider, conversation: Conversation):
+        # Attempts run with the caller's context, so they see the turn deadline
+        return self._executor.submit(contextvars.copy_context().run, self._attempt, provider, conversation)
+
+    def generate(self, conversation: Conversation, deadline: Optional[float] = None) -> str:
+        """Return the first successful answer, or raise once every attempt failed or time ran out.
+
+        The deadline is also capped by what is left of the current turn's budget.
+        """
+        limit = time_left(self.deadline if deadline is None else deadline)
+        if limit <= 0:
+            raise LLMDeadlineExceeded("No time left in the turn budget for the LLM")
+        if self.breaker and not self.breaker.allow():
+            raise CircuitOpenError(f"{self.provider.name} circuit is open")
+        start = time.perf_counter()
+        with self._lock:
+            self._stats["calls"] += 1
+        primary = self._submit(self.provider, conversation)
+        pending = {primary}
+        hedge = None
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            remaining = limit - (time.perf_counter() - start)
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if self.hedging and hedge is None:
+                wait_for = min(remaining, max(0.0, self.hedge_delay() - (time.perf_counter() - start)))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"LLM attempt via {self.provider.name} failed: {e}")
+                    continue
+                self._record_call(start, hedge_won=future is hedge)
+                if self.breaker:
+                    self.breaker.record_success()
+                return text
+            if self.hedging and hedge is None and (not pending or not done):
+                # The first attempt is slow or failed: race a second one against it
+                hedge = self._submit(self.hedge_provider, conversation)
+                pending.add(hedge)
+                with self._lock:
+                    self._stats["hedged"] += 1
+                logger.info(f"Hedging LLM request after {time.perf_counter() - start:.2f}s")
+
+        with self._lock:
+            if pending:
+                self._stats["deadline_exceeded"] += 1
+            else:
+                self._stats["errors"] += 1
+        if self.breaker:
+            self.breaker.record_failure()
+        if pending:
+            raise LLMDeadlineExceeded(f"LLM did not answer within {limit:.1f}s")
+        raise last_error
+
+    def _record_call(self, start: float, hedge_won: bool) -> None:
+        latency = time.perf_counter() - start
+        llm_total.observe(latency, provider=self.provider.name, mode="generate")
+        with self._lock:
+            self._call_latencies.append(latency)
+            if hedge_won:
+                self._stats["hedge_wins"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            latencies = list(self._call_latencies)
+        s.update({
+            "provider": self.provider.name,
+            "hedging": self.hedging,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        })
+        return s
+
+async def stream_async(provider: LLMProvider, conversation: Conversation,
+                       chunk_deadline: float = LLM_DEADLINE_SECS,
+                       breaker: Optional[CircuitBreaker] = None) -> AsyncIterator[str]:
+    """Iterate a provider's blocking stream off the event loop.
+
+    Each chunk, including the first, must arrive within chunk_deadline
+    seconds or LLMDeadlineExceeded is raised. If the turn budget runs out
+    after some text was produced, the reply is cut short there instead. The
+    breaker, if given, is judged on whether the first chunk arrives.
+    """
+    if breaker and not breaker.allow():
+        raise CircuitOpenError(f"{provider.name} circuit is open")
+    judged = breaker is None
+    produced = False
+    start = time.perf_counter()
+    try:
+        iterator = iter(provider.stream(conversation))
+        done = object()
+        while True:
+            timeout = time_left(chunk_deadline)
+            try:
+                if timeout <= 0:
+                    raise asyncio.TimeoutError
+                chunk = await asyncio.wait_for(asyncio.to_thread(next, iterator, done), timeout=timeout)
+            except asyncio.TimeoutError:
+                if produced and timeout < chunk_deadline:
+                    degrade("llm", "reply cut short")
+                    llm_total.observe(time.perf_counter() - start, provider=provider.name, mode="stream")
+                    return
+                raise LLMDeadlineExceeded(f"LLM stream stalled for {timeout:.1f}s")
+            if not judged:
+                breaker.record_success()
+                judged = True
+            if chunk is done:
+                llm_total.observe(time.perf_counter() - start, provider=provider.name, mode="stream")
+                return
+            if not produced:
+                llm_ttft.observe(time.perf_counter() - start, provider=provider.name)
+                produced = True
+            yield chunk
+    except Exception:
+        if not judged:
+            breaker.record_failure()
+            judged = True
+        raise
+    finally:
+        if not judged:
+            breaker.release()
+
+# Global instance
+llm_client = HedgedLLMClient(get_provider(), breaker=circuit_breakers.get(LLM_PROVIDER))
@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_MONITOR_ENABLED = os.getenv("LOOP_LAG_MONITOR_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# How often the probe coroutine wakes up to measure scheduling delay
+LOOP_LAG_INTERVAL_SECS = float(os.getenv("LOOP_LAG_INTERVAL_SECS", "0.05"))
+# Lag above this counts as a stall, and the loop thread's stack is captured
+LOOP_LAG_THRESHOLD_SECS = float(os.getenv("LOOP_LAG_THRESHOLD_SECS", "0.1"))
+LOOP_LAG_STALLS_KEPT = int(os.getenv("LOOP_LAG_STALLS_KEPT", "50"))
+LOOP_LAG_STACK_DEPTH = int(os.getenv("LOOP_LAG_STACK_DEPTH", "30"))
+
+# Frames under this directory (and outside installed packages) are "our" code
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+loop_lag = metrics.histogram(
+    "voice_event_loop_lag_seconds", "How late the event loop ran a callback that was due (scheduling delay)",
+    buckets=LAG_BUCKETS)
+loop_stalls = metrics.counter(
+    "voice_event_loop_stalls_total", "Times the event loop was blocked for longer than the lag threshold")
+
+
+def _is_project_frame(filename: str) -> bool:
+    path = os.path.abspath(filename)
+    return (path.startswith(_PROJECT_DIR + os.sep) and "site-packages" not in path
+            and path != os.path.abspath(__file__))
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    filename = os.path.relpath(frame.filename, _PROJECT_DIR) if _is_project_frame(frame.filename) else frame.filename
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling delay and reports what blocked the loop.
+
+    A probe coroutine sleeps for `interval` and records how late it woke up;
+    that lag is exported as a histogram. A watchdog thread watches the
+    probe's next due time: when the loop is overdue by more than `threshold`
+    it is still stuck inside the blocking call, so the watchdog grabs the
+    loop thread's stack at that moment. The innermost frame from this
+    project's code is the blocking call site, and sites are counted so
+    repeat offenders stand out.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECS, threshold: float = LOOP_LAG_THRESHOLD_SECS,
+                 keep: int = LOOP_LAG_STALLS_KEPT, stack_depth: int = LOOP_LAG_STACK_DEPTH) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self._lock = threading.Lock()
+        self._due: Optional[float] = None
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._stall: Optional[Dict[str, Any]] = None
+        self._stalls: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._sites: Counter = Counter()
+        self._stall_count = 0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the probe on the running loop and the watchdog thread."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            with self._lock:
+                self._due = started + self.interval
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def _record(self, lag: float) -> None:
+        loop_lag.observe(lag)
+        with self._lock:
+            self._due = None
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            stall, self._stall = self._stall, None
+            if stall is None and lag < self.threshold:
+                return
+            if stall is None:
+                # Over before the watchdog looked, so there is no stack to show
+                stall = {"at_unix": round(time.time() - lag, 3), "site": None, "stack": []}
+            stall["lag_ms"] = round(lag * 1000, 1)
+            self._stalls.append(stall)
+            self._stall_count += 1
+        loop_stalls.inc()
+
+    def _watch(self) -> None:
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            with self._lock:
+                if self._due is None or self._stall is not None:
+                    continue
+                overdue = time.perf_counter() - self._due
+                if overdue <= self.threshold:
+                    continue
+                stall = self._stall = self._capture(overdue)
+            logger.warning(f"Event loop blocked for over {overdue * 1000:.0f}ms at {stall['site']}; stack:\n"
+                           + "\n".join(f"  {line}" for line in stall["stack"]))
+
+    def _capture(self, overdue: float) -> Dict[str, Any]:
+        frame = sys._current_frames().get(self._loop_thread)
+        frames: List[traceback.FrameSummary] = []
+        if frame is not None:
+            frames = list(reversed(traceback.StackSummary.extract(traceback.walk_stack(frame),
+                                                                  limit=self.stack_depth)))
+        site_frame = next((f for f in reversed(frames) if _is_project_frame(f.filename)),
+                          frames[-1] if frames else None)
+        site = _format_frame(site_frame) if site_frame else None
+        if site:
+            self._sites[site] += 1
+        # Source lines make the stack readable; the loop is blocked anyway while we read them
+        return {"at_unix": round(time.time() - overdue, 3), "site": site,
+                "stack": [f"{_format_frame(f)}: {f.line}" if f.line else _format_frame(f) for f in frames]}
+
+    def current_lag(self) -> float:
+        """Lag right now: how overdue the loop is if it is blocked, else the last measurement."""
+        with self._lock:
+            if self._due is not None:
+                overdue = time.perf_counter() - self._due
+                if overdue > self.threshold:
+                    return overdue
+            return self._last_lag
+
+    def snapshot(self) -> Dict[str, Any]:
+        lag = self.current_lag()
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_ms": round(self.interval * 1000, 1),
+                "threshold_ms": round(self.threshold * 1000, 1),
+                "current_lag_ms": round(lag * 1000, 1),
+                "max_lag_ms": round(self._max_lag * 1000, 1),
+                "stalls": self._stall_count,
+                "blocking_sites": [{"site": site, "stalls": n} for site, n in self._sites.most_common(20)],
+                "recent_stalls": list(reversed(self._stalls)),
+            }
+
+# Global instance
+loop_monitor = LoopLagMonitor()
+
+metrics.gauge("voice_event_loop_lag_current_seconds",
+              "Current event-loop lag (how overdue the loop is while it is blocked)",
+              callback=loop_monitor.current_lag)
@@ -0,0 +1,276 @@
+import os
+import sys
+import gc
+import time
+import types
+import asyncio
+import logging
+import itertools
+import sysconfig
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stop walking an object graph after this many objects; the size is then a lower bound
+MEMORY_SIZEOF_MAX_OBJECTS = int(os.getenv("MEMORY_SIZEOF_MAX_OBJECTS", "200000"))
+# Stack frames recorded per allocation once tracemalloc is on (more frames, more overhead)
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "5"))
+# tracemalloc snapshots kept for diffing; the oldest is dropped first
+MEMORY_SNAPSHOTS_KEPT = int(os.getenv("MEMORY_SNAPSHOTS_KEPT", "4"))
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+# Shared infrastructure reachable from almost anything; sizing it would count it everywhere
+_NOT_SIZED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+              types.CodeType, types.FrameType, threading.Thread, asyncio.AbstractEventLoop, logging.Logger)
+_LEAVES = (str, bytes, bytearray, memoryview, int, float, complex, bool, type(None))
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PATH_ROOTS = sorted({p for p in (_PROJECT_DIR, sysconfig.get_paths().get("purelib"),
+                                  sysconfig.get_paths().get("platlib"), sysconfig.get_paths().get("stdlib")) if p},
+                     key=len, reverse=True)
+
+
+def deep_sizeof(obj: Any, max_objects: int = MEMORY_SIZEOF_MAX_OBJECTS) -> Tuple[int, int, bool]:
+    """Approximate bytes reachable from obj: (bytes, objects, truncated).
+
+    Follows containers and instance attributes, counting each object once.
+    Containers are copied before they are walked, so this is safe to run
+    off the event loop while the loop keeps mutating them.
+    """
+    seen = set()
+    stack = [obj]
+    total = objects = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _NOT_SIZED):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o, 0)
+        objects += 1
+        if objects >= max_objects:
+            return total, objects, True
+        if isinstance(o, _LEAVES):
+            continue
+        if isinstance(o, dict):
+            for key, value in list(o.items()):
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(list(o))
+        else:
+            attrs = getattr(o, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(o), "__slots__", ()):
+                if isinstance(slot, str) and hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+    return total, objects, False
+
+def _module_of(filename: str) -> str:
+    """'services/tts.py' -> 'services.tts', '.../site-packages/httpx/_client.py' -> 'httpx._client'."""
+    path = os.path.abspath(filename)
+    for root in _PATH_ROOTS:
+        if path.startswith(root + os.sep):
+            rel = os.path.splitext(os.path.relpath(path, root))[0]
+            return rel.replace(os.sep, ".").removesuffix(".__init__")
+    return filename
+
+def _where(frame: tracemalloc.Frame) -> str:
+    return f"{_module_of(frame.filename)}:{frame.lineno}"
+
+def _stat_dict(stat, group_by: str, diff: bool) -> Dict[str, Any]:
+    frame = stat.traceback[-1]  # frames run from the oldest call to the allocation itself
+    entry = {"where": _module_of(frame.filename) if group_by == "filename" else _where(frame),
+             "size_bytes": stat.size, "count": stat.count}
+    if diff:
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    if group_by == "traceback":
+        entry["traceback"] = [_where(f) for f in stat.traceback]
+    return entry
+
+
+class MemoryAccountant:
+    """Where a worker's memory is going.
+
+    Long-lived stores (sessions, caches, trace buffers) are registered by
+    name and WebSocket connections register their buffers while they are
+    open; report() sizes each of them. For leaks those do not explain,
+    tracemalloc snapshots can be taken on demand and diffed to find the
+    module and line that keeps allocating.
+    """
+
+    def __init__(self, max_objects: int = MEMORY_SIZEOF_MAX_OBJECTS, trace_frames: int = MEMORY_TRACE_FRAMES,
+                 snapshots_kept: int = MEMORY_SNAPSHOTS_KEPT) -> None:
+        self.max_objects = max_objects
+        self.trace_frames = trace_frames
+        self.snapshots_kept = snapshots_kept
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Callable[[], Any]] = {}
+        self._connections: Dict[int, Tuple[str, float, Dict[str, Any]]] = {}
+        self._connection_ids = itertools.count(1)
+        self._snapshots: "OrderedDict[int, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+        self._snapshot_ids = itertools.count(1)
+        self._started_tracing = False
+
+    # Accounting
+
+    def register(self, name: str, source: Any = None, callback: Optional[Callable[[], Any]] = None) -> None:
+        """Account for source under name, or for what callback returns at report time
+        (exact bytes as an int, or an object to size)."""
+        with self._lock:
+            self._sources[name] = callback if callback is not None else (lambda: source)
+
+    def track_connection(self, session_id: str, **buffers: Any) -> int:
+        """Account for a connection's buffers until untrack_connection(handle)."""
+        handle = next(self._connection_ids)
+        with self._lock:
+            self._connections[handle] = (session_id, time.time(), buffers)
+        return handle
+
+    def untrack_connection(self, handle: int) -> None:
+        with self._lock:
+            self._connections.pop(handle, None)
+
+    def _size(self, value: Any) -> Dict[str, Any]:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return {"bytes": value, "exact": True}
+        size, objects, truncated = deep_sizeof(value, self.max_objects)
+        entry = {"bytes": size, "objects": objects}
+        if isinstance(value, (dict, list, tuple, set, deque)):
+            entry["items"] = len(value)
+        if truncated:
+            entry["truncated"] = True
+        return entry
+
+    def report(self, top_connections: int = 10) -> Dict[str, Any]:
+        """Approximate bytes per registered store and per open connection. Walks object graphs: run off the loop."""
+        with self._lock:
+            sources = dict(self._sources)
+            connections = list(self._connections.values())
+        started = time.perf_counter()
+        stores = {}
+        for name, source in sources.items():
+            try:
+                stores[name] = self._size(source())
+            except Exception as e:
+                stores[name] = {"error": str(e)}
+        per_connection = []
+        for session_id, opened_at, buffers in connections:
+            parts = {name: self._size(value)["bytes"] for name, value in buffers.items() if value is not None}
+            per_connection.append({"session_id": session_id, "open_secs": round(time.time() - opened_at, 1),
+                                   "bytes": sum(parts.values()), "parts": parts})
+        per_connection.sort(key=lambda c: c["bytes"], reverse=True)
+        return {
+            "process": self.process(),
+            "stores": stores,
+            "connections": {"open": len(per_connection),
+                            "bytes": sum(c["bytes"] for c in per_connection),
+                            "largest": per_connection[:top_connections]},
+            "tracemalloc": self.tracing_status(),
+            "took_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    @staticmethod
+    def process() -> Dict[str, Any]:
+        info: Dict[str, Any] = {"gc_counts": gc.get_count()}
+        try:
+            with open("/proc/self/statm") as f:
+                info["rss_bytes"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            try:
+                import resource
+                # Peak, not current; kilobytes on Linux, bytes on macOS
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                info["max_rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024
+            except ImportError:
+                pass
+        return info
+
+    # tracemalloc snapshots
+
+    def tracing_status(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshots = [{"id": sid, "taken_at_unix": round(taken, 3)} for sid, (taken, _) in self._snapshots.items()]
+        status: Dict[str, Any] = {"tracing": tracemalloc.is_tracing(), "snapshots": snapshots}
+        if status["tracing"]:
+            current, peak = tracemalloc.get_traced_memory()
+            status.update({"frames": tracemalloc.get_traceback_limit(), "traced_bytes": current,
+                           "traced_peak_bytes": peak, "overhead_bytes": tracemalloc.get_tracemalloc_memory()})
+        return status
+
+    def _take(self) -> Tuple[int, tracemalloc.Snapshot]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        with self._lock:
+            snapshot_id = next(self._snapshot_ids)
+            self._snapshots[snapshot_id] = (time.time(), snapshot)
+            while len(self._snapshots) > self.snapshots_kept:
+                self._snapshots.popitem(last=False)
+        return snapshot_id, snapshot
+
+    def take_snapshot(self, limit: int = 20, frames: Optional[int] = None) -> Dict[str, Any]:
+        """Snapshot traced allocations, starting tracemalloc first if it is off.
+
+        Only allocations made after tracing starts are seen, so the first
+        snapshot after starting is the baseline to diff later ones against.
+        """
+        started = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.trace_frames)
+            self._started_tracing = started = True
+            logger.info(f"tracemalloc started with {tracemalloc.get_traceback_limit()} frames")
+        snapshot_id, snapshot = self._take()
+        return {"id": snapshot_id, "tracing_started": started,
+                "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+                "top": [_stat_dict(stat, "lineno", diff=False) for stat in snapshot.statistics("lineno")[:limit]]}
+
+    def diff(self, base_id: int, target_id: Optional[int] = None, limit: int = 20,
+             group_by: str = "lineno") -> Dict[str, Any]:
+        """What grew between two snapshots; without target_id, a new snapshot is taken as the target.
+
+        Raises KeyError for an unknown snapshot and ValueError for a bad group_by.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        with self._lock:
+            base = self._snapshots.get(base_id)
+            target = self._snapshots.get(target_id) if target_id is not None else None
+        if base is None:
+            raise KeyError(base_id)
+        if target_id is not None and target is None:
+            raise KeyError(target_id)
+        if target is None:
+            target_id, snapshot = self._take()
+            target = (time.time(), snapshot)
+        stats = [s for s in target[1].compare_to(base[1], group_by) if s.size_diff or s.count_diff]
+        stats.sort(key=lambda s: s.size_diff, reverse=True)
+        return {
+            "base": base_id,
+            "target": target_id,
+            "elapsed_secs": round(target[0] - base[0], 1),
+            "group_by": group_by,
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "grew": [_stat_dict(s, group_by, diff=True) for s in stats[:limit] if s.size_diff > 0],
+            "shrank": [_stat_dict(s, group_by, diff=True) for s in reversed(stats[-limit:]) if s.size_diff < 0],
+        }
+
+    def stop_tracing(self) -> None:
+        """Stop tracemalloc (if it was started here) and drop all snapshots."""
+        with self._lock:
+            self._snapshots.clear()
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+
+# Global instance
+memory_accountant = MemoryAccountant()
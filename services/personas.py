@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from services.tools import TOOL_INSTRUCTIONS
+from services.tokens import estimate_tokens
+from services.tts import MURF_DEFAULT_VOICE_ID
+
+logger = logging.getLogger(__name__)
+
+PERSONAS_CONFIG_PATH = os.getenv(
+    "PERSONAS_CONFIG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "personas.json"))
+# How often the config file's mtime is checked for hot reload
+PERSONA_RELOAD_CHECK_SECS = float(os.getenv("PERSONA_RELOAD_CHECK_SECS", "2"))
+
+# Used only if the config file cannot be loaded at startup
+FALLBACK_PERSONA = {"prompt": "You are a helpful and friendly AI assistant. Respond naturally and conversationally."}
+
+
+@dataclass(frozen=True)
+class Persona:
+    """A persona with its system messages assembled once at load time.
+
+    system_message includes the web search hint and tool-calling
+    instructions; plain_system_message is the persona prompt alone, for
+    generation paths that cannot run tools.
+    """
+    name: str
+    prompt: str
+    voice_id: str
+    system_message: str
+    system_tokens: int
+    plain_system_message: str
+    plain_system_tokens: int
+    replies: Dict[str, str] = field(default_factory=dict)
+
+
+def build_persona(name: str, spec: Dict, tool_instructions: str = TOOL_INSTRUCTIONS) -> Persona:
+    prompt = spec["prompt"].strip()
+    search_hint = (spec.get("search_hint") or "").strip()
+    with_tools = f"{prompt} {search_hint}".strip()
+    system_message = f"System: {with_tools}\n\n{tool_instructions}" if tool_instructions else f"System: {with_tools}"
+    plain_system_message = f"System: {prompt}"
+    return Persona(
+        name=name,
+        prompt=prompt,
+        voice_id=spec.get("voice_id") or MURF_DEFAULT_VOICE_ID,
+        system_message=system_message,
+        system_tokens=estimate_tokens(system_message),
+        plain_system_message=plain_system_message,
+        plain_system_tokens=estimate_tokens(plain_system_message),
+        replies=dict(spec.get("replies") or {}),
+    )
+
+
+class PersonaRegistry:
+    """Personas loaded from a JSON config file and reloaded when it changes.
+
+    Lookups are dictionary reads; the file's mtime is checked at most once
+    every PERSONA_RELOAD_CHECK_SECS. A config that fails to parse is logged
+    and the previously loaded personas stay in use.
+    """
+
+    def __init__(self, path: str = PERSONAS_CONFIG_PATH,
+                 check_interval: float = PERSONA_RELOAD_CHECK_SECS,
+                 tool_instructions: str = TOOL_INSTRUCTIONS) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self.tool_instructions = tool_instructions
+        self.default_name = "default"
+        self.reloads = 0
+        self._personas: Dict[str, Persona] = {"default": build_persona("default", FALLBACK_PERSONA, tool_instructions)}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the config file now; returns False and keeps the old personas on error."""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                logger.error(f"Persona config not found at {self.path}: {e}")
+                return False
+            # Record the mtime even on failure so a broken file is not re-read until it changes
+            self._mtime = mtime
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    config = json.load(fh)
+                specs = config["personas"]
+                personas = {name: build_persona(name, spec, self.tool_instructions)
+                            for name, spec in specs.items()}
+                default_name = config.get("default_persona", "default")
+                if default_name not in personas:
+                    raise ValueError(f"default persona '{default_name}' is not defined")
+            except Exception as e:
+                logger.error(f"Failed to load personas from {self.path}: {e}")
+                return False
+            self._personas = personas
+            self.default_name = default_name
+            self.reloads += 1
+            logger.info(f"Loaded {len(personas)} personas from {self.path}")
+            return True
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def get(self, name: Optional[str] = None) -> Persona:
+        """Persona by name, falling back to the default persona."""
+        self._maybe_reload()
+        personas = self._personas
+        return personas.get(name) or personas[self.default_name]
+
+    def names(self) -> List[str]:
+        self._maybe_reload()
+        return list(self._personas)
+
+    def __contains__(self, name: str) -> bool:
+        self._maybe_reload()
+        return name in self._personas
+
+    def describe(self) -> List[Dict]:
+        return [{
+            "name": p.name,
+            "voice_id": p.voice_id,
+            "system_tokens": p.system_tokens,
+            "plain_system_tokens": p.plain_system_tokens,
+        } for p in (self.get(name) for name in self.names())]
+
+# Global instance
+persona_registry = PersonaRegistry()
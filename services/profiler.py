@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# ~100 samples a second is enough for a flamegraph and costs little
+PROFILER_INTERVAL_SECS = float(os.getenv("PROFILER_INTERVAL_SECS", "0.01"))
+PROFILER_MAX_SECS = float(os.getenv("PROFILER_MAX_SECS", "60"))
+PROFILER_MAX_DEPTH = int(os.getenv("PROFILER_MAX_DEPTH", "128"))
+
+# Leaf frames of threads parked waiting for work; dropped unless idle stacks are asked for
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+}
+
+
+class ProfilerBusy(RuntimeError):
+    """A capture is already running; captures do not overlap."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical CPU profiler for a live worker.
+
+    A background thread wakes every `interval` seconds, reads every other
+    thread's current Python stack with sys._current_frames() and counts
+    identical stacks. Nothing is hooked into the profiled code, so the cost
+    is one stack walk per thread per sample. Output is the collapsed-stack
+    format read by flamegraph.pl and speedscope: one
+    "thread;outer;...;inner count" line per distinct stack.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL_SECS, max_seconds: float = PROFILER_MAX_SECS,
+                 max_depth: int = PROFILER_MAX_DEPTH) -> None:
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self._busy = threading.Lock()
+        self._last: Optional[Dict] = None
+        self._captures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._busy.locked()
+
+    def _sample(self, counts: Counter, names: Dict[int, str], own_ident: int, include_idle: bool) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            leaf = frame.f_code
+            if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+
+    def capture(self, seconds: float, interval: Optional[float] = None, include_idle: bool = False) -> Dict:
+        """Sample all threads for `seconds`; raises ProfilerBusy if a capture is already running."""
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy("A profile capture is already running")
+        try:
+            seconds = min(max(seconds, 0.0), self.max_seconds)
+            interval = max(interval or self.interval, 0.001)
+            counts: Counter = Counter()
+            own_ident = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            samples = 0
+            cpu_start = time.thread_time()
+            start = time.perf_counter()
+            deadline = start + seconds
+            next_at = start
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now < next_at:
+                    time.sleep(next_at - now)
+                    continue
+                if samples % 50 == 0:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample(counts, names, own_ident, include_idle)
+                samples += 1
+                next_at += interval
+            elapsed = time.perf_counter() - start
+            result = {
+                "seconds": round(elapsed, 3),
+                "interval": interval,
+                "samples": samples,
+                "stacks": len(counts),
+                # CPU time the sampler itself used, relative to the capture
+                "overhead": round((time.thread_time() - cpu_start) / elapsed, 4) if elapsed else 0.0,
+                "collapsed": "".join(f"{stack} {count}\n" for stack, count in counts.most_common()),
+            }
+            self._captures += 1
+            self._last = {k: v for k, v in result.items() if k != "collapsed"}
+            logger.info(f"Profile captured: {samples} samples, {len(counts)} distinct stacks in {elapsed:.1f}s")
+            return result
+        finally:
+            self._busy.release()
+
+    def snapshot(self) -> Dict:
+        return {"running": self.running, "captures": self._captures, "last": self._last,
+                "interval": self.interval, "max_seconds": self.max_seconds}
+
+# Global instance
+profiler = SamplingProfiler()
@@ -0,0 +1,193 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from services.deadlines import time_left
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size for each provider, per API key.
+# Override with e.g. RATE_LIMIT_MURF_RPS=2 RATE_LIMIT_MURF_BURST=4
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "murf": (5.0, 10),
+    "assemblyai": (5.0, 10),
+    "gemini": (4.0, 8),
+    "tavily": (5.0, 10),
+}
+# Longest a request may wait for a token before it is rejected; the turn budget can shorten it
+RATE_LIMIT_MAX_WAIT_SECS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECS", "2"))
+RATE_LIMIT_MAX_QUEUE = int(os.getenv("RATE_LIMIT_MAX_QUEUE", "50"))
+# Pause after a provider 429 without a Retry-After
+RATE_LIMIT_BACKOFF_SECS = float(os.getenv("RATE_LIMIT_BACKOFF_SECS", "2"))
+
+def provider_limits(provider: str) -> Tuple[float, int]:
+    rate, burst = DEFAULT_RATE_LIMITS.get(provider, (5.0, 10))
+    prefix = f"RATE_LIMIT_{provider.upper()}"
+    return float(os.getenv(f"{prefix}_RPS", rate)), int(os.getenv(f"{prefix}_BURST", burst))
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short, non-reversible label for an API key, safe to log and expose."""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a request would wait longer than allowed for a rate-limit token."""
+
+
+class TokenBucket:
+    """Token bucket whose waiters are served in arrival order.
+
+    A request takes a token if one is left. Otherwise it reserves the next
+    token to be refilled and sleeps until then. Reservations are handed out
+    under a lock, so waiters form a FIFO queue whether they are threads or
+    coroutines. A request that would wait longer than max_wait, or find
+    max_queue requests already waiting, is rejected at once and reserves
+    nothing.
+    """
+
+    def __init__(self, rate: float, burst: int, max_queue: int = RATE_LIMIT_MAX_QUEUE,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._counts = {"granted": 0, "waited": 0, "rejected": 0, "throttled": 0}
+        self._waiting = 0
+        self._wait_total = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: float) -> float:
+        """Take or reserve a token; returns how long to wait for it, or raises RateLimitExceeded."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = max(0.0, self._paused_until - now, (1 - self._tokens) / self.rate)
+            if wait > 0 and (wait > max_wait or self._waiting >= self.max_queue):
+                self._counts["rejected"] += 1
+                raise RateLimitExceeded(f"rate limited: next slot in {wait:.2f}s")
+            self._tokens -= 1
+            self._counts["granted"] += 1
+            if wait > 0:
+                self._counts["waited"] += 1
+                self._waiting += 1
+                self._wait_total += wait
+            return wait
+
+    def _done_waiting(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def cancel(self) -> None:
+        """Give back a token reserved by a request that gave up waiting."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self, max_wait: float = RATE_LIMIT_MAX_WAIT_SECS) -> float:
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting()
+        return wait
+
+    async def acquire_async(self, max_wait: float = RATE_LIMIT_MAX_WAIT_SECS) -> float:
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.cancel()
+                raise
+            finally:
+                self._done_waiting()
+        return wait
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """The provider answered 429: hold every request until retry_after has passed."""
+        with self._lock:
+            pause = retry_after if retry_after is not None else RATE_LIMIT_BACKOFF_SECS
+            self._paused_until = max(self._paused_until, self._clock() + pause)
+            self._counts["throttled"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._refill(self._clock())
+            waited = self._counts["waited"]
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "tokens": round(max(0.0, self._tokens), 2),
+                "waiting": self._waiting,
+                "avg_wait_ms": round(self._wait_total / waited * 1000, 1) if waited else 0.0,
+                **self._counts,
+            }
+
+
+class RateLimiterRegistry:
+    """One token bucket per (provider, API key), created on first use."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider: str, api_key: Optional[str] = None) -> TokenBucket:
+        key = (provider, key_fingerprint(api_key))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate, burst = provider_limits(provider)
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+            return bucket
+
+    def acquire(self, provider: str, api_key: Optional[str] = None) -> float:
+        """Wait for a token (blocking), at most RATE_LIMIT_MAX_WAIT_SECS or the turn's remaining budget.
+
+        Sleeps the calling thread, so never call it on the event loop; use acquire_async there.
+        """
+        wait = self.bucket(provider, api_key).acquire(time_left(RATE_LIMIT_MAX_WAIT_SECS))
+        if wait > 0:
+            logger.info(f"Rate limiter held {provider} request for {wait * 1000:.0f}ms")
+        return wait
+
+    async def acquire_async(self, provider: str, api_key: Optional[str] = None) -> float:
+        wait = await self.bucket(provider, api_key).acquire_async(time_left(RATE_LIMIT_MAX_WAIT_SECS))
+        if wait > 0:
+            logger.info(f"Rate limiter held {provider} request for {wait * 1000:.0f}ms")
+        return wait
+
+    def throttle(self, provider: str, api_key: Optional[str] = None,
+                 retry_after: Optional[float] = None) -> None:
+        logger.warning(f"{provider} returned 429; pausing its requests")
+        self.bucket(provider, api_key).throttle(retry_after)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = dict(self._buckets)
+        snapshot: Dict[str, Dict] = {}
+        for (provider, key), bucket in sorted(buckets.items()):
+            snapshot.setdefault(provider, {})[key] = bucket.snapshot()
+        return snapshot
+
+def retry_after_secs(headers) -> Optional[float]:
+    """Seconds from a Retry-After header, if it holds a number."""
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+# Global instance
+rate_limiters = RateLimiterRegistry()
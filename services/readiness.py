@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from services.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, circuit_breakers
+from services.key_pool import APIKeyPoolRegistry, key_pools
+from services.llm_providers import LLM_PROVIDER
+from services.loop_monitor import loop_monitor
+from services.stt_streaming import ASSEMBLYAI_STREAMING_URL
+from services.tts import MURF_TTS_ENDPOINT
+from services.web_search_async import TAVILY_API_URL
+
+logger = logging.getLogger(__name__)
+
+# How often provider reachability is re-checked in the background
+READY_REFRESH_SECS = float(os.getenv("READY_REFRESH_SECS", "15"))
+READY_PROBE_TIMEOUT_SECS = float(os.getenv("READY_PROBE_TIMEOUT_SECS", "3"))
+# A provider check older than this many refresh intervals counts as unknown
+READY_STALE_AFTER_REFRESHES = 3
+# Providers that must be up for the worker to be ready; the rest only mark it degraded
+READY_REQUIRED_PROVIDERS = [p.strip() for p in os.getenv(
+    "READY_REQUIRED_PROVIDERS", f"murf,assemblyai,{LLM_PROVIDER}").split(",") if p.strip()]
+READY_MAX_LOOP_LAG_SECS = float(os.getenv("READY_MAX_LOOP_LAG_SECS", "1.0"))
+READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", "64"))
+GEMINI_PROBE_URL = os.getenv("GEMINI_PROBE_URL", "https://generativelanguage.googleapis.com")
+
+# Where each provider is reached; a TCP connect to the host is the reachability check
+PROBE_URLS = {
+    "murf": MURF_TTS_ENDPOINT,
+    "assemblyai": ASSEMBLYAI_STREAMING_URL,
+    "tavily": TAVILY_API_URL,
+}
+if LLM_PROVIDER == "gemini":
+    PROBE_URLS["gemini"] = GEMINI_PROBE_URL
+
+_DEFAULT_PORTS = {"https": 443, "wss": 443, "http": 80, "ws": 80}
+
+
+def _host_port(url: str) -> Tuple[str, int]:
+    parts = urlsplit(url)
+    return parts.hostname or "", parts.port or _DEFAULT_PORTS.get(parts.scheme, 443)
+
+def executor_backlog() -> int:
+    """Calls waiting for a worker in the loop's default executor (asyncio.to_thread)."""
+    try:
+        executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    except RuntimeError:
+        return 0
+    work_queue = getattr(executor, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else 0
+
+async def tcp_probe(host: str, port: int, timeout: float) -> None:
+    """Resolve and connect to host:port, then hang up; no request is sent, so no quota is used."""
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+class ReadinessCache:
+    """Readiness verdict served from a cache that a background task refreshes.
+
+    Provider reachability is checked every `refresh_secs` by one task, so
+    /readyz never calls a provider and costs the same however often it is
+    polled. Breaker state, loop lag and queue depths are read live because
+    each is a constant-time lookup.
+    """
+
+    def __init__(self,
+                 probe_urls: Dict[str, str] = PROBE_URLS,
+                 required=READY_REQUIRED_PROVIDERS,
+                 refresh_secs: float = READY_REFRESH_SECS,
+                 probe_timeout: float = READY_PROBE_TIMEOUT_SECS,
+                 max_loop_lag: float = READY_MAX_LOOP_LAG_SECS,
+                 breakers: CircuitBreakerRegistry = circuit_breakers,
+                 keys: APIKeyPoolRegistry = key_pools,
+                 loop_lag: Callable[[], float] = loop_monitor.current_lag,
+                 probe: Callable = tcp_probe,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.required = list(required)
+        self.providers = list(dict.fromkeys(self.required + list(probe_urls)))
+        self.probe_urls = dict(probe_urls)
+        self.refresh_secs = refresh_secs
+        self.probe_timeout = probe_timeout
+        self.max_loop_lag = max_loop_lag
+        self._breakers = breakers
+        self._keys = keys
+        self._loop_lag = loop_lag
+        self._probe = probe
+        self._clock = clock
+        self._reachability: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None
+        self._queues: Dict[str, Tuple[Callable[[], int], Optional[int]]] = {}
+        self.refreshes = 0
+
+    def register_queue(self, name: str, depth: Callable[[], int], limit: Optional[int] = None) -> None:
+        """Report a queue's depth; above limit (if given) the worker is not ready."""
+        self._queues[name] = (depth, limit)
+
+    async def _check(self, provider: str) -> Dict[str, Any]:
+        url = self.probe_urls.get(provider)
+        if not url:
+            return {"reachable": None}
+        host, port = _host_port(url)
+        started = time.perf_counter()
+        try:
+            await self._probe(host, port, self.probe_timeout)
+            return {"reachable": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except Exception as e:
+            return {"reachable": False, "error": f"{type(e).__name__}: {e}" if str(e) else type(e).__name__}
+
+    async def refresh_once(self) -> None:
+        results = await asyncio.gather(*(self._check(p) for p in self.providers))
+        previous, self._reachability = self._reachability, dict(zip(self.providers, results))
+        self._checked_at = self._clock()
+        self.refreshes += 1
+        for provider, result in self._reachability.items():
+            was = previous.get(provider, {}).get("reachable")
+            if result["reachable"] is False and was is not False:
+                logger.warning(f"Readiness: {provider} unreachable ({result['error']})")
+            elif result["reachable"] and was is False:
+                logger.info(f"Readiness: {provider} reachable again")
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Readiness refresh failed: {e}")
+            await asyncio.sleep(self.refresh_secs)
+
+    def _provider_status(self, provider: str, stale: bool) -> Dict[str, Any]:
+        status: Dict[str, Any] = dict(self._reachability.get(provider, {"reachable": None}))
+        if stale:
+            status["reachable"] = None
+        status["breaker"] = self._breakers.get(provider).state
+        status["configured"] = self._keys.get(provider).configured() if provider in self.probe_urls else True
+        problems = []
+        if not status["configured"]:
+            problems.append("no API key")
+        if status["reachable"] is False:
+            problems.append("unreachable")
+        if status["breaker"] == CircuitBreaker.OPEN:
+            problems.append("circuit open")
+        status["up"] = not problems
+        if problems:
+            status["problems"] = problems
+        return status
+
+    def status(self) -> Dict[str, Any]:
+        """The readiness verdict from cached checks; never blocks or calls out."""
+        checked_ago = None if self._checked_at is None else self._clock() - self._checked_at
+        stale = checked_ago is None or checked_ago > self.refresh_secs * READY_STALE_AFTER_REFRESHES
+        providers = {p: self._provider_status(p, stale) for p in self.providers}
+        lag = self._loop_lag()
+        queues = {}
+        for name, (depth, limit) in self._queues.items():
+            queues[name] = {"depth": depth(), **({"limit": limit} if limit is not None else {})}
+
+        reasons = []
+        if self._checked_at is None:
+            reasons.append("provider checks have not run yet")
+        elif stale:
+            reasons.append(f"provider checks are stale ({checked_ago:.0f}s old)")
+        reasons += [f"{p}: {', '.join(providers[p]['problems'])}" for p in self.required
+                    if p in providers and not providers[p]["up"]]
+        if lag > self.max_loop_lag:
+            reasons.append(f"event loop lag {lag * 1000:.0f}ms")
+        reasons += [f"{name} queue depth {q['depth']}" for name, q in queues.items()
+                    if "limit" in q and q["depth"] > q["limit"]]
+        # An optional provider without keys is switched off rather than degraded
+        degraded = [p for p in self.providers
+                    if p not in self.required and providers[p]["configured"] and not providers[p]["up"]]
+        return {
+            "status": "not_ready" if reasons else "degraded" if degraded else "ready",
+            "reasons": reasons,
+            "degraded": degraded,
+            "checked_secs_ago": None if checked_ago is None else round(checked_ago, 1),
+            "providers": providers,
+            "event_loop_lag_ms": round(lag * 1000, 1),
+            "queues": queues,
+        }
+
+# Global instance
+readiness = ReadinessCache()
@@ -0,0 +1,325 @@
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+RECORDINGS_ENABLED = _env_flag("RECORDINGS_ENABLED", "true")
+RECORDING_DIRECTORY = os.getenv("RECORDING_DIRECTORY", "uploads")
+RECORDING_SESSION_QUOTA_BYTES = int(os.getenv("RECORDING_SESSION_QUOTA_BYTES", str(50 * 1024 * 1024)))
+RECORDING_GLOBAL_QUOTA_BYTES = int(os.getenv("RECORDING_GLOBAL_QUOTA_BYTES", str(500 * 1024 * 1024)))
+RECORDING_RETENTION_SECS = int(os.getenv("RECORDING_RETENTION_SECS", str(24 * 60 * 60)))
+RECORDING_COMPRESS = _env_flag("RECORDING_COMPRESS", "false")
+RECORDING_CLEANUP_INTERVAL_SECS = int(os.getenv("RECORDING_CLEANUP_INTERVAL_SECS", "300"))
+
+INDEX_FILENAME = ".recordings_index.json"
+SESSION_DIR_PREFIX = "session_"
+_SESSION_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _safe_session_id(session_id: str) -> str:
+    """The session id as stored in the index and used in directory names."""
+    return _SESSION_ID_RE.sub("_", session_id) or "session"
+
+
+class RecordingStore:
+    """Quota- and retention-managed store for recorded session audio.
+
+    Every recording is tracked in an index file kept next to the recordings,
+    so quota checks and cleanup never need to walk the directory tree. The
+    tree is only scanned once, to bootstrap the index when it does not exist.
+    """
+
+    def __init__(self,
+                 root: str = RECORDING_DIRECTORY,
+                 enabled: bool = RECORDINGS_ENABLED,
+                 session_quota_bytes: int = RECORDING_SESSION_QUOTA_BYTES,
+                 global_quota_bytes: int = RECORDING_GLOBAL_QUOTA_BYTES,
+                 retention_secs: int = RECORDING_RETENTION_SECS,
+                 compress: bool = RECORDING_COMPRESS) -> None:
+        self.root = root
+        self.enabled = enabled
+        self.session_quota_bytes = session_quota_bytes
+        self.global_quota_bytes = global_quota_bytes
+        self.retention_secs = retention_secs
+        self.compress = compress
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._session_bytes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # Index bookkeeping -------------------------------------------------
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, INDEX_FILENAME)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load the index on first use, bootstrapping it from disk if needed."""
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[str, Dict] = {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fh:
+                entries = self._adopt_unfinished(json.load(fh).get("recordings", {}))
+        except FileNotFoundError:
+            entries = self._scan_tree()
+        except Exception as e:
+            logger.warning(f"Recording index unreadable, rebuilding: {e}")
+            entries = self._scan_tree()
+        self._entries = entries
+        self._recount()
+        self._save()
+        return entries
+
+    def _adopt_unfinished(self, entries: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Recordings left unfinished by a previous process (crash, dropped socket) will never be
+        finished now: take their real size from disk and let retention and quotas apply to them."""
+        for rel, entry in list(entries.items()):
+            if entry.get("finished"):
+                continue
+            try:
+                entry["size"] = os.path.getsize(os.path.join(self.root, rel))
+            except OSError:
+                del entries[rel]
+                continue
+            entry["finished"] = True
+        return entries
+
+    def _scan_tree(self) -> Dict[str, Dict]:
+        entries: Dict[str, Dict] = {}
+        if not os.path.isdir(self.root):
+            return entries
+        for session_dir in os.scandir(self.root):
+            if not session_dir.is_dir():
+                continue
+            session_id = session_dir.name
+            if session_id.startswith(SESSION_DIR_PREFIX):
+                session_id = session_id[len(SESSION_DIR_PREFIX):]
+            for item in os.scandir(session_dir.path):
+                if not item.is_file():
+                    continue
+                stat = item.stat()
+                rel = os.path.relpath(item.path, self.root)
+                entries[rel] = {
+                    "session_id": session_id,
+                    "size": stat.st_size,
+                    "created": stat.st_mtime,
+                    "finished": True,
+                    "compressed": item.name.endswith(".gz"),
+                }
+        logger.info(f"Bootstrapped recording index with {len(entries)} files")
+        return entries
+
+    def _recount(self) -> None:
+        self._session_bytes = {}
+        self._total_bytes = 0
+        for entry in self._entries.values():
+            sid = entry["session_id"]
+            self._session_bytes[sid] = self._session_bytes.get(sid, 0) + entry["size"]
+            self._total_bytes += entry["size"]
+
+    def _save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"recordings": self._entries}, fh)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_entry(self, rel: str) -> int:
+        entry = self._entries.pop(rel, None)
+        if entry is None:
+            return 0
+        sid = entry["session_id"]
+        self._session_bytes[sid] = self._session_bytes.get(sid, 0) - entry["size"]
+        if self._session_bytes[sid] <= 0:
+            self._session_bytes.pop(sid, None)
+        self._total_bytes -= entry["size"]
+        try:
+            os.remove(os.path.join(self.root, rel))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to remove recording {rel}: {e}")
+        return entry["size"]
+
+    # Recording lifecycle -----------------------------------------------
+
+    def start_recording(self, session_id: str, suffix: str = ".bin") -> Optional[str]:
+        """Register a new recording for a session and return its file path.
+
+        Returns None when recording is disabled or the session is already
+        over its quota.
+        """
+        if not self.enabled:
+            return None
+        safe_id = _safe_session_id(session_id)
+        with self._lock:
+            self._load()
+            if self._session_bytes.get(safe_id, 0) >= self.session_quota_bytes:
+                logger.warning(f"Session {safe_id} is over its recording quota; not recording")
+                return None
+            session_dir = os.path.join(self.root, f"{SESSION_DIR_PREFIX}{safe_id}")
+            os.makedirs(session_dir, exist_ok=True)
+            path = os.path.join(session_dir, f"streaming_audio_{int(time.time())}{suffix}")
+            rel = os.path.relpath(path, self.root)
+            if rel in self._entries:
+                path = os.path.join(session_dir, f"streaming_audio_{int(time.time() * 1000)}{suffix}")
+                rel = os.path.relpath(path, self.root)
+            self._entries[rel] = {
+                "session_id": safe_id,
+                "size": 0,
+                "created": time.time(),
+                "finished": False,
+                "compressed": False,
+            }
+            # Saved now so a crash mid-recording leaves an entry for _adopt_unfinished, not a stray file
+            self._save()
+        return path
+
+    def reserve(self, path: str, nbytes: int) -> bool:
+        """Account for nbytes about to be written to path.
+
+        Returns False if the write would exceed the session or global quota,
+        in which case the caller should drop the data.
+        """
+        rel = os.path.relpath(path, self.root)
+        with self._lock:
+            entry = self._load().get(rel)
+            if entry is None:
+                return False
+            sid = entry["session_id"]
+            if self._session_bytes.get(sid, 0) + nbytes > self.session_quota_bytes:
+                return False
+            if self._total_bytes + nbytes > self.global_quota_bytes:
+                self._schedule(self.cleanup)
+                return False
+            entry["size"] += nbytes
+            self._session_bytes[sid] = self._session_bytes.get(sid, 0) + nbytes
+            self._total_bytes += nbytes
+        return True
+
+    def finish_recording(self, path: str) -> None:
+        """Mark a recording as complete and optionally compress it in the background."""
+        rel = os.path.relpath(path, self.root)
+        with self._lock:
+            entry = self._load().get(rel)
+            if entry is None:
+                return
+            entry["finished"] = True
+            self._save()
+        if self.compress and not entry["compressed"]:
+            self._schedule(self._compress, rel)
+
+    def _schedule(self, fn, *args) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording-store")
+        self._executor.submit(fn, *args)
+
+    def _compress(self, rel: str) -> None:
+        src = os.path.join(self.root, rel)
+        dst = src + ".gz"
+        try:
+            with open(src, "rb") as fin, gzip.open(dst, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout)
+            compressed_size = os.path.getsize(dst)
+        except Exception as e:
+            logger.warning(f"Failed to compress recording {rel}: {e}")
+            return
+        with self._lock:
+            entry = self._entries.pop(rel, None)
+            if entry is None:
+                # Removed while compressing
+                os.remove(dst)
+                return
+            delta = compressed_size - entry["size"]
+            entry["size"] = compressed_size
+            entry["compressed"] = True
+            self._entries[rel + ".gz"] = entry
+            self._session_bytes[entry["session_id"]] += delta
+            self._total_bytes += delta
+            self._save()
+        os.remove(src)
+        logger.info(f"Compressed recording {rel} ({compressed_size} bytes)")
+
+    # Maintenance -------------------------------------------------------
+
+    def cleanup(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop expired recordings, then the oldest finished ones until under quota."""
+        now = time.time() if now is None else now
+        removed_files = 0
+        removed_bytes = 0
+        with self._lock:
+            entries = self._load()
+            finished = sorted(
+                (rel for rel, e in entries.items() if e["finished"]),
+                key=lambda rel: entries[rel]["created"],
+            )
+            for rel in finished:
+                expired = now - entries[rel]["created"] > self.retention_secs
+                if not expired and self._total_bytes <= self.global_quota_bytes:
+                    break
+                removed_bytes += self._remove_entry(rel)
+                removed_files += 1
+            if removed_files:
+                self._save()
+        if removed_files:
+            logger.info(f"Recording cleanup removed {removed_files} files ({removed_bytes} bytes)")
+        return {"removed_files": removed_files, "removed_bytes": removed_bytes}
+
+    def delete_session(self, session_id: str) -> int:
+        """Remove every recording for a session, returning the bytes freed."""
+        freed = 0
+        safe_id = _safe_session_id(session_id)
+        with self._lock:
+            entries = self._load()
+            for rel in [r for r, e in entries.items() if e["session_id"] == safe_id]:
+                freed += self._remove_entry(rel)
+            self._save()
+        return freed
+
+    def list_session(self, session_id: str) -> List[Dict]:
+        """List recordings for a session from the index."""
+        safe_id = _safe_session_id(session_id)
+        with self._lock:
+            entries = self._load()
+            files = [
+                {
+                    "filename": os.path.basename(rel),
+                    "size_bytes": e["size"],
+                    "size_mb": round(e["size"] / (1024 * 1024), 2),
+                    "created": e["created"],
+                    "finished": e["finished"],
+                    "compressed": e["compressed"],
+                }
+                for rel, e in entries.items() if e["session_id"] == safe_id
+            ]
+        return sorted(files, key=lambda f: f["created"])
+
+    def usage(self) -> Dict:
+        """Current byte usage and limits."""
+        with self._lock:
+            self._load()
+            return {
+                "enabled": self.enabled,
+                "total_bytes": self._total_bytes,
+                "global_quota_bytes": self.global_quota_bytes,
+                "session_quota_bytes": self.session_quota_bytes,
+                "retention_secs": self.retention_secs,
+                "sessions": len(self._session_bytes),
+                "files": len(self._entries),
+            }
+
+# Global instance
+recording_store = RecordingStore()
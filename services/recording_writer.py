@@ -0,0 +1,178 @@
+import os
+import time
+import queue
+import logging
+import threading
+from typing import List, Optional
+
+from services.recording_store import RecordingStore, recording_store
+
+logger = logging.getLogger(__name__)
+
+# Chunks are batched in memory until this many bytes are buffered
+RECORDING_BUFFER_BYTES = int(os.getenv("RECORDING_BUFFER_BYTES", str(256 * 1024)))
+# Upper bound on bytes handed to the flush thread but not yet on disk;
+# beyond this, new chunks are dropped instead of growing memory
+RECORDING_MAX_PENDING_BYTES = int(os.getenv("RECORDING_MAX_PENDING_BYTES", str(8 * 1024 * 1024)))
+# Buffered data older than this is flushed even if the buffer is not full
+RECORDING_FLUSH_INTERVAL_SECS = float(os.getenv("RECORDING_FLUSH_INTERVAL_SECS", "2.0"))
+
+_CLOSE = object()
+
+
+class _FlushWorker:
+    """Single background thread that performs all recording disk I/O.
+
+    One thread keeps per-file write order without any extra locking and
+    keeps disk latency off the event loop entirely.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self.pending_bytes = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+            self._thread.start()
+
+    def try_submit(self, writer: "BufferedRecordingWriter", chunks: List[bytes], nbytes: int,
+                   max_pending_bytes: int) -> bool:
+        with self._pending_lock:
+            if self.pending_bytes + nbytes > max_pending_bytes:
+                return False
+            self.pending_bytes += nbytes
+        self._ensure_started()
+        self._queue.put((writer, chunks, nbytes))
+        return True
+
+    def submit_close(self, writer: "BufferedRecordingWriter") -> None:
+        self._ensure_started()
+        self._queue.put((writer, _CLOSE, 0))
+
+    def _run(self) -> None:
+        while True:
+            writer, chunks, nbytes = self._queue.get()
+            try:
+                if chunks is _CLOSE:
+                    writer._finish()
+                else:
+                    writer._write_to_disk(chunks, nbytes)
+            except Exception as e:
+                logger.error(f"Recording writer error for {writer.path}: {e}")
+            finally:
+                if nbytes:
+                    with self._pending_lock:
+                        self.pending_bytes -= nbytes
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Block until everything queued so far is on disk (used by tests and shutdown)."""
+        self._queue.join()
+
+_worker = _FlushWorker()
+
+
+class BufferedRecordingWriter:
+    """Batches streaming audio chunks in memory and writes them off the event loop.
+
+    write() never touches the disk: it only appends to an in-memory buffer and,
+    once the buffer is full, hands it to the flush thread. If the flush thread
+    falls behind by more than max_pending_bytes, chunks are dropped rather than
+    delaying the caller.
+    """
+
+    def __init__(self,
+                 path: str,
+                 store: RecordingStore = recording_store,
+                 buffer_bytes: int = RECORDING_BUFFER_BYTES,
+                 max_pending_bytes: int = RECORDING_MAX_PENDING_BYTES,
+                 flush_interval_secs: float = RECORDING_FLUSH_INTERVAL_SECS) -> None:
+        self.path = path
+        self.store = store
+        self.buffer_bytes = buffer_bytes
+        self.max_pending_bytes = max_pending_bytes
+        self.flush_interval_secs = flush_interval_secs
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.flushes = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._quota_logged = False
+        self.finished = threading.Event()
+
+    def write(self, chunk: bytes) -> None:
+        """Buffer a chunk; never blocks on disk."""
+        if self._closed or not chunk:
+            return
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if (self._buffered >= self.buffer_bytes
+                or time.monotonic() - self._last_flush >= self.flush_interval_secs):
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the current buffer to the flush thread."""
+        if not self._buffer:
+            return
+        chunks, nbytes = self._buffer, self._buffered
+        self._buffer, self._buffered = [], 0
+        self._last_flush = time.monotonic()
+        if not _worker.try_submit(self, chunks, nbytes, self.max_pending_bytes):
+            self.bytes_dropped += nbytes
+            logger.warning(f"Recording writer backlog full, dropped {nbytes} bytes for {self.path}")
+
+    def close(self) -> None:
+        """Flush what is left and finish the recording in the background."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        _worker.submit_close(self)
+
+    # Flush-thread side ---------------------------------------------------
+
+    def _write_to_disk(self, chunks: List[bytes], nbytes: int) -> None:
+        if not self.store.reserve(self.path, nbytes):
+            self.bytes_dropped += nbytes
+            if not self._quota_logged:
+                logger.warning(f"Recording quota reached, dropping further audio for {self.path}")
+                self._quota_logged = True
+            return
+        with open(self.path, "ab") as fh:
+            fh.write(b"".join(chunks))
+        self.bytes_written += nbytes
+        self.flushes += 1
+
+    def _finish(self) -> None:
+        self.store.finish_recording(self.path)
+        self.finished.set()
+        logger.info(f"Finished streaming audio recording: {self.path} "
+                    f"({self.bytes_written} bytes written, {self.bytes_dropped} dropped)")
+
+
+def open_recording(session_id: str, suffix: str = ".bin",
+                   store: RecordingStore = recording_store) -> Optional[BufferedRecordingWriter]:
+    """Start a recording for a session, or return None if recording is disabled or over quota."""
+    path = store.start_recording(session_id, suffix)
+    if not path:
+        return None
+    logger.info(f"Started streaming audio recording: {path}")
+    return BufferedRecordingWriter(path, store=store)
+
+def wait_for_pending_writes() -> None:
+    """Block until all queued recording data has been written."""
+    _worker.join()
+
+def pending_write_bytes() -> int:
+    """Recording bytes handed to the flush thread but not yet written."""
+    return _worker.pending_bytes
@@ -0,0 +1,121 @@
+import os
+import re
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Approximate token budget for one tool result fed back to the model
+SEARCH_RESULT_TOKEN_BUDGET = int(os.getenv("SEARCH_RESULT_TOKEN_BUDGET", "250"))
+SEARCH_SENTENCES_PER_RESULT = int(os.getenv("SEARCH_SENTENCES_PER_RESULT", "2"))
+# Snippets at least this similar are treated as the same story
+SEARCH_DEDUPE_SIMILARITY = float(os.getenv("SEARCH_DEDUPE_SIMILARITY", "0.8"))
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "with", "about", "is", "are",
+    "was", "were", "be", "it", "its", "this", "that", "what", "whats", "what's", "how", "latest",
+    "news", "current", "today", "me", "my", "tell", "get", "from", "by", "as",
+})
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(" ".join((text or "").split())) if s.strip()]
+
+def query_terms(query: str) -> set:
+    return {w for w in _WORD_RE.findall(query.lower()) if w not in STOPWORDS}
+
+def _similar(a: str, b: str, threshold: float) -> bool:
+    a, b = " ".join(_WORD_RE.findall(a.lower())), " ".join(_WORD_RE.findall(b.lower()))
+    if not a or not b:
+        return False
+    if a == b:
+        return True
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return matcher.real_quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+def dedupe_results(results: List[Dict], threshold: float = SEARCH_DEDUPE_SIMILARITY) -> List[Dict]:
+    """Drop results whose snippet nearly repeats a higher-scored one."""
+    kept: List[Dict] = []
+    for result in sorted(results, key=lambda r: r.get("score", 0), reverse=True):
+        content = result.get("content", "")
+        if not any(_similar(content, other.get("content", ""), threshold) for other in kept):
+            kept.append(result)
+    return kept
+
+def relevant_sentences(content: str, terms: set, limit: int = SEARCH_SENTENCES_PER_RESULT) -> List[str]:
+    """The sentences sharing the most words with the query, in their original order."""
+    sentences = split_sentences(content)
+    if len(sentences) <= limit:
+        return sentences
+    ranked = sorted(range(len(sentences)),
+                    key=lambda i: (-len(terms & set(_WORD_RE.findall(sentences[i].lower()))), i))
+    return [sentences[i] for i in sorted(ranked[:limit])]
+
+
+class CompactionStats:
+    """Token counts before and after compaction, across all tool calls."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.raw_tokens = 0
+        self.compact_tokens = 0
+
+    def record(self, raw: int, compact: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.raw_tokens += raw
+            self.compact_tokens += compact
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "raw_tokens": self.raw_tokens,
+                "compact_tokens": self.compact_tokens,
+                "avg_compact_tokens": round(self.compact_tokens / self.calls, 1) if self.calls else 0.0,
+                "saved_ratio": round(1 - self.compact_tokens / self.raw_tokens, 3) if self.raw_tokens else 0.0,
+            }
+
+compaction_stats = CompactionStats()
+
+
+def compact_results(results: List[Dict],
+                    query: str = "",
+                    heading: Optional[str] = None,
+                    token_budget: int = SEARCH_RESULT_TOKEN_BUDGET,
+                    sentences_per_result: int = SEARCH_SENTENCES_PER_RESULT,
+                    stats: CompactionStats = compaction_stats) -> str:
+    """Deduplicated, score-ranked, query-focused summary of search results within a token budget.
+
+    URLs and truncation markers are left out; they cost tokens and are not
+    spoken. The highest-scored result is always included, trimmed to the
+    budget if it has to be.
+    """
+    terms = query_terms(query)
+    lines = [heading] if heading else []
+    used = estimate_tokens(heading) if heading else 0
+    for result in dedupe_results(results):
+        summary = " ".join(relevant_sentences(result.get("content", ""), terms, sentences_per_result))
+        title = (result.get("title") or "").strip()
+        line = f"- {title}: {summary}" if title and summary else f"- {title or summary}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            if len(lines) == (1 if heading else 0):
+                lines.append(line[:max(0, (token_budget - used) * 4)].rstrip())
+            break
+        lines.append(line)
+        used += cost
+    text = "\n".join(lines)
+
+    raw = sum(estimate_tokens(f"{r.get('title', '')} {r.get('content', '')[:200]} {r.get('url', '')}") + 4
+              for r in results)
+    stats.record(raw, estimate_tokens(text))
+    logger.info(f"Compacted {len(results)} search results for '{query}': ~{raw} -> ~{estimate_tokens(text)} tokens")
+    return text
@@ -0,0 +1,207 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_TTL_SECS = float(os.getenv("SEARCH_CACHE_TTL_SECS", "600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+SEARCH_REFRESH_ENABLED = os.getenv("SEARCH_REFRESH_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+SEARCH_REFRESH_INTERVAL_SECS = float(os.getenv("SEARCH_REFRESH_INTERVAL_SECS", "60"))
+# Entries expiring within this window are refreshed ahead of time
+SEARCH_REFRESH_AHEAD_SECS = float(os.getenv("SEARCH_REFRESH_AHEAD_SECS", "120"))
+SEARCH_REFRESH_TOP_N = int(os.getenv("SEARCH_REFRESH_TOP_N", "10"))
+SEARCH_REFRESH_MIN_HITS = float(os.getenv("SEARCH_REFRESH_MIN_HITS", "2"))
+# Maximum Tavily calls the refresher may spend per hour
+SEARCH_REFRESH_BUDGET_PER_HOUR = int(os.getenv("SEARCH_REFRESH_BUDGET_PER_HOUR", "30"))
+SEARCH_POPULARITY_HALF_LIFE_SECS = float(os.getenv("SEARCH_POPULARITY_HALF_LIFE_SECS", "3600"))
+
+CacheKey = Tuple[str, str]
+
+
+def query_for(kind: str, arg: str) -> str:
+    """The Tavily query used for a cached news topic or weather location."""
+    if kind == "news":
+        return f"latest news about {arg}"
+    return f"current weather in {arg}"
+
+def _normalize(arg: str) -> str:
+    return " ".join((arg or "").lower().split())
+
+
+class SearchCache:
+    """TTL cache for news and weather searches that also tracks their popularity.
+
+    Popularity is a request count that halves every half-life, so the
+    refresher follows what users are asking for now. Entries remember how
+    many results were fetched and serve any request for that many or fewer.
+    """
+
+    def __init__(self,
+                 ttl: float = SEARCH_CACHE_TTL_SECS,
+                 max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 half_life: float = SEARCH_POPULARITY_HALF_LIFE_SECS) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.half_life = half_life
+        self._entries: Dict[CacheKey, Dict] = {}
+        self._popularity: Dict[CacheKey, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _score(self, key: CacheKey, now: float) -> float:
+        score, last = self._popularity.get(key, (0.0, now))
+        return score * 0.5 ** ((now - last) / self.half_life)
+
+    def _record_request(self, key: CacheKey, now: float) -> None:
+        self._popularity[key] = (self._score(key, now) + 1, now)
+        if len(self._popularity) > self.max_entries * 4:
+            # Forget the least popular half
+            ranked = sorted(self._popularity, key=lambda k: self._score(k, now))
+            for stale in ranked[:len(ranked) // 2]:
+                del self._popularity[stale]
+
+    def get(self, kind: str, arg: str, max_results: int, now: Optional[float] = None) -> Optional[List[Dict]]:
+        """Fresh cached results, or None; either way the request counts toward popularity."""
+        now = time.time() if now is None else now
+        key = (kind, _normalize(arg))
+        with self._lock:
+            self._record_request(key, now)
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > now and entry["max_results"] >= max_results:
+                self.hits += 1
+                return list(entry["results"][:max_results])
+            self.misses += 1
+            return None
+
+    def put(self, kind: str, arg: str, max_results: int, results: Optional[List[Dict]],
+            now: Optional[float] = None) -> None:
+        if not results:
+            return
+        now = time.time() if now is None else now
+        key = (kind, _normalize(arg))
+        with self._lock:
+            current = self._entries.get(key)
+            if current and current["expires_at"] > now and current["max_results"] > max_results:
+                max_results, results = current["max_results"], results + current["results"][len(results):]
+            self._entries[key] = {"results": list(results), "max_results": max_results,
+                                  "fetched_at": now, "expires_at": now + self.ttl}
+            if len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k]["expires_at"])
+                del self._entries[oldest]
+
+    def refresh_candidates(self, now: Optional[float] = None,
+                           top_n: int = SEARCH_REFRESH_TOP_N,
+                           ahead: float = SEARCH_REFRESH_AHEAD_SECS,
+                           min_hits: float = SEARCH_REFRESH_MIN_HITS) -> List[Tuple[str, str, int]]:
+        """Popular keys, most popular first, that are missing or expire within `ahead` seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ranked = sorted(((self._score(key, now), key) for key in self._popularity), reverse=True)
+            candidates = []
+            for score, key in ranked[:top_n]:
+                if score < min_hits:
+                    break
+                entry = self._entries.get(key)
+                if entry is None or entry["expires_at"] - now <= ahead:
+                    default_n = 5 if key[0] == "news" else 1
+                    candidates.append((key[0], key[1], entry["max_results"] if entry else default_n))
+            return candidates
+
+    def popular(self, now: Optional[float] = None, top_n: int = SEARCH_REFRESH_TOP_N) -> List[Dict]:
+        now = time.time() if now is None else now
+        with self._lock:
+            ranked = sorted(((self._score(key, now), key) for key in self._popularity), reverse=True)[:top_n]
+            return [{"kind": key[0], "query": key[1], "score": round(score, 2),
+                     "cached": key in self._entries and self._entries[key]["expires_at"] > now}
+                    for score, key in ranked]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+# Global instance
+search_cache = SearchCache()
+
+
+SearchFetch = Callable[[str, int], Awaitable[Optional[List[Dict]]]]
+
+
+class SearchRefresher:
+    """Re-fetches popular news and weather searches before they expire.
+
+    Runs every interval; spends at most budget_per_hour calls over any
+    rolling hour, most popular queries first.
+    """
+
+    def __init__(self,
+                 cache: SearchCache,
+                 fetch: SearchFetch,
+                 interval: float = SEARCH_REFRESH_INTERVAL_SECS,
+                 budget_per_hour: int = SEARCH_REFRESH_BUDGET_PER_HOUR) -> None:
+        self.cache = cache
+        self.fetch = fetch
+        self.interval = interval
+        self.budget_per_hour = budget_per_hour
+        self._calls = deque()
+        self.refreshes = 0
+        self.failures = 0
+        self.budget_skips = 0
+
+    def budget_left(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        while self._calls and self._calls[0] <= now - 3600:
+            self._calls.popleft()
+        return max(0, self.budget_per_hour - len(self._calls))
+
+    async def refresh_once(self, now: Optional[float] = None) -> int:
+        """Refresh due entries within the budget; returns the number of calls made."""
+        now = time.time() if now is None else now
+        candidates = self.cache.refresh_candidates(now)
+        calls = 0
+        for kind, arg, max_results in candidates:
+            if self.budget_left(now) <= 0:
+                self.budget_skips += len(candidates) - calls
+                logger.info(f"Search refresh budget spent; skipped {len(candidates) - calls} queries")
+                break
+            self._calls.append(now)
+            calls += 1
+            results = await self.fetch(query_for(kind, arg), max_results)
+            if results:
+                self.cache.put(kind, arg, max_results, results, now)
+                self.refreshes += 1
+            else:
+                self.failures += 1
+        if calls:
+            logger.info(f"Refreshed {calls} popular searches ({self.budget_left(now)} calls left this hour)")
+        return calls
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Search refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict:
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "budget_skips": self.budget_skips,
+            "budget_left": self.budget_left(),
+            "budget_per_hour": self.budget_per_hour,
+        }
@@ -0,0 +1,162 @@
+import os
+import re
+import asyncio
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "false").strip().lower() in ("1", "true", "yes", "on")
+# Minimum similarity between the speculated and final transcript to commit
+SPECULATION_MATCH_RATIO = float(os.getenv("SPECULATION_MATCH_RATIO", "0.9"))
+
+StreamFactory = Callable[[List[Dict], str], AsyncGenerator[str, None]]
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+def transcripts_match(speculated: str, final: str, min_ratio: float = SPECULATION_MATCH_RATIO) -> bool:
+    """True if the final transcript is the same utterance, ignoring case and punctuation."""
+    a, b = normalize_transcript(speculated), normalize_transcript(final)
+    if a == b:
+        return True
+    return bool(a and b) and SequenceMatcher(None, a, b).ratio() >= min_ratio
+
+
+class SpeculationStats:
+    """Process-wide counters for speculative generation."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_chunks = 0
+        self.wasted_tokens = 0
+        self.committed_tokens = 0
+
+    def record_attempt(self) -> None:
+        with self._lock:
+            self.attempts += 1
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_committed(self, tokens: int) -> None:
+        with self._lock:
+            self.committed_tokens += tokens
+
+    def record_miss(self, chunks: int, tokens: int) -> None:
+        with self._lock:
+            self.misses += 1
+            self.wasted_chunks += chunks
+            self.wasted_tokens += tokens
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            resolved = self.hits + self.misses
+            return {
+                "enabled": SPECULATIVE_LLM,
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / resolved, 3) if resolved else 0.0,
+                "wasted_chunks": self.wasted_chunks,
+                "wasted_tokens": self.wasted_tokens,
+                "committed_tokens": self.committed_tokens,
+            }
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculativeGeneration:
+    """Runs an LLM stream on a partial transcript ahead of the final one.
+
+    Output is buffered until the turn is resolved: commit() replays the buffer
+    and continues the live stream, cancel() drops it and counts the waste.
+    """
+
+    def __init__(self,
+                 stream_factory: StreamFactory,
+                 history: List[Dict],
+                 persona: str,
+                 text: str,
+                 stats: SpeculationStats = speculation_stats) -> None:
+        self.stream_factory = stream_factory
+        self.history = history
+        self.persona = persona
+        self.text = text
+        self.stats = stats
+        self._chunks: List[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._updated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._resolved = False
+
+    def start(self) -> "SpeculativeGeneration":
+        self.stats.record_attempt()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Speculating on partial transcript: '{self.text}'")
+        return self
+
+    async def _run(self) -> None:
+        try:
+            async for chunk in self.stream_factory(self.history, self.persona):
+                self._chunks.append(chunk)
+                self._updated.set()
+        except Exception as e:
+            # Kept for commit() to re-raise; a failed speculation never matches
+            self._error = e
+            logger.warning(f"Speculative generation failed for '{self.text}': {e}")
+        finally:
+            self._done = True
+            self._updated.set()
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def matches(self, final_text: str) -> bool:
+        """True if this speculation can answer the final transcript (never once it has failed)."""
+        return not self.failed and transcripts_match(self.text, final_text)
+
+    async def commit(self) -> AsyncGenerator[str, None]:
+        """Yield everything generated so far, then the rest as it arrives.
+
+        Raises the generation's error if it fails after being committed, so the
+        reply is never silently truncated.
+        """
+        if not self._resolved:
+            self._resolved = True
+            self.stats.record_hit()
+        sent = 0
+        while True:
+            while sent < len(self._chunks):
+                chunk = self._chunks[sent]
+                sent += 1
+                self.stats.record_committed(estimate_tokens(chunk))
+                yield chunk
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            self._updated.clear()
+            if sent < len(self._chunks):
+                continue
+            await self._updated.wait()
+
+    def cancel(self) -> None:
+        """Abandon the speculation, counting what it generated as waste."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        if not self._resolved:
+            self._resolved = True
+            self.stats.record_miss(len(self._chunks), sum(estimate_tokens(c) for c in self._chunks))
+            logger.info(f"Speculation discarded after {len(self._chunks)} chunks: '{self.text}'")
@@ -1,17 +1,45 @@
 import os
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import assemblyai as aai
 from dotenv import load_dotenv
 
+from services.circuit_breaker import circuit_breakers
+from services.deadlines import degrade, time_left
+from services.key_pool import key_pools, status_of
+from services.metrics import stt_latency
+from services.rate_limiter import RateLimitExceeded, rate_limiters
+
 # Load environment variables from .env
 load_dotenv()
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Set API key for AssemblyAI
+# Set API key for AssemblyAI; ASSEMBLYAI_API_KEYS takes a comma-separated list to spread load
 ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
+# Upper bound for one transcription, further capped by the turn budget
+STT_TIMEOUT_SECS = float(os.getenv("STT_TIMEOUT_SECS", "30"))
+# Point the SDK at another API host, e.g. the local mock used by the load test
+ASSEMBLYAI_BASE_URL = os.getenv("ASSEMBLYAI_BASE_URL") or None
+if ASSEMBLYAI_BASE_URL:
+    aai.settings.base_url = ASSEMBLYAI_BASE_URL
+
+stt_breaker = circuit_breakers.get("assemblyai")
+stt_keys = key_pools.get("assemblyai")
+# The SDK call has no overall timeout; a transcription that misses its deadline finishes here unobserved
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stt")
+
+def _release_upload(lease, temp_path) -> None:
+    """Return the key and delete the temp file once no upload is using them."""
+    lease.release()
+    if temp_path and os.path.exists(temp_path):
+        try:
+            os.remove(temp_path)
+            logger.debug(f"Temp file removed: {temp_path}")
+        except Exception as cleanup_err:
+            logger.warning(f"Failed to remove temp file {temp_path}: {cleanup_err}")
 
 def transcribe_audio(audio_bytes: bytes) -> str:
     """Transcribe raw audio bytes by writing to a temp file first.
@@ -22,14 +50,24 @@ def transcribe_audio(audio_bytes: bytes) -> str:
         return ""
     
     # Check if API key is configured
-    if not ASSEMBLYAI_API_KEY or ASSEMBLYAI_API_KEY == "your_assemblyai_api_key_here":
+    if not stt_keys.configured():
         logger.error("ASSEMBLYAI_API_KEY not configured or using placeholder")
         return "API key not configured. Please add your AssemblyAI API key to the .env file."
-    
+
+    if not stt_breaker.allow():
+        logger.warning("AssemblyAI circuit open - skipping transcription")
+        return "Transcription error: speech service is temporarily unavailable."
+
+    lease = stt_keys.lease()
+    if lease is None:
+        stt_breaker.release()
+        return "Transcription error: too many requests right now. Please try again in a moment."
+
+    temp_path = None
+    future = None
     try:
-        # Configure AssemblyAI
-        aai.settings.api_key = ASSEMBLYAI_API_KEY
-        transcriber = aai.Transcriber()
+        # A client per call, so concurrent transcriptions can use different keys
+        transcriber = aai.Transcriber(api_key=lease.key)
         
         # Save bytes to a temporary file; frontend records webm
         with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp:
@@ -39,7 +77,31 @@ def transcribe_audio(audio_bytes: bytes) -> str:
         logger.info(f"Audio saved to temp file: {temp_path}, size: {len(audio_bytes)} bytes")
         
         # Transcribe using file path (supported by AssemblyAI SDK)
-        transcript = transcriber.transcribe(temp_path)
+        rate_limiters.acquire("assemblyai", lease.key)
+        limit = time_left(STT_TIMEOUT_SECS)
+        if limit <= 0:
+            # The turn budget is already spent; don't start an upload nobody will wait for
+            stt_breaker.release()
+            degrade("stt", "no turn budget left")
+            return "Transcription error: the speech service took too long to respond."
+        try:
+            with stt_latency.time(mode="batch"):
+                future = _executor.submit(transcriber.transcribe, temp_path)
+                transcript = future.result(timeout=limit)
+        except FutureTimeoutError:
+            if limit < STT_TIMEOUT_SECS:
+                # Cut short by the turn budget, not the provider's fault
+                stt_breaker.release()
+            else:
+                stt_breaker.record_failure()
+            degrade("stt", f"timed out after {limit:.1f}s")
+            return "Transcription error: the speech service took too long to respond."
+        if getattr(transcript, 'error', None):
+            stt_breaker.record_failure()
+            lease.report(status_of(transcript.error))
+            logger.error(f"AssemblyAI transcription failed: {transcript.error}")
+            return f"Transcription error: {transcript.error}"
+        stt_breaker.record_success()
         
         if hasattr(transcript, 'text') and transcript.text:
             logger.info(f"Transcription successful: '{transcript.text[:100]}...'")
@@ -48,24 +110,31 @@ def transcribe_audio(audio_bytes: bytes) -> str:
             logger.warning("Transcription returned no text")
             return "Speech could not be understood. Please try speaking more clearly."
             
+    except RateLimitExceeded as e:
+        stt_breaker.release()
+        logger.warning(f"AssemblyAI request held back: {e}")
+        return "Transcription error: too many requests right now. Please try again in a moment."
     except aai.APIError as e:
+        stt_breaker.record_failure()
+        lease.report(status_of(e))
         if "401" in str(e):
             logger.error("AssemblyAI API key invalid or expired")
             return "API key error. Please check your AssemblyAI API key."
         elif "429" in str(e):
+            rate_limiters.throttle("assemblyai", lease.key)
             logger.error("AssemblyAI rate limit exceeded")
-            return "Rate limit exceeded. Please try again later."
+            # Phrased as an error so callers do not mistake it for a transcript
+            return "Transcription error: rate limit exceeded. Please try again later."
         else:
             logger.error(f"AssemblyAI API error: {e}")
             return f"Transcription error: {str(e)}"
     except Exception as e:
+        stt_breaker.record_failure()
         logger.error(f"Transcription error: {e}")
         return f"Transcription failed: {str(e)}"
     finally:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-                logger.debug(f"Temp file removed: {temp_path}")
-            except Exception as cleanup_err:
-                logger.warning(f"Failed to remove temp file {temp_path}: {cleanup_err}")
-                pass
+        if future is not None:
+            # An upload that missed its deadline still reads the file and holds the key until it ends
+            future.add_done_callback(lambda _: _release_upload(lease, temp_path))
+        else:
+            _release_upload(lease, temp_path)
@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+
+from services.circuit_breaker import circuit_breakers
+from services.key_pool import APIKeyPool, key_pools, status_of
+from services.metrics import stt_latency
+from services.rate_limiter import RateLimitExceeded, rate_limiters
+
+try:
+    import websockets
+except Exception:  # pragma: no cover
+    websockets = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ASSEMBLYAI_STREAMING_URL = os.getenv("ASSEMBLYAI_STREAMING_URL", "wss://streaming.assemblyai.com/v3/ws")
+STT_STREAMING_SAMPLE_RATE = int(os.getenv("STT_STREAMING_SAMPLE_RATE", "16000"))
+STT_STREAMING_ENCODING = os.getenv("STT_STREAMING_ENCODING", "pcm_s16le")
+
+# The realtime API only takes raw audio; compressed browser formats (webm/opus, ogg, mp4) are rejected
+SUPPORTED_ENCODINGS = ("pcm_s16le", "pcm_mulaw")
+# Leading bytes of the containers MediaRecorder produces
+CONTAINER_SIGNATURES = ((b"\x1a\x45\xdf\xa3", "webm"), (b"OggS", "ogg"), (b"RIFF", "wav"))
+
+
+def sniff_container(chunk: bytes) -> Optional[str]:
+    """Name of the container format `chunk` starts with, or None if it looks like raw audio."""
+    for signature, name in CONTAINER_SIGNATURES:
+        if chunk.startswith(signature):
+            return name
+    if chunk[4:8] == b"ftyp":
+        return "mp4"
+    return None
+
+
+@dataclass
+class AudioFormat:
+    """The raw audio format one /ws client streams.
+
+    `declared` is True only when the client named the encoding itself;
+    otherwise the server's STT_STREAMING_* settings are assumed.
+    """
+    encoding: str = STT_STREAMING_ENCODING
+    sample_rate: int = STT_STREAMING_SAMPLE_RATE
+    declared: bool = False
+
+    @classmethod
+    def negotiate(cls, encoding: Optional[str] = None, sample_rate: Optional[int] = None) -> "AudioFormat":
+        """Format from a client's query parameters; raises ValueError for one the realtime API can't take."""
+        if encoding is not None and encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding '{encoding}'; stream raw "
+                             f"{' or '.join(SUPPORTED_ENCODINGS)} audio")
+        if sample_rate is not None and not 8000 <= sample_rate <= 48000:
+            raise ValueError(f"Unsupported sample rate {sample_rate}; use 8000-48000 Hz")
+        return cls(encoding=encoding or STT_STREAMING_ENCODING,
+                   sample_rate=sample_rate or STT_STREAMING_SAMPLE_RATE,
+                   declared=encoding is not None)
+
+    @property
+    def is_pcm16(self) -> bool:
+        return self.encoding == "pcm_s16le"
+
+
+@dataclass
+class TranscriptEvent:
+    """A partial or final transcript for one turn of speech.
+
+    start_ms/end_ms are positions in the audio stream (from word timings);
+    received_at is the local monotonic clock when the event arrived.
+    """
+    text: str
+    is_final: bool
+    turn_order: int
+    start_ms: Optional[int]
+    end_ms: Optional[int]
+    received_at: float
+
+
+class StreamingTranscriber:
+    """Realtime AssemblyAI transcriber fed with audio chunks as they arrive.
+
+    Usage:
+        transcriber = StreamingTranscriber(on_transcript=handle_event)
+        await transcriber.connect()
+        await transcriber.send_audio(chunk)
+        ...
+        await transcriber.close()
+
+    Events can also be consumed with `async for event in transcriber.events()`
+    when no callback is given.
+    """
+
+    def __init__(self,
+                 on_transcript: Optional[Callable[[TranscriptEvent], Awaitable[None]]] = None,
+                 api_key: Optional[str] = None,
+                 url: str = ASSEMBLYAI_STREAMING_URL,
+                 sample_rate: int = STT_STREAMING_SAMPLE_RATE,
+                 encoding: str = STT_STREAMING_ENCODING,
+                 format_turns: bool = True) -> None:
+        self.on_transcript = on_transcript
+        # An explicit key replaces the shared ASSEMBLYAI_API_KEY(S) pool
+        self.keys = APIKeyPool("assemblyai", [api_key]) if api_key is not None else key_pools.get("assemblyai")
+        self._lease = None
+        self.url = url
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        self.format_turns = format_turns
+        self.session_id: Optional[str] = None
+        self._ws = None
+        self._receiver_task: Optional[asyncio.Task] = None
+        self._events: "asyncio.Queue[Optional[TranscriptEvent]]" = asyncio.Queue()
+        self._closed = False
+        self._enabled = True
+        # Monotonic time the first audio chunk was sent; audio positions are relative to it
+        self._audio_started_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    async def connect(self) -> None:
+        # Gracefully disable streaming if not configured
+        if not self.keys.configured():
+            logger.error("ASSEMBLYAI_API_KEY not configured - streaming STT disabled")
+            self._enabled = False
+            return
+        if websockets is None:
+            logger.error("'websockets' package not available - streaming STT disabled")
+            self._enabled = False
+            return
+        breaker = circuit_breakers.get("assemblyai")
+        if not breaker.allow():
+            logger.error("AssemblyAI circuit open - streaming STT disabled")
+            self._enabled = False
+            return
+        # The key is held for as long as the session stays open
+        self._lease = self.keys.lease()
+        if self._lease is None:
+            breaker.release()
+            logger.error("All AssemblyAI keys are drained - streaming STT disabled")
+            self._enabled = False
+            return
+
+        params = urlencode({
+            "sample_rate": self.sample_rate,
+            "encoding": self.encoding,
+            "format_turns": str(self.format_turns).lower(),
+        })
+        try:
+            await rate_limiters.acquire_async("assemblyai", self._lease.key)
+            self._ws = await websockets.connect(f"{self.url}?{params}",
+                                                extra_headers={"Authorization": self._lease.key},
+                                                max_size=None)
+        except (asyncio.CancelledError, RateLimitExceeded):
+            breaker.release()
+            self._lease.release()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            self._lease.report(status_of(e))
+            self._lease.release()
+            raise
+        breaker.record_success()
+        logger.info("Connected to AssemblyAI Realtime API")
+        self._receiver_task = asyncio.get_event_loop().create_task(self._receiver())
+
+    async def _receiver(self) -> None:
+        try:
+            async for msg in self._ws:
+                try:
+                    data = json.loads(msg)
+                except Exception:
+                    logger.debug("Non-JSON message from AssemblyAI streaming; ignoring")
+                    continue
+
+                msg_type = data.get("type")
+                if msg_type == "Begin":
+                    self.session_id = data.get("id")
+                    logger.info(f"AAI streaming session started: {self.session_id}")
+                elif msg_type == "Turn":
+                    event = self._to_event(data)
+                    if event is None:
+                        continue
+                    if event.is_final and event.end_ms is not None and self._audio_started_at is not None:
+                        # How far the final transcript trails the end of the speech it covers
+                        spoken_at = self._audio_started_at + event.end_ms / 1000
+                        stt_latency.observe(max(0.0, event.received_at - spoken_at), mode="streaming")
+                    label = "Final Turn" if event.is_final else "Partial"
+                    logger.info(f"[AAI {label}] {event.text}")
+                    await self._emit(event)
+                elif msg_type == "Termination":
+                    logger.info("AAI streaming session terminated")
+                    break
+                elif "error" in data:
+                    logger.error(f"AssemblyAI streaming error: {data.get('error')}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"AssemblyAI streaming receiver error: {e}")
+        finally:
+            self._events.put_nowait(None)
+
+    def _to_event(self, data: dict) -> Optional[TranscriptEvent]:
+        text = (data.get("transcript") or "").strip()
+        end_of_turn = bool(data.get("end_of_turn"))
+        # With format_turns the service sends the end of turn twice: raw, then
+        # formatted. Only the formatted one is treated as final.
+        if end_of_turn and self.format_turns and not data.get("turn_is_formatted"):
+            return None
+        if not text:
+            return None
+        words = data.get("words") or []
+        return TranscriptEvent(
+            text=text,
+            is_final=end_of_turn,
+            turn_order=int(data.get("turn_order", 0)),
+            start_ms=words[0].get("start") if words else None,
+            end_ms=words[-1].get("end") if words else None,
+            received_at=time.monotonic(),
+        )
+
+    async def _emit(self, event: TranscriptEvent) -> None:
+        if self.on_transcript is None:
+            self._events.put_nowait(event)
+            return
+        try:
+            await self.on_transcript(event)
+        except Exception as e:
+            logger.error(f"Transcript callback failed: {e}")
+
+    async def events(self) -> AsyncIterator[TranscriptEvent]:
+        """Yield transcript events until the session ends (callback-less mode)."""
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    async def send_audio(self, chunk: bytes) -> None:
+        if not self._enabled or not chunk:
+            return
+        if not self._ws:
+            raise RuntimeError("AssemblyAI streaming not connected")
+        if self._audio_started_at is None:
+            self._audio_started_at = time.monotonic()
+        try:
+            await self._ws.send(chunk)
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"AssemblyAI streaming connection closed: {e}")
+            self._enabled = False
+
+    async def force_endpoint(self) -> None:
+        """Ask the service to finalize the current turn immediately."""
+        if self._enabled and self._ws:
+            await self._ws.send(json.dumps({"type": "ForceEndpoint"}))
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._lease:
+            self._lease.release()
+        if not self._ws:
+            return
+        try:
+            await self._ws.send(json.dumps({"type": "Terminate"}))
+            if self._receiver_task:
+                await asyncio.wait_for(self._receiver_task, timeout=2.0)
+        except Exception:
+            pass
+        try:
+            if self._receiver_task and not self._receiver_task.done():
+                self._receiver_task.cancel()
+        except Exception:
+            pass
+        try:
+            await self._ws.close()
+            logger.info("Closed AssemblyAI streaming connection")
+        except Exception:
+            pass
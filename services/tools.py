@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.deadlines import time_left
+from services.metrics import tool_latency
+
+logger = logging.getLogger(__name__)
+
+TOOL_TIMEOUT_SECS = float(os.getenv("TOOL_TIMEOUT_SECS", "8"))
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "2"))
+
+# Per-tool overrides, e.g. TOOL_TIMEOUT_GET_WEATHER=4
+def tool_timeout(name: str) -> float:
+    return float(os.getenv(f"TOOL_TIMEOUT_{name.upper()}", TOOL_TIMEOUT_SECS))
+
+TOOL_CALL_PREFIX = "TOOL_CALL:"
+_TOOL_CALL_RE = re.compile(r"^\s*`*\s*TOOL_CALL:\s*(\{.*\})\s*`*\s*$", re.MULTILINE)
+
+ToolExecutor = Callable[[str, Dict[str, Any]], Any]
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+    def key(self) -> str:
+        return f"{self.name}:{json.dumps(self.arguments, sort_keys=True)}"
+
+
+@dataclass
+class ToolResult:
+    call: ToolCall
+    output: str
+    elapsed: float
+    timed_out: bool = False
+    failed: bool = False
+
+
+def build_tool_instructions(descriptions: Dict[str, str]) -> str:
+    """System-prompt section that tells the model how to request tools."""
+    lines = [
+        "You can use these tools to get current information:",
+        *[f"- {name}: {desc}" for name, desc in descriptions.items()],
+        "",
+        "To use tools, reply with ONLY one line per call, in this exact format:",
+        f'{TOOL_CALL_PREFIX} {{"name": "<tool name>", "arguments": {{...}}}}',
+        "Request every tool you need at once; independent calls run in parallel.",
+        "You will then receive the tool results and should answer the user normally.",
+    ]
+    return "\n".join(lines)
+
+# Function definitions for web search capabilities (Gemini uses a different format)
+# For Gemini, we'll use a simpler approach with explicit function calling in the prompt
+# since Gemini 1.5 Flash doesn't support the same function calling format as OpenAI
+
+# Function descriptions for the LLM to understand available capabilities
+FUNCTION_DESCRIPTIONS = {
+    "search_web": "Search the web for current information, news, or facts. Use this when the user asks about recent events, needs up-to-date information, or when you need to verify facts. Parameters: query (required), max_results (optional, default: 3)",
+    "get_latest_news": "Get the latest news on a specific topic. Use this when the user asks for recent news or current events. Parameters: topic (optional, default: 'technology'), topics (optional list, to fetch several topics at once), max_results (optional, default: 5)",
+    "get_weather": "Get current weather information for a specific location. Use this when the user asks about weather conditions. Parameters: location (required)"
+}
+
+TOOL_INSTRUCTIONS = build_tool_instructions(FUNCTION_DESCRIPTIONS)
+
+def parse_tool_calls(text: str) -> List[ToolCall]:
+    """Extract tool calls from model output, dropping malformed and duplicate ones."""
+    calls: List[ToolCall] = []
+    seen = set()
+    for match in _TOOL_CALL_RE.finditer(text or ""):
+        try:
+            data = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring malformed tool call: {match.group(0).strip()}")
+            continue
+        name = data.get("name")
+        arguments = data.get("arguments") or {}
+        if not isinstance(name, str) or not isinstance(arguments, dict):
+            continue
+        call = ToolCall(name=name, arguments=arguments)
+        if call.key() not in seen:
+            seen.add(call.key())
+            calls.append(call)
+    return calls
+
+def strip_tool_calls(text: str) -> str:
+    return _TOOL_CALL_RE.sub("", text or "").strip()
+
+class ToolCallStreamParser:
+    """Finds tool calls in streamed model output as soon as each one is complete.
+
+    feed() returns (text, calls): text that cannot be part of a tool call and
+    is safe to speak right away, and any calls completed by this chunk. Only
+    the start of a line is held back, while it could still become
+    "TOOL_CALL:". After the first call all further text is suppressed, and
+    `done` turns True once a non-call line follows the calls, so the caller
+    can stop reading the stream.
+    """
+
+    def __init__(self) -> None:
+        self.saw_tool_call = False
+        self.done = False
+        self._mode = "start"
+        self._pending = ""
+        self._seen = set()
+
+    def feed(self, chunk: str) -> Tuple[str, List[ToolCall]]:
+        text: List[str] = []
+        calls: List[ToolCall] = []
+        for ch in chunk:
+            if self._mode == "text":
+                if not self.saw_tool_call:
+                    text.append(ch)
+                if ch == "\n":
+                    self._mode = "start"
+                continue
+            if self._mode == "skip":
+                if ch == "\n":
+                    self._mode = "start"
+                continue
+
+            self._pending += ch
+            if self._mode == "start":
+                head = self._pending.lstrip(" \t`")
+                if ch == "\n" and not head.strip():
+                    # Blank or code-fence line; fences are never spoken
+                    if not self.saw_tool_call and "`" not in self._pending:
+                        text.append(self._pending)
+                    self._pending = ""
+                    continue
+                if TOOL_CALL_PREFIX.startswith(head):
+                    continue
+                if head.startswith(TOOL_CALL_PREFIX):
+                    self._mode = "call"
+                    self.saw_tool_call = True
+                else:
+                    if self.saw_tool_call:
+                        self.done = True
+                    else:
+                        text.append(self._pending)
+                    self._mode = "start" if ch == "\n" else "text"
+                    self._pending = ""
+                    continue
+
+            # self._mode == "call": try to parse whenever the JSON may be complete
+            if ch == "}":
+                found = self._complete_call()
+                if found is not None:
+                    calls.extend(found)
+                    self._pending = ""
+                    self._mode = "skip"
+            elif ch == "\n":
+                logger.warning(f"Ignoring malformed tool call: {self._pending.strip()}")
+                self._pending = ""
+                self._mode = "start"
+        return "".join(text), calls
+
+    def _complete_call(self) -> Optional[List[ToolCall]]:
+        body = self._pending.split(TOOL_CALL_PREFIX, 1)[1].strip()
+        try:
+            json.loads(body)
+        except json.JSONDecodeError:
+            return None
+        calls = []
+        for call in parse_tool_calls(f"{TOOL_CALL_PREFIX} {body}"):
+            if call.key() not in self._seen:
+                self._seen.add(call.key())
+                calls.append(call)
+        return calls
+
+    def close(self) -> str:
+        """Flush held-back text at the end of the stream."""
+        pending, self._pending = self._pending, ""
+        if self._mode == "start" and not self.saw_tool_call and "`" not in pending:
+            return pending
+        return ""
+
+def format_tool_results(results: List[ToolResult]) -> str:
+    """Message that feeds tool results back to the model."""
+    parts = ["Tool results:"]
+    for result in results:
+        args = json.dumps(result.call.arguments, ensure_ascii=False)
+        parts.append(f"[{result.call.name} {args}]\n{result.output}")
+    parts.append("Now answer the user's question using these results. Do not request more tools.")
+    return "\n\n".join(parts)
+
+def _timed_out_result(call: ToolCall, elapsed: float) -> ToolResult:
+    logger.warning(f"Tool {call.name} timed out after {elapsed:.2f}s")
+    return ToolResult(call, f"The {call.name} tool did not respond in time.", elapsed, timed_out=True)
+
+def _observe(results: List[ToolResult]) -> None:
+    for r in results:
+        outcome = "timeout" if r.timed_out else "error" if r.failed else "ok"
+        tool_latency.observe(r.elapsed, tool=r.call.name, outcome=outcome)
+
+def _invoke(execute: ToolExecutor, call: ToolCall) -> str:
+    return execute(call.name, call.arguments)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOLS, thread_name_prefix="tool")
+    return _executor
+
+
+async def run_tool_calls(calls: List[ToolCall], execute: ToolExecutor,
+                         timeouts: Optional[Dict[str, float]] = None) -> List[ToolResult]:
+    """Run independent tool calls concurrently, each bounded by its own timeout.
+
+    `execute` may be a coroutine function; otherwise it runs on the tool thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    timeouts = timeouts or {}
+
+    async def run_one(call: ToolCall, limit: float) -> ToolResult:
+        start = time.perf_counter()
+        if asyncio.iscoroutinefunction(execute):
+            pending = execute(call.name, call.arguments)
+        else:
+            pending = loop.run_in_executor(_get_executor(), contextvars.copy_context().run, _invoke, execute, call)
+        try:
+            output = await asyncio.wait_for(pending, timeout=limit)
+        except asyncio.TimeoutError:
+            return _timed_out_result(call, time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Tool {call.name} failed: {e}")
+            return ToolResult(call, f"Error executing function: {str(e)}", time.perf_counter() - start, failed=True)
+        return ToolResult(call, output, time.perf_counter() - start)
+
+    # Each limit is taken once, as the calls start
+    limits = [time_left(timeouts.get(call.name, tool_timeout(call.name))) for call in calls]
+    results = await asyncio.gather(*(run_one(call, limit) for call, limit in zip(calls, limits)))
+    _observe(results)
+    logger.info(f"Ran {len(calls)} tool calls in parallel: "
+                + ", ".join(f"{r.call.name}={r.elapsed:.2f}s" for r in results))
+    return list(results)
+
+def run_tool_calls_sync(calls: List[ToolCall], execute: ToolExecutor,
+                        timeouts: Optional[Dict[str, float]] = None) -> List[ToolResult]:
+    """Blocking variant of run_tool_calls for synchronous callers."""
+    timeouts = timeouts or {}
+    # Limits are taken once, before anything runs: time_left already counts down the turn budget
+    limits = [time_left(timeouts.get(call.name, tool_timeout(call.name))) for call in calls]
+    start = time.perf_counter()
+    # Each call gets its own copy of the context, so the turn deadline reaches the tool
+    futures = [(call, _get_executor().submit(contextvars.copy_context().run, _invoke, execute, call))
+               for call in calls]
+    results: List[ToolResult] = []
+    for (call, future), limit in zip(futures, limits):
+        # All calls started together, so each waits only for what is left of its own limit
+        remaining = max(0.0, limit - (time.perf_counter() - start))
+        try:
+            output = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            results.append(_timed_out_result(call, time.perf_counter() - start))
+            continue
+        except Exception as e:
+            logger.error(f"Tool {call.name} failed: {e}")
+            results.append(ToolResult(call, f"Error executing function: {str(e)}",
+                                      time.perf_counter() - start, failed=True))
+            continue
+        results.append(ToolResult(call, output, time.perf_counter() - start))
+    _observe(results)
+    logger.info(f"Ran {len(calls)} tool calls in parallel in {time.perf_counter() - start:.2f}s")
+    return results
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import uuid
+import logging
+import itertools
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Finished turns kept in memory for /debug/traces
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+# Append each finished turn as one line of OTLP/JSON to this file (off when unset)
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE") or None
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "voice-agent")
+
+
+class Span:
+    """One timed stage of a turn, with attributes, events and an ok/error status."""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def fail(self, error: Any) -> None:
+        self.status = "error"
+        self.error = str(error)
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace._span_ended(self)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else round((self.end_ns - self.start_ns) / 1e6, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.start_ns - self.trace.root.start_ns) / 1e6, 2),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "events": [{"name": e["name"],
+                        "offset_ms": round((e["time_ns"] - self.trace.root.start_ns) / 1e6, 2),
+                        "attributes": e["attributes"]} for e in self.events],
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span outside any traced turn, so instrumented code needs no checks."""
+    span_id = None
+    name = ""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def fail(self, error: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """The spans of one voice turn, identified by session and turn ID."""
+
+    def __init__(self, tracer: "Tracer", name: str, session_id: str, turn_id: str,
+                 attributes: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.root = Span(self, name, None, {"session_id": session_id, "turn_id": turn_id, **attributes})
+
+    def start_span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+        return Span(self, name, parent.span_id if parent else self.root.span_id, attributes)
+
+    def _span_ended(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+        if span is self.root:
+            self.tracer._finish(self)
+
+    def to_dict(self, spans: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            finished = sorted(self.spans, key=lambda s: s.start_ns)
+        summary = {
+            "trace_id": self.trace_id,
+            "session_id": self.session_id,
+            "turn_id": self.turn_id,
+            "name": self.root.name,
+            "start_unix_ms": self.root.start_ns // 1_000_000,
+            "duration_ms": self.root.duration_ms,
+            "status": "error" if any(s.status == "error" for s in finished) else "ok",
+            "span_count": len(finished),
+        }
+        if spans:
+            summary["spans"] = [span.to_dict() for span in finished]
+        else:
+            # Where the time went, by stage (repeated stages such as TTS chunks are summed)
+            stages: Dict[str, float] = {}
+            for s in finished:
+                if s is not self.root:
+                    stages[s.name] = round(stages.get(s.name, 0.0) + (s.duration_ms or 0.0), 2)
+            summary["stages_ms"] = stages
+        return summary
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+def to_otlp(trace: Trace) -> Dict[str, Any]:
+    """A finished trace as an OTLP/JSON ExportTraceServiceRequest."""
+    with trace._lock:
+        spans = list(trace.spans)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": TRACE_SERVICE_NAME})},
+        "scopeSpans": [{
+            "scope": {"name": "services.tracing"},
+            "spans": [{
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                "name": span.name,
+                "kind": 2 if span is trace.root else 1,  # SERVER for the turn, INTERNAL for stages
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "events": [{"timeUnixNano": str(e["time_ns"]), "name": e["name"],
+                            "attributes": _otlp_attributes(e["attributes"])} for e in span.events],
+                "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1},
+            } for span in spans],
+        }],
+    }]}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Keeps the most recent finished turns in a ring buffer and optionally exports them.
+
+    Export is done by one background thread, so a finishing turn never
+    waits on file I/O.
+    """
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE, export_file: Optional[str] = TRACE_EXPORT_FILE,
+                 enabled: bool = TRACING_ENABLED) -> None:
+        self.enabled = enabled
+        self.export_file = export_file
+        self._traces: Deque[Trace] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._turns = itertools.count(1)
+        self._exporter: Optional[ThreadPoolExecutor] = None
+        self._counts = {"traces": 0, "exported": 0, "export_errors": 0}
+
+    @contextmanager
+    def trace_turn(self, name: str, session_id: str, **attributes: Any) -> Iterator[Span]:
+        """Trace one turn; spans opened inside it, in tasks or copied contexts, join the trace."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        trace = Trace(self, name, session_id, str(next(self._turns)), attributes)
+        with activate(trace.root) as root:
+            yield root
+
+    def _finish(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+            self._counts["traces"] += 1
+            if self.export_file and self._exporter is None:
+                self._exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-export")
+        if self.export_file:
+            self._exporter.submit(self._export, trace)
+
+    def _export(self, trace: Trace) -> None:
+        try:
+            line = json.dumps(to_otlp(trace), default=str)
+            with open(self.export_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            with self._lock:
+                self._counts["exported"] += 1
+        except Exception as e:
+            with self._lock:
+                self._counts["export_errors"] += 1
+            logger.warning(f"Trace export to {self.export_file} failed: {e}")
+
+    def recent(self, limit: int = 50, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)
+        if session_id:
+            traces = [t for t in traces if t.session_id == session_id]
+        return [t.to_dict(spans=False) for t in reversed(traces[-limit:])]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            trace = next((t for t in self._traces if t.trace_id == trace_id), None)
+        return trace.to_dict() if trace else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "buffered": len(self._traces), "buffer_size": self._traces.maxlen,
+                    "export_file": self.export_file, **self._counts}
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any):
+    """Start a span without making it current, for stages that end elsewhere (call .end())."""
+    parent = parent or _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return parent.trace.start_span(name, parent, attributes)
+
+@contextmanager
+def activate(span) -> Iterator:
+    """Make span the parent of spans started in this context, and end it on exit."""
+    if span is NOOP_SPAN:
+        yield span
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        span.fail(e if str(e) else type(e).__name__)
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Closed from another context, e.g. an abandoned async generator being finalized
+            pass
+        span.end()
+
+@contextmanager
+def use_span(span) -> Iterator:
+    """Make span current for the block without ending it, e.g. so tasks created here inherit it."""
+    if span is NOOP_SPAN:
+        yield span
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator:
+    """Time a stage of the current turn; a no-op outside a traced turn."""
+    with activate(start_span(name, **attributes)) as s:
+        yield s
+
+# Global instance
+tracer = Tracer()
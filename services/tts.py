@@ -4,11 +4,22 @@ import logging
 import json
 import asyncio
 import time
-from typing import AsyncGenerator, Optional
+import threading
+from typing import AsyncGenerator, Dict, Optional
 import base64
 import io
 import wave
 
+import httpx
+from requests.adapters import HTTPAdapter
+
+from services.circuit_breaker import circuit_breakers
+from services.key_pool import key_pools, status_of
+from services.metrics import tts_ttfb
+from services.tracing import NOOP_SPAN, span, start_span
+from services.deadlines import degrade, has_time, time_left, TURN_TTS_MIN_SECS
+from services.rate_limiter import RateLimitExceeded, rate_limiters, retry_after_secs
+
 try:
     import websockets
 except Exception:  # pragma: no cover
@@ -16,53 +27,240 @@ except Exception:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
-def get_murf_api_key() -> Optional[str]:
-    """Fetch Murf API key at call time so .env loaded later is respected."""
-    return os.getenv("MURF_API_KEY")
-MURF_TTS_ENDPOINT = "https://api.murf.ai/v1/speech/generate-with-key"
+MURF_TTS_ENDPOINT = os.getenv("MURF_TTS_ENDPOINT", "https://api.murf.ai/v1/speech/generate-with-key")
+MURF_DEFAULT_VOICE_ID = os.getenv("MURF_VOICE_ID", "en-US-marcus")
 MURF_WS_URL = os.getenv("MURF_WS_URL", "wss://api.murf.ai/v1/speech/stream-input")
 MURF_WS_CONTEXT_ID = os.getenv("MURF_WS_CONTEXT_ID", "day20-static-context")
+# Keep-alive connections kept open to api.murf.ai
+MURF_POOL_SIZE = int(os.getenv("MURF_POOL_SIZE", "8"))
+MURF_KEEPALIVE_SECS = float(os.getenv("MURF_KEEPALIVE_SECS", "60"))
+MURF_TIMEOUT_SECS = float(os.getenv("MURF_TIMEOUT_SECS", "30"))
+# Optional CA bundle, e.g. for a local TLS stand-in
+MURF_CA_BUNDLE = os.getenv("MURF_CA_BUNDLE") or None
+
+
+class MurfHTTPClient:
+    """Process-wide keep-alive clients for the Murf REST API.
+
+    Sync calls share one requests.Session and async calls share one
+    httpx.AsyncClient per event loop, so DNS, TCP and TLS setup is paid once
+    per pooled connection instead of once per TTS call. Counts requests and
+    newly opened connections for each to report how often connections are
+    reused.
+    """
+
+    def __init__(self,
+                 pool_size: int = MURF_POOL_SIZE,
+                 keepalive_secs: float = MURF_KEEPALIVE_SECS,
+                 timeout: float = MURF_TIMEOUT_SECS,
+                 verify=None) -> None:
+        self.pool_size = pool_size
+        self.keepalive_secs = keepalive_secs
+        self.timeout = timeout
+        self.verify = verify if verify is not None else (MURF_CA_BUNDLE or True)
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[HTTPAdapter] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._requests = {"sync": 0, "async": 0}
+        self._connections = {"sync": 0, "async": 0}
+        self._latency_ms = {"sync": 0.0, "async": 0.0}
+
+    def _get_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                self._session = requests.Session()
+                self._session.mount("https://", self._adapter)
+                self._session.mount("http://", self._adapter)
+            return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            limits = httpx.Limits(max_connections=self.pool_size,
+                                  max_keepalive_connections=self.pool_size,
+                                  keepalive_expiry=self.keepalive_secs)
+            self._async_client = httpx.AsyncClient(limits=limits, timeout=self.timeout, verify=self.verify)
+            self._loop = loop
+        return self._async_client
+
+    def _sync_connections(self) -> int:
+        # urllib3 counts the connections each host pool has opened
+        if self._adapter is None:
+            return 0
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    async def _trace(self, event: str, info: Dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections["async"] += 1
+
+    def _record(self, mode: str, elapsed: float) -> None:
+        with self._lock:
+            self._requests[mode] += 1
+            self._latency_ms[mode] += elapsed * 1000
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST on the shared session; the timeout is capped by the turn budget"""
+        session = self._get_session()
+        start = time.perf_counter()
+        try:
+            return session.post(url, timeout=time_left(self.timeout), verify=self.verify, **kwargs)
+        finally:
+            self._record("sync", time.perf_counter() - start)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        client = self._get_async_client()
+        start = time.perf_counter()
+        try:
+            return await client.post(url, timeout=time_left(self.timeout),
+                                     extensions={"trace": self._trace}, **kwargs)
+        finally:
+            self._record("async", time.perf_counter() - start)
+
+    def stats(self) -> Dict:
+        connections = dict(self._connections, sync=self._sync_connections())
+        with self._lock:
+            stats = {}
+            for mode, count in self._requests.items():
+                opened = connections[mode]
+                stats[mode] = {
+                    "requests": count,
+                    "connections_opened": opened,
+                    "reuse_ratio": round(1 - opened / count, 3) if count else 0.0,
+                    "avg_ms": round(self._latency_ms[mode] / count, 1) if count else 0.0,
+                }
+            stats["pool_size"] = self.pool_size
+            return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+# Global instance
+murf_http = MurfHTTPClient()
+
+
+murf_breaker = circuit_breakers.get("murf")
+murf_keys = key_pools.get("murf")
+
+def _murf_request(text, voice_id, api_key):
+    headers = {"api-key": api_key, "Content-Type": "application/json"}
+    payload = {"voiceId": voice_id or MURF_DEFAULT_VOICE_ID, "text": text, "format": "mp3"}
+    logger.info(f"Generating TTS for text: {text[:50]}...")
+    return headers, payload
+
+def _murf_audio_url(resp, lease):
+    status_code = resp.status_code
+    # Throttling and server errors count against the breaker, client errors do not
+    if status_code >= 500 or status_code == 429:
+        murf_breaker.record_failure()
+    else:
+        murf_breaker.record_success()
+    retry_after = retry_after_secs(resp.headers)
+    lease.report(status_code, retry_after)
+    if status_code == 429:
+        rate_limiters.throttle("murf", lease.key, retry_after)
+    if status_code == 200:
+        audio_url = resp.json().get("audioFile")
+        if audio_url:
+            logger.info(f"TTS generated successfully: {audio_url}")
+            return audio_url
+        logger.error("No audio URL in TTS response")
+        return None
+    logger.error(f"TTS API error: {status_code} - {resp.text}")
+    return None
 
-def murf_tts(text):
-    """Generate TTS using Murf AI API"""
-    api_key = get_murf_api_key()
-    if not api_key or api_key == "your_murf_api_key_here":
+def _murf_lease():
+    """A lease on the least loaded API key, or None if Murf is not configured, failing, or out of turn budget"""
+    if not murf_keys.configured():
         logger.warning("MURF_API_KEY not configured or using placeholder")
         return None
+    if not has_time(TURN_TTS_MIN_SECS):
+        degrade("tts", "skipped Murf")
+        return None
+    if not murf_breaker.allow():
+        logger.warning("Murf circuit open - skipping TTS")
+        return None
+    lease = murf_keys.lease()
+    if lease is None:
+        murf_breaker.release()
+    return lease
+
+def murf_tts(text, voice_id=None):
+    """Generate TTS using Murf AI API, in the persona's voice if one is given"""
+    lease = _murf_lease()
+    if not lease:
+        return None
     
     try:
-        headers = {"api-key": api_key, "Content-Type": "application/json"}
-        payload = {"voiceId": "en-US-marcus", "text": text, "format": "mp3"}
-        
-        logger.info(f"Generating TTS for text: {text[:50]}...")
-        resp = requests.post(MURF_TTS_ENDPOINT, json=payload, headers=headers, timeout=30)
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            audio_url = data.get("audioFile")
-            if audio_url:
-                logger.info(f"TTS generated successfully: {audio_url}")
-                return audio_url
-            else:
-                logger.error("No audio URL in TTS response")
-                return None
-        else:
-            logger.error(f"TTS API error: {resp.status_code} - {resp.text}")
-            return None
+        with lease:
+            headers, payload = _murf_request(text, voice_id, lease.key)
+            rate_limiters.acquire("murf", lease.key)
+            start = time.perf_counter()
+            resp = murf_http.post(MURF_TTS_ENDPOINT, json=payload, headers=headers)
+            tts_ttfb.observe(time.perf_counter() - start, transport="rest")
+            return _murf_audio_url(resp, lease)
             
+    except RateLimitExceeded as e:
+        murf_breaker.release()
+        logger.warning(f"Murf TTS skipped: {e}")
+        return None
     except requests.exceptions.RequestException as e:
+        murf_breaker.record_failure()
         logger.error(f"TTS request error: {e}")
         return None
     except Exception as e:
+        murf_breaker.release()
+        logger.error(f"TTS unexpected error: {e}")
+        return None
+
+async def murf_tts_async(text, voice_id=None):
+    """Async murf_tts over the pooled httpx client"""
+    lease = _murf_lease()
+    if not lease:
+        return None
+
+    try:
+        with lease:
+            headers, payload = _murf_request(text, voice_id, lease.key)
+            await rate_limiters.acquire_async("murf", lease.key)
+            start = time.perf_counter()
+            resp = await murf_http.apost(MURF_TTS_ENDPOINT, json=payload, headers=headers)
+            tts_ttfb.observe(time.perf_counter() - start, transport="rest")
+            return _murf_audio_url(resp, lease)
+
+    except RateLimitExceeded as e:
+        murf_breaker.release()
+        logger.warning(f"Murf TTS skipped: {e}")
+        return None
+    except httpx.HTTPError as e:
+        murf_breaker.record_failure()
+        logger.error(f"TTS request error: {e}")
+        return None
+    except asyncio.CancelledError:
+        murf_breaker.release()
+        raise
+    except Exception as e:
+        murf_breaker.release()
         logger.error(f"TTS unexpected error: {e}")
         return None
 
 def fallback_tts(text="I'm having trouble connecting right now."):
     """Generate fallback TTS or return fallback audio file"""
     try:
-        # Try to use Murf if available
-        api_key = get_murf_api_key()
-        if api_key and api_key != "your_murf_api_key_here":
+        # Try Murf only if it is not already failing, so a Murf outage is not waited out twice
+        if murf_keys.configured() and murf_breaker.healthy:
             result = murf_tts(text)
             if result:
                 return result
@@ -86,7 +284,7 @@ class MurfWsTTSStreamer:
     """
 
     def __init__(self,
-                 voice_id: str = os.getenv("MURF_VOICE_ID", "en-US-marcus"),
+                 voice_id: str = MURF_DEFAULT_VOICE_ID,
                  sample_rate: int = int(os.getenv("MURF_WS_SAMPLE_RATE", "24000")),
                  channel_type: str = os.getenv("MURF_WS_CHANNEL", "MONO"),
                  audio_format: str = os.getenv("MURF_WS_FORMAT", "WAV"),
@@ -102,25 +300,39 @@ class MurfWsTTSStreamer:
         self._receiver_task: Optional[asyncio.Task] = None
         self._closed = False
         self._enabled = True
+        self._lease = None
+        # When the first text was sent and whether audio has come back since (time to first byte)
+        self._first_text_at: Optional[float] = None
+        self._first_audio_seen = False
+        # Covers the stream from the first text sent until close()
+        self._stream_span = NOOP_SPAN
 
     async def connect(self) -> None:
         # Gracefully disable WS if not configured
-        api_key = get_murf_api_key()
-        if not api_key or api_key == "your_murf_api_key_here":
-            logger.error("MURF_API_KEY not configured for WebSocket streaming - Murf WS disabled")
-            self._enabled = False
-            return
         if websockets is None:
             logger.error("'websockets' package not available - Murf WS disabled")
             self._enabled = False
             return
+        # The key is held for as long as the stream stays open
+        self._lease = murf_keys.lease()
+        if self._lease is None:
+            logger.error("MURF_API_KEY not configured for WebSocket streaming - Murf WS disabled")
+            self._enabled = False
+            return
+        api_key = self._lease.key
 
         url = (
             f"{MURF_WS_URL}?api-key={api_key}"
             f"&sample_rate={self.sample_rate}&channel_type={self.channel_type}&format={self.audio_format}"
         )
         logger.info(f"Connecting to Murf WS: {url}")
-        self._ws = await websockets.connect(url, max_size=None)
+        try:
+            with span("murf_ws.connect", key=self._lease.fingerprint):
+                self._ws = await websockets.connect(url, max_size=None)
+        except Exception as e:
+            self._lease.report(status_of(e))
+            self._lease.release()
+            raise
 
         # Send voice configuration
         voice_config = {
@@ -151,6 +363,10 @@ class MurfWsTTSStreamer:
                 # Print base64 audio chunks to console as required
                 if isinstance(data, dict) and "audio" in data:
                     base64_audio = data.get("audio")
+                    if self._first_text_at is not None and not self._first_audio_seen:
+                        self._first_audio_seen = True
+                        tts_ttfb.observe(time.perf_counter() - self._first_text_at, transport="ws")
+                        self._stream_span.add_event("first_audio")
                     # Printing to stdout so it shows in console and logs
                     print(f"Murf WS audio chunk (base64): {base64_audio}")
                     logger.info("Received Murf WS audio chunk (base64 logged above)")
@@ -169,6 +385,7 @@ class MurfWsTTSStreamer:
 
                 # Stop condition if Murf signals final audio
                 if data.get("isFinalAudio") is True:
+                    self._stream_span.add_event("final_audio")
                     logger.info("Murf WS signaled final audio")
                     break
         except asyncio.CancelledError:
@@ -197,6 +414,9 @@ class MurfWsTTSStreamer:
             return
         if not self._ws:
             raise RuntimeError("Murf WS not connected")
+        if self._first_text_at is None:
+            self._first_text_at = time.perf_counter()
+            self._stream_span = start_span("murf_ws.stream", voice_id=self.voice_id)
         payload = {"context_id": self.context_id, "text": text}
         await self._ws.send(json.dumps(payload))
 
@@ -229,6 +449,9 @@ class MurfWsTTSStreamer:
                 await self._ws.close()
         except Exception:
             pass
+        if self._lease:
+            self._lease.release()
+        self._stream_span.end()
 
 
 async def stream_text_to_murf_ws(text_stream: AsyncGenerator[str, None],
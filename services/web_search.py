@@ -3,29 +3,43 @@ import logging
 from tavily import TavilyClient
 from typing import Dict, List, Optional
 
+from services.search_cache import SearchCache, search_cache, query_for
+from services.circuit_breaker import CircuitBreaker, circuit_breakers
+from services.key_pool import APIKeyPool, key_pools, status_of
+from services.rate_limiter import RateLimitExceeded, rate_limiters
+
 logger = logging.getLogger(__name__)
 
-# Check if API key is configured
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+# The Tavily API root; overridden to point both search clients at a local mock
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com")
+
+tavily_breaker = circuit_breakers.get("tavily")
+# TAVILY_API_KEY, or a comma-separated TAVILY_API_KEYS to spread load
+tavily_keys = key_pools.get("tavily")
 
 class WebSearchService:
     """Service for performing web searches using Tavily API"""
     
-    def __init__(self):
-        self.client = None
-        if TAVILY_API_KEY and TAVILY_API_KEY != "your_tavily_api_key_here":
-            try:
-                self.client = TavilyClient(api_key=TAVILY_API_KEY)
-                logger.info("Tavily client initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize Tavily client: {e}")
-                self.client = None
-        else:
+    def __init__(self, cache: SearchCache = search_cache, breaker: CircuitBreaker = tavily_breaker,
+                 keys: APIKeyPool = tavily_keys):
+        self.cache = cache
+        self.breaker = breaker
+        self.keys = keys
+        # One client per key, created on first use
+        self._clients: Dict[str, TavilyClient] = {}
+        if not self.keys.configured():
             logger.warning("TAVILY_API_KEY not configured or using placeholder")
     
     def is_available(self) -> bool:
         """Check if web search service is available"""
-        return self.client is not None
+        return self.keys.configured()
+
+    def _client(self, api_key: str) -> TavilyClient:
+        client = self._clients.get(api_key)
+        if client is None:
+            client = self._clients[api_key] = TavilyClient(api_key=api_key)
+            client.base_url = f"{TAVILY_API_URL.rstrip('/')}/search"
+        return client
     
     def search_web(self, query: str, max_results: int = 3) -> Optional[List[Dict]]:
         """
@@ -41,16 +55,32 @@ class WebSearchService:
         if not self.is_available():
             logger.warning("Web search service not available - TAVILY_API_KEY not configured")
             return None
+        if not self.breaker.allow():
+            logger.warning(f"Tavily circuit open - skipping web search for '{query}'")
+            return None
+        lease = self.keys.lease()
+        if lease is None:
+            self.breaker.release()
+            return None
+        
+        try:
+            rate_limiters.acquire("tavily", lease.key)
+        except RateLimitExceeded as e:
+            lease.release()
+            self.breaker.release()
+            logger.warning(f"Web search for '{query}' held back: {e}")
+            return None
         
         try:
             # Perform the search
-            response = self.client.search(
+            response = self._client(lease.key).search(
                 query=query,
                 search_depth="basic",
                 max_results=max_results,
                 include_answer=True,
                 include_images=False
             )
+            self.breaker.record_success()
             
             # Extract relevant information from response
             results = []
@@ -67,8 +97,15 @@ class WebSearchService:
             return results
             
         except Exception as e:
+            self.breaker.record_failure()
+            status = status_of(e)
+            lease.report(status)
+            if status == 429:
+                rate_limiters.throttle("tavily", lease.key)
             logger.error(f"Web search failed for query '{query}': {e}")
             return None
+        finally:
+            lease.release()
     
     def get_latest_news(self, topic: str = "technology", max_results: int = 5) -> Optional[List[Dict]]:
         """
@@ -81,8 +118,12 @@ class WebSearchService:
         Returns:
             List of news items or None if search failed
         """
-        query = f"latest news about {topic}"
-        return self.search_web(query, max_results)
+        cached = self.cache.get("news", topic, max_results)
+        if cached is not None:
+            return cached
+        results = self.search_web(query_for("news", topic), max_results)
+        self.cache.put("news", topic, max_results, results)
+        return results
     
     def get_weather_info(self, location: str) -> Optional[List[Dict]]:
         """
@@ -94,8 +135,28 @@ class WebSearchService:
         Returns:
             Weather information or None if search failed
         """
-        query = f"current weather in {location}"
-        return self.search_web(query, 1)
+        cached = self.cache.get("weather", location, 1)
+        if cached is not None:
+            return cached
+        results = self.search_web(query_for("weather", location), 1)
+        self.cache.put("weather", location, 1, results)
+        return results
+
+def _url_key(url: str) -> str:
+    return url.split("#", 1)[0].rstrip("/").lower()
+
+def merge_results(queries: List[str], batches: List[Optional[List[Dict]]]) -> List[Dict]:
+    """Merge per-query results, dropping duplicate URLs and sorting by score (best first)"""
+    merged: Dict[str, Dict] = {}
+    for query, batch in zip(queries, batches):
+        for result in batch or []:
+            key = _url_key(result.get('url', '')) or result.get('title', '')
+            current = merged.get(key)
+            if current is None:
+                merged[key] = {**result, 'query': query}
+            elif result.get('score', 0) > current.get('score', 0):
+                current['score'] = result['score']
+    return sorted(merged.values(), key=lambda r: r.get('score', 0), reverse=True)
 
 # Global instance
 web_search_service = WebSearchService()
@@ -108,6 +169,13 @@ def get_news(topic: str = "technology", max_results: int = 5) -> Optional[List[D
     """Convenience function to get latest news"""
     return web_search_service.get_latest_news(topic, max_results)
 
+def get_news_many(topics: List[str], max_results: int = 5) -> Optional[List[Dict]]:
+    """Convenience function to get merged news for several topics"""
+    batches = [web_search_service.get_latest_news(topic, max_results) for topic in topics]
+    if all(batch is None for batch in batches):
+        return None
+    return merge_results([query_for("news", topic) for topic in topics], batches)
+
 def get_weather(location: str) -> Optional[List[Dict]]:
     """Convenience function to get weather information"""
     return web_search_service.get_weather_info(location)
@@ -0,0 +1,174 @@
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+from services.web_search import TAVILY_API_URL, merge_results, tavily_breaker, tavily_keys
+from services.search_cache import SearchCache, search_cache, query_for
+from services.circuit_breaker import CircuitBreaker
+from services.deadlines import time_left
+from services.key_pool import APIKeyPool
+from services.rate_limiter import RateLimitExceeded, rate_limiters, retry_after_secs
+
+logger = logging.getLogger(__name__)
+
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "4"))
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", "8"))
+TAVILY_KEEPALIVE_SECS = float(os.getenv("TAVILY_KEEPALIVE_SECS", "60"))
+TAVILY_DEADLINE_SECS = float(os.getenv("TAVILY_DEADLINE_SECS", "6"))
+
+
+class AsyncWebSearchService:
+    """Tavily search over a shared keep-alive httpx.AsyncClient.
+
+    Requests are limited to max_concurrency in flight and each call is
+    bounded by a deadline. Like WebSearchService, failures are logged and
+    returned as None rather than raised, and calls are skipped while the
+    Tavily circuit breaker is open. The client and semaphore belong to the
+    event loop that first used them; a new loop gets its own.
+    """
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: str = TAVILY_API_URL,
+                 max_concurrency: int = TAVILY_MAX_CONCURRENCY,
+                 max_connections: int = TAVILY_MAX_CONNECTIONS,
+                 keepalive_secs: float = TAVILY_KEEPALIVE_SECS,
+                 deadline: float = TAVILY_DEADLINE_SECS,
+                 cache: SearchCache = search_cache,
+                 breaker: CircuitBreaker = tavily_breaker,
+                 keys: Optional[APIKeyPool] = None) -> None:
+        # An explicit key or pool replaces the shared TAVILY_API_KEY(S) pool
+        if keys is None:
+            keys = APIKeyPool("tavily", [api_key]) if api_key is not None else tavily_keys
+        self.keys = keys
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.keepalive_secs = keepalive_secs
+        self.deadline = deadline
+        self.cache = cache
+        self.breaker = breaker
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def is_available(self) -> bool:
+        return self.keys.configured()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections,
+                                  keepalive_expiry=self.keepalive_secs)
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.deadline)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def _post_search(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        client = self._get_client()
+        lease = self.keys.lease()
+        if lease is None:
+            raise RateLimitExceeded("every Tavily key is drained")
+        with lease:
+            await rate_limiters.acquire_async("tavily", lease.key)
+            async with self._semaphore:
+                response = await client.post("/search", json={
+                    "api_key": lease.key,
+                    "query": query,
+                    "search_depth": "basic",
+                    "max_results": max_results,
+                    "include_answer": True,
+                    "include_images": False,
+                })
+        retry_after = retry_after_secs(response.headers)
+        lease.report(response.status_code, retry_after)
+        if response.status_code == 429:
+            rate_limiters.throttle("tavily", lease.key, retry_after)
+        response.raise_for_status()
+        data = response.json()
+        return [{
+            'title': result.get('title', 'No title'),
+            'url': result.get('url', ''),
+            'content': result.get('content', 'No content'),
+            'score': result.get('score', 0),
+        } for result in data.get('results') or []]
+
+    async def search_web(self, query: str, max_results: int = 3,
+                         deadline: Optional[float] = None) -> Optional[List[Dict]]:
+        """Search Tavily, returning None if unavailable, failed or past the deadline."""
+        if not self.is_available():
+            logger.warning("Web search service not available - TAVILY_API_KEY not configured")
+            return None
+        requested = self.deadline if deadline is None else deadline
+        limit = time_left(requested)
+        if limit <= 0:
+            logger.warning(f"No time left in the turn budget - skipping web search for '{query}'")
+            return None
+        if not self.breaker.allow():
+            logger.warning(f"Tavily circuit open - skipping web search for '{query}'")
+            return None
+        try:
+            results = await asyncio.wait_for(self._post_search(query, max_results), timeout=limit)
+        except asyncio.TimeoutError:
+            if limit < requested:
+                # Cut short by the turn budget, not the provider's fault
+                self.breaker.release()
+            else:
+                self.breaker.record_failure()
+            logger.warning(f"Web search for '{query}' missed its {limit:.1f}s deadline")
+            return None
+        except RateLimitExceeded as e:
+            self.breaker.release()
+            logger.warning(f"Web search for '{query}' held back: {e}")
+            return None
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Web search failed for query '{query}': {e}")
+            return None
+        self.breaker.record_success()
+        logger.info(f"Web search completed for query: '{query}' - Found {len(results)} results")
+        return results
+
+    async def search_many(self, queries: List[str], max_results: int = 3,
+                          deadline: Optional[float] = None) -> Optional[List[Dict]]:
+        """Run related queries concurrently and merge them into one deduplicated, score-ranked list."""
+        batches = await asyncio.gather(*(self.search_web(q, max_results, deadline) for q in queries))
+        if all(batch is None for batch in batches):
+            return None
+        return merge_results(queries, batches)
+
+    async def _cached_search(self, kind: str, arg: str, max_results: int) -> Optional[List[Dict]]:
+        cached = self.cache.get(kind, arg, max_results)
+        if cached is not None:
+            return cached
+        results = await self.search_web(query_for(kind, arg), max_results)
+        self.cache.put(kind, arg, max_results, results)
+        return results
+
+    async def get_latest_news(self, topic: str = "technology", max_results: int = 5) -> Optional[List[Dict]]:
+        return await self._cached_search("news", topic, max_results)
+
+    async def get_news_many(self, topics: List[str], max_results: int = 5) -> Optional[List[Dict]]:
+        batches = await asyncio.gather(*(self.get_latest_news(topic, max_results) for topic in topics))
+        if all(batch is None for batch in batches):
+            return None
+        return merge_results([query_for("news", topic) for topic in topics], batches)
+
+    async def get_weather_info(self, location: str) -> Optional[List[Dict]]:
+        return await self._cached_search("weather", location, 1)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Global instance
+async_web_search_service = AsyncWebSearchService()
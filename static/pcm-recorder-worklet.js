@@ -0,0 +1,44 @@
+// Captures microphone audio as 16-bit PCM at a target sample rate for realtime STT.
+// The AudioContext runs at the device rate, so blocks are downsampled by averaging
+// the input samples that fall into each output sample, then posted in fixed-size chunks.
+class PcmRecorderProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        const opts = (options && options.processorOptions) || {};
+        this.targetSampleRate = opts.targetSampleRate || 16000;
+        this.ratio = sampleRate / this.targetSampleRate;
+        this.chunk = new Int16Array(Math.round(this.targetSampleRate * (opts.chunkMs || 100) / 1000));
+        this.filled = 0;
+        this.position = 0;
+        this.sum = 0;
+        this.count = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0];
+        if (input && input.length > 0) {
+            const channel = input[0];
+            for (let i = 0; i < channel.length; i++) {
+                this.sum += channel[i];
+                this.count++;
+                this.position += 1;
+                if (this.position >= this.ratio) {
+                    this.position -= this.ratio;
+                    const sample = Math.max(-1, Math.min(1, this.sum / this.count));
+                    this.chunk[this.filled++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+                    this.sum = 0;
+                    this.count = 0;
+                    if (this.filled === this.chunk.length) {
+                        const full = this.chunk;
+                        this.chunk = new Int16Array(full.length);
+                        this.filled = 0;
+                        this.port.postMessage(full.buffer, [full.buffer]);
+                    }
+                }
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('pcm-recorder', PcmRecorderProcessor);
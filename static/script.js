@@ -12,8 +12,9 @@ document.addEventListener('DOMContentLoaded', () => {
     const wsStatus = document.getElementById('ws-status');
 
     let websocket;
-    let mediaRecorder;
-    let audioChunks = [];
+    // Microphone capture: raw 16 kHz PCM16, the format the realtime STT expects
+    const STREAM_SAMPLE_RATE = 16000;
+    let recorder = null;
     let sessionId = localStorage.getItem('sessionId') || `session_${Date.now()}`;
     localStorage.setItem('sessionId', sessionId);
 
@@ -21,7 +22,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function initializeWebSocket() {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/${sessionId}`;
+        const wsUrl = `${protocol}//${window.location.host}/ws/${sessionId}?encoding=pcm_s16le&sample_rate=${STREAM_SAMPLE_RATE}`;
         console.log(`WebSocket URL: ${wsUrl}`);
 
         try {
@@ -108,21 +109,22 @@ document.addEventListener('DOMContentLoaded', () => {
 
     async function startRecording() {
         try {
-            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            mediaRecorder = new MediaRecorder(stream);
-            mediaRecorder.ondataavailable = event => {
-                if (event.data.size > 0) {
-                    audioChunks.push(event.data);
-                    if (websocket && websocket.readyState === WebSocket.OPEN) {
-                        websocket.send(event.data);
-                    }
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: { channelCount: 1 } });
+            const context = new AudioContext();
+            await context.audioWorklet.addModule('/static/pcm-recorder-worklet.js');
+            const source = context.createMediaStreamSource(stream);
+            const node = new AudioWorkletNode(context, 'pcm-recorder', {
+                processorOptions: { targetSampleRate: STREAM_SAMPLE_RATE, chunkMs: 100 }
+            });
+            node.port.onmessage = event => {
+                if (websocket && websocket.readyState === WebSocket.OPEN) {
+                    websocket.send(event.data);
                 }
             };
-            mediaRecorder.onstop = () => {
-                // The audio is sent in chunks, no need to send a blob at the end
-            };
-            audioChunks = [];
-            mediaRecorder.start(500); // Send data every 500ms to stay within AssemblyAI limits
+            source.connect(node);
+            // The node outputs silence; connecting it keeps the graph pulling audio through it
+            node.connect(context.destination);
+            recorder = { stream, context, source, node };
             recordBtn.textContent = 'Stop Recording';
             statusText.textContent = 'Recording...';
         } catch (error) {
@@ -132,15 +134,19 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function stopRecording() {
-        if (mediaRecorder && mediaRecorder.state === 'recording') {
-            mediaRecorder.stop();
+        if (recorder) {
+            recorder.source.disconnect();
+            recorder.node.disconnect();
+            recorder.stream.getTracks().forEach(track => track.stop());
+            recorder.context.close();
+            recorder = null;
             recordBtn.textContent = 'Start Recording';
             statusText.textContent = 'Recording stopped.';
         }
     }
 
     recordBtn.addEventListener('click', () => {
-        if (mediaRecorder && mediaRecorder.state === 'recording') {
+        if (recorder) {
             stopRecording();
         } else {
             startRecording();
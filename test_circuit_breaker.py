@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-provider circuit breakers
+Uses a fake clock and scripted providers, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.tts as tts
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.llm_providers import HedgedLLMClient, LLMProvider, stream_async
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FailingProvider(LLMProvider):
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, conversation):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+
+    def stream(self, conversation):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+
+def test_state_transitions():
+    """Failure rate opens the breaker, a probe after the cool-down closes or re-opens it"""
+    print("🔌 Testing breaker state machine")
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, window=60, open_secs=30, clock=clock)
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+    # Old outcomes age out of the window
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 200
+    breaker.record_failure()
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "closed" and snapshot["window_calls"] == 1 and snapshot["trips"] == 2
+    print("✅ closed -> open -> half-open -> closed")
+
+def test_open_breaker_fails_fast():
+    """An open Murf breaker skips the network and fallback_tts goes straight to the static file"""
+    print("⚡ Testing fast-fail")
+    breaker = CircuitBreaker("murf", min_calls=1, open_secs=60)
+    breaker.record_failure()
+    saved = (tts.murf_breaker, os.environ.get("MURF_API_KEY"))
+    try:
+        tts.murf_breaker = breaker
+        os.environ["MURF_API_KEY"] = "test-key"
+        start = time.perf_counter()
+        for _ in range(1000):
+            assert tts.murf_tts("hello") is None
+        per_call = (time.perf_counter() - start) / 1000
+        assert tts.fallback_tts("hello") == "/fallback.wav"
+        assert asyncio.run(tts.murf_tts_async("hello")) is None
+    finally:
+        tts.murf_breaker = saved[0]
+        if saved[1] is None:
+            os.environ.pop("MURF_API_KEY", None)
+        else:
+            os.environ["MURF_API_KEY"] = saved[1]
+    assert per_call < 0.001 and breaker.snapshot()["rejected"] >= 1001
+    print(f"✅ Rejected in {per_call * 1e6:.1f}µs per call")
+
+def test_llm_client_trips_breaker():
+    """Repeated LLM failures open the breaker; then calls and streams fail without reaching the provider"""
+    print("🧠 Testing LLM breaker")
+    provider = FailingProvider()
+    breaker = CircuitBreaker("failing", min_calls=2, open_secs=60)
+    client = HedgedLLMClient(provider, deadline=1, breaker=breaker)
+    conversation = [{"role": "user", "parts": ["hello"]}]
+    for _ in range(2):
+        try:
+            client.generate(conversation)
+            assert False, "expected the provider error"
+        except RuntimeError as e:
+            assert "503" in str(e)
+    assert breaker.state == "open"
+
+    for call in (lambda: client.generate(conversation),
+                 lambda: asyncio.run(stream_async(provider, conversation, breaker=breaker).__anext__())):
+        try:
+            call()
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+    assert provider.calls == 2
+    print("✅ Provider not called while open")
+
+if __name__ == "__main__":
+    test_state_transitions()
+    test_open_breaker_fails_fast()
+    test_llm_client_trips_breaker()
+    print("\n🎉 All circuit breaker tests passed!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script for the endpointing / turn-detection engine
+Replays synthetic timelines and checks end of turn is declared early but safely
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import functools
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.endpointing import (Endpointer, EndpointConfig, pcm16_rms, replay,
+                                  summarize, load_log_events)
+from services.recording_store import RecordingStore
+from services.recording_writer import open_recording
+
+CONFIG = EndpointConfig(silence_ms=600, transcript_silence_ms=900, punctuation_silence_ms=250,
+                        hesitation_silence_ms=1200, stable_ms=300, max_turn_ms=20000,
+                        min_words=1, speech_rms=500)
+
+def _timeline(words, speech_until_ms, final_at_ms, end_ms=None):
+    """100ms audio frames with speech until speech_until_ms, one word per 200ms, provider final later"""
+    events = []
+    for t in range(0, end_ms or final_at_ms, 100):
+        events.append({"t_ms": t, "type": "audio", "speech": t < speech_until_ms})
+    for i in range(len(words)):
+        events.append({"t_ms": 150 + i * 200, "type": "partial", "text": " ".join(words[:i + 1])})
+    events.append({"t_ms": final_at_ms, "type": "final", "text": " ".join(words)})
+    return events
+
+def test_replay_reduces_silence_to_response():
+    """With audio energy, end of turn is declared well before the provider's final"""
+    print("⏱️  Testing replayed silence-to-response latency")
+    words = "what is the weather today".split()
+    turns = replay(_timeline(words, speech_until_ms=1000, final_at_ms=1000 + 1280), CONFIG)
+    summary = summarize(turns)
+    print(f"   {summary}")
+    assert summary["turns"] == 1 and summary["premature"] == 0
+    assert turns[0].reason == "silence"
+    assert turns[0].saved_ms >= 600
+    print("✅ End of turn declared early")
+
+def test_hesitation_word_waits_longer():
+    """A turn ending in 'and' is not cut off after the normal silence"""
+    endpointer = Endpointer(CONFIG)
+    endpointer.on_voice_activity(True, 0.0)
+    endpointer.on_transcript("I want pizza and", False, 0.0)
+    assert endpointer.on_voice_activity(False, 0.8) is None
+    assert endpointer.check(1.3) == "silence"
+
+def test_punctuation_ends_turn_sooner():
+    """Terminal punctuation only needs the short silence window"""
+    endpointer = Endpointer(CONFIG)
+    endpointer.on_voice_activity(True, 0.0)
+    endpointer.on_transcript("What time is it?", False, 0.0)
+    assert endpointer.check(0.2) is None
+    assert endpointer.check(0.3) == "punctuation"
+
+def test_min_words_zero_waits_for_a_transcript():
+    """With min_words=0 the ticker's checks before any transcript arrives are harmless"""
+    endpointer = Endpointer(EndpointConfig(min_words=0, max_turn_ms=1000))
+    assert endpointer.check(5.0) is None
+    endpointer.on_voice_activity(True, 0.0)
+    assert endpointer.on_voice_activity(False, 2.0) is None
+    endpointer.on_transcript("yes", False, 2.1)
+    assert endpointer.check(4.0) == "silence"
+
+def test_early_turn_is_retracted_when_user_keeps_talking():
+    """New words after an early end of turn reopen the turn"""
+    endpointer = Endpointer(CONFIG)
+    endpointer.on_transcript("tell me", False, 0.0)
+    assert endpointer.check(1.0) == "silence"
+    endpointer.on_transcript("tell me a joke", False, 1.2)
+    assert not endpointer.ended and endpointer.retractions == 1
+    assert endpointer.on_transcript("Tell me a joke.", True, 1.3) == "final"
+
+class ScriptedTranscriber:
+    """Stands in for the realtime STT: the first audio chunk plays back a partial, then a later final"""
+    script = []
+
+    def __init__(self, on_transcript=None, **kwargs):
+        self.on_transcript = on_transcript
+        self.enabled = True
+        self._task = None
+
+    async def connect(self):
+        pass
+
+    async def send_audio(self, chunk):
+        if self._task is None:
+            self._task = asyncio.create_task(self._play())
+
+    async def _play(self):
+        from services.stt_streaming import TranscriptEvent
+        for delay, text, is_final in ScriptedTranscriber.script:
+            await asyncio.sleep(delay)
+            await self.on_transcript(TranscriptEvent(text, is_final, 0, None, None, time.monotonic()))
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+
+def _ws_turns(script):
+    """Run one /ws session against a scripted transcript; returns (turn texts, cancelled texts, messages)"""
+    import app as app_module
+    from fastapi.testclient import TestClient
+
+    started, cancelled = [], []
+
+    async def fake_turn(websocket, session_id, user_text, speculation=None):
+        started.append(user_text)
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(user_text)
+            raise
+        await websocket.send_text(json.dumps({"type": "complete", "content": user_text}))
+
+    ScriptedTranscriber.script = script
+    original = app_module.StreamingTranscriber, app_module._run_streaming_turn, app_module.open_recording
+    app_module.StreamingTranscriber, app_module._run_streaming_turn = ScriptedTranscriber, fake_turn
+    # app may have been imported before RECORDING_DIRECTORY was set; never record into uploads/
+    app_module.open_recording = functools.partial(open_recording, store=RecordingStore(root=tempfile.mkdtemp()))
+    messages = []
+    try:
+        with TestClient(app_module.app) as client:
+            with client.websocket_connect("/ws/endpointing-test") as ws:
+                ws.send_bytes(b"\0" * 3200)
+                while not messages or messages[-1]["type"] != "complete":
+                    messages.append(ws.receive_json())
+    finally:
+        app_module.StreamingTranscriber, app_module._run_streaming_turn, app_module.open_recording = original
+    return started, cancelled, messages
+
+def test_final_transcript_replaces_truncated_early_turn():
+    """A final that adds words the early turn missed restarts the turn; a matching final keeps it"""
+    print("🔁 Testing early turns against the provider's final transcript")
+    started, cancelled, messages = _ws_turns([(0.0, "Book a table.", False),
+                                              (0.5, "Book a table for two at eight.", True)])
+    assert started == ["Book a table.", "Book a table for two at eight."], started
+    assert cancelled == ["Book a table."]
+    assert "turn_cancelled" in [m["type"] for m in messages]
+    assert messages[-1]["content"] == "Book a table for two at eight."
+    print("✅ Truncated early turn replaced by the full transcript")
+
+    started, cancelled, messages = _ws_turns([(0.0, "Book a table.", False), (0.5, "book a table", True)])
+    assert started == ["Book a table."] and not cancelled
+    print("✅ Matching final keeps the early turn")
+
+def test_pcm_rms_and_log_replay():
+    """Energy detection on PCM16 and replay of app.log-style transcripts"""
+    assert pcm16_rms(b"\x00\x00" * 100) == 0
+    assert pcm16_rms(b"\xe8\x03" * 100) == 1000
+    log = (
+        "2025-08-29 22:56:27,401 - app - INFO - [AAI Partial] just\n"
+        "2025-08-29 22:56:27,463 - app - INFO - [AAI Partial] just the answer\n"
+        "2025-08-29 22:56:28,581 - app - INFO - [AAI Final Turn] just the answer\n"
+        "2025-08-29 22:56:28,614 - app - INFO - [AAI Final Turn] Just the answer.\n"
+    )
+    with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as fh:
+        fh.write(log)
+    try:
+        events = load_log_events(fh.name)
+    finally:
+        os.remove(fh.name)
+    assert [e["type"] for e in events] == ["partial", "partial", "final"]
+    turns = replay(events, CONFIG)
+    assert len(turns) == 1 and turns[0].saved_ms > 0 and not turns[0].premature
+
+if __name__ == "__main__":
+    test_replay_reduces_silence_to_response()
+    test_hesitation_word_waits_longer()
+    test_punctuation_ends_turn_sooner()
+    test_min_words_zero_waits_for_a_transcript()
+    test_early_turn_is_retracted_when_user_keeps_talking()
+    test_final_transcript_replaces_truncated_early_turn()
+    test_pcm_rms_and_log_replay()
+    print("\n🎉 All endpointing tests passed!")
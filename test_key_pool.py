@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for API key pools
+Uses a fake clock and the local mock Tavily server, no API keys needed
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.key_pool import APIKeyPool, load_keys
+from services.rate_limiter import rate_limiters
+from services.circuit_breaker import CircuitBreaker
+from services.web_search_async import AsyncWebSearchService
+from mocks.tavily_server import MockTavilyServer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_keys_from_env_and_least_loaded():
+    """Keys come from *_API_KEYS plus *_API_KEY; the least busy key, then the one with most tokens, is picked"""
+    print("🔑 Testing key selection")
+    saved = {name: os.environ.get(name) for name in ("MURF_API_KEYS", "MURF_API_KEY")}
+    try:
+        os.environ["MURF_API_KEYS"] = "key-a, key-b,,your_murf_api_key_here"
+        os.environ["MURF_API_KEY"] = "key-a"
+        assert load_keys("MURF") == ["key-a", "key-b"]
+        pool = APIKeyPool("murf")
+        assert pool.keys() == ["key-a", "key-b"]
+        os.environ["MURF_API_KEY"] = "key-c"
+        assert pool.keys() == ["key-a", "key-b", "key-c"]  # picked up without a restart
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    pool = APIKeyPool("keypool-test", ["k1", "k2"])
+    rate_limiters.bucket("keypool-test", "k1").acquire()  # k1 has one token less
+    first = pool.lease()
+    second = pool.lease()
+    assert first.key == "k2" and second.key == "k1"
+    first.release()
+    with pool.lease() as third:
+        assert third.key == "k2"
+    assert [s["outstanding"] for s in pool.snapshot().values()] == [1, 0]
+    assert "k1" not in str(pool.snapshot())
+    print("✅ Load spread by requests in flight and remaining quota")
+
+def test_rejected_keys_are_drained():
+    """401 drains a key for long, 429 for its Retry-After; with every key drained there is no lease"""
+    print("🚰 Testing key draining")
+    clock = FakeClock()
+    pool = APIKeyPool("keypool-drain", ["good", "revoked", "busy"], clock=clock)
+    leases = {lease.key: lease for lease in (pool.lease() for _ in range(3))}
+    leases["revoked"].report(401)
+    leases["busy"].report(429, retry_after=5)
+    for lease in leases.values():
+        lease.release()
+    assert {pool.lease().key for _ in range(4)} == {"good"}
+
+    clock.now = 6
+    busy = pool.lease()
+    assert busy.key == "busy"
+    busy.report(429, retry_after=5)
+    pool.lease().report(429)
+    assert pool.lease() is None
+    clock.now = 400
+    assert pool.lease().key == "revoked"  # back after KEY_DRAIN_AUTH_SECS
+    snapshot = pool.snapshot()
+    assert [s["drains"] for s in snapshot.values()] == [1, 1, 2]
+    assert snapshot[leases["good"].fingerprint]["last_status"] == 429
+    print("✅ Drained keys sit out and come back")
+
+def test_search_rotates_away_from_revoked_key():
+    """Concurrent searches spread over the keys and stop using one the provider rejects"""
+    print("🔁 Testing rotation against the mock Tavily server")
+    server = MockTavilyServer(latency=0.05, key_errors={"revoked": 401})
+    server.start()
+    try:
+        pool = APIKeyPool("tavily", ["key-a", "revoked", "key-b"])
+        service = AsyncWebSearchService(base_url=server.url, breaker=CircuitBreaker("tavily-keys-test"),
+                                        keys=pool)
+
+        async def run():
+            first = await service.search_many([f"topic {i}" for i in range(3)], 3)
+            second = await service.search_many([f"subject {i}" for i in range(6)], 3)
+            await service.aclose()
+            return first, second
+
+        first, second = asyncio.run(run())
+    finally:
+        server.stop()
+    assert server.api_keys["revoked"] == 1
+    assert server.api_keys["key-a"] >= 3 and server.api_keys["key-b"] >= 3
+    assert len({r["query"] for r in second}) == 6
+    print(f"✅ Requests per key: {dict(server.api_keys)}")
+
+if __name__ == "__main__":
+    test_keys_from_env_and_least_loaded()
+    test_rejected_keys_are_drained()
+    test_search_rotates_away_from_revoked_key()
+    print("\n🎉 All key pool tests passed!")
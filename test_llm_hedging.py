@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM deadlines and request hedging
+Uses the deterministic mock provider, no API keys needed
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.llm_providers import HedgedLLMClient, LLMDeadlineExceeded, LLMProvider
+from mocks.llm_provider import LatencyProfile, MockLLMProvider
+
+class ScriptedProvider(LLMProvider):
+    """Returns (delay, reply-or-exception) pairs in order"""
+    name = "scripted"
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def generate(self, conversation):
+        delay, outcome = self.script[self.calls]
+        self.calls += 1
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def ask(client):
+    return client.generate([{"role": "user", "parts": ["hello"]}])
+
+def test_mock_is_deterministic():
+    """Same seed and prompt sequence give the same latencies"""
+    print("🎲 Testing mock determinism")
+    profile = LatencyProfile(median=0.5, tail_probability=0.2)
+    a, b = MockLLMProvider(profile, seed=7), MockLLMProvider(profile, seed=7)
+    seq_a = [a.next_latency(f"p{i % 3}") for i in range(20)]
+    seq_b = [b.next_latency(f"p{i % 3}") for i in range(20)]
+    assert seq_a == seq_b
+    assert seq_a != [MockLLMProvider(profile, seed=8).next_latency(f"p{i % 3}") for i in range(20)]
+    assert any(latency > 1.5 for latency in seq_a)  # the slow tail shows up
+    print("✅ Mock latencies are reproducible")
+
+def test_hedge_wins_over_slow_primary():
+    """A slow first attempt is raced by a hedge sent after the hedge delay"""
+    print("🏁 Testing hedged request")
+    provider = ScriptedProvider([(0.5, "slow"), (0.02, "fast")])
+    client = HedgedLLMClient(provider, hedging=True, deadline=2, initial_hedge_delay=0.05)
+    start = time.perf_counter()
+    assert ask(client) == "fast"
+    assert time.perf_counter() - start < 0.3
+    stats = client.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+    # Without hedging the same script waits for the slow answer
+    client = HedgedLLMClient(ScriptedProvider([(0.2, "slow")]), hedging=False, deadline=2)
+    assert ask(client) == "slow"
+    print("✅ Hedge answered first")
+
+def test_failure_and_deadline():
+    """Errors are hedged immediately; a deadline miss raises LLMDeadlineExceeded"""
+    print("⏱️ Testing failures and deadlines")
+    provider = ScriptedProvider([(0.0, RuntimeError("boom")), (0.01, "recovered")])
+    client = HedgedLLMClient(provider, hedging=True, deadline=2, initial_hedge_delay=1.0)
+    assert ask(client) == "recovered"
+
+    client = HedgedLLMClient(ScriptedProvider([(0.0, RuntimeError("boom"))]), hedging=False, deadline=2)
+    try:
+        ask(client)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert str(e) == "boom"
+
+    client = HedgedLLMClient(ScriptedProvider([(0.5, "late"), (0.5, "late")]), hedging=True,
+                             deadline=0.1, initial_hedge_delay=0.02)
+    start = time.perf_counter()
+    try:
+        ask(client)
+        assert False, "expected LLMDeadlineExceeded"
+    except LLMDeadlineExceeded:
+        pass
+    assert time.perf_counter() - start < 0.3
+    assert client.stats()["deadline_exceeded"] == 1
+    print("✅ Failures and deadlines handled")
+
+def test_adaptive_hedge_delay():
+    """The hedge delay follows the observed p95, within the configured bounds"""
+    print("📈 Testing adaptive hedge delay")
+    provider = MockLLMProvider(LatencyProfile(median=1.0, sigma=0.1, tail_probability=0.0), time_scale=0.01)
+    client = HedgedLLMClient(provider, hedging=False, initial_hedge_delay=0.5,
+                             min_hedge_delay=0.0, max_hedge_delay=1.0, min_samples=10)
+    assert client.hedge_delay() == 0.5
+    for i in range(12):
+        client.generate([{"role": "user", "parts": [f"q{i}"]}])
+    assert 0.009 < client.hedge_delay() < 0.02
+    print(f"✅ Hedge delay adapted to {client.hedge_delay() * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    test_mock_is_deterministic()
+    test_hedge_wins_over_slow_primary()
+    test_failure_and_deadline()
+    test_adaptive_hedge_delay()
+    print("\n🎉 All LLM hedging tests passed!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline load-test harness
+Runs the real app against the local provider mocks, no API keys needed
+"""
+
+import os
+import sys
+import json
+import tempfile
+import argparse
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest.profiles import build_profiles
+from loadtest.report import load_trace_stages, summarize_phase
+from loadtest.run import run
+from loadtest.scenarios import PhaseResult, Sample
+
+def test_profiles_and_report():
+    """Overrides adjust a preset without touching it; phases and trace exports summarize to percentiles"""
+    print("🧪 Testing profile overrides and the report...")
+
+    profiles = build_profiles("realistic", ["murf.median=1.5", "llm.capacity=3", "tavily.error_status=429"])
+    assert profiles["murf"].latency.median == 1.5
+    assert profiles["llm"].capacity == 3 and profiles["tavily"].error_status == 429
+    assert build_profiles("realistic")["murf"].latency.median == 0.35
+    for bad in (["murf.median"], ["nope.median=1"], ["murf.colour=1"]):
+        try:
+            build_profiles("realistic", bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Presets overridden per provider")
+
+    samples = [Sample(True, i / 100, {"first_llm_chunk": i / 200}) for i in range(1, 101)]
+    samples += [Sample(False, 5.0, error="HTTP 503")] * 4
+    summary = summarize_phase(PhaseResult("ws", 4, 2.0, samples))
+    assert summary["requests"] == 104 and summary["errors"] == 4
+    assert summary["throughput_rps"] == 50.0
+    assert summary["latency"]["p50_ms"] == 510.0 and summary["latency"]["p99_ms"] == 990.0
+    assert summary["stages"]["first_llm_chunk"]["n"] == 100
+    assert summary["top_errors"] == {"HTTP 503": 4}
+    print("✅ Client latencies, throughput and errors summarized")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        for turn in range(3):
+            start = 10**18 + turn * 10**9
+            spans = [{"spanId": "root", "name": "agent_chat", "startTimeUnixNano": str(start),
+                      "endTimeUnixNano": str(start + 300_000_000)},
+                     {"spanId": "stt", "parentSpanId": "root", "name": "stt", "startTimeUnixNano": str(start),
+                      "endTimeUnixNano": str(start + (turn + 1) * 50_000_000)}]
+            f.write(json.dumps({"resourceSpans": [{"scopeSpans": [{"spans": spans}]}]}) + "\n")
+        f.write("not json\n")
+    try:
+        stages = load_trace_stages(f.name)
+    finally:
+        os.unlink(f.name)
+    assert stages["agent_chat"]["agent_chat"]["p50_ms"] == 300.0
+    assert stages["agent_chat"]["stt"]["n"] == 3 and stages["agent_chat"]["stt"]["p99_ms"] == 150.0
+    print("✅ Server stage percentiles read from the trace export")
+
+def test_end_to_end_run():
+    """A short run of every scenario against the fast mocks completes with server stage timings"""
+    print("🧪 Testing a short load-test run...")
+
+    args = argparse.Namespace(profile="fast", set=[], scenarios="agent_chat,generate_audio,ws", concurrency=2,
+                              duration=30.0, requests=4, turns_per_session=2, ws_pace=0, chunks_per_word=2,
+                              silence_chunks=3, ws_audio="pcm", port=0, app_env=["RATE_LIMIT_MURF_RPS=100"], seed=0,
+                              json=None)
+    report = run(args)
+
+    for name in ("agent_chat", "generate_audio", "ws"):
+        phase = report["scenarios"][name]
+        assert phase["requests"] >= 4, f"{name}: {phase}"
+        assert phase["errors"] == 0, f"{name}: {phase['top_errors']}"
+        assert phase["throughput_rps"] > 0
+    assert "first_llm_chunk" in report["scenarios"]["ws"]["stages"]
+    print("✅ All scenarios completed without errors")
+
+    chat_stages = report["server_stages"]["agent_chat"]
+    for stage in ("stt", "llm", "tts"):
+        assert chat_stages[stage]["n"] > 0, chat_stages
+    assert report["server_stages"]["ws_turn"]["llm"]["n"] > 0
+    assert report["providers"]["murf"]["requests"] > 0
+    assert report["providers"]["stt_realtime"]["connections"] >= 4
+    assert "max_lag_ms" in report["event_loop"], "loop lag is fetched with the run's admin token"
+    print("✅ Server stages traced and mocks exercised")
+
+def test_webm_clients_refused():
+    """Undeclared webm streams are refused quickly and never reach the realtime STT or the LLM"""
+    print("🧪 Testing a load-test run of webm clients...")
+
+    args = argparse.Namespace(profile="fast", set=[], scenarios="ws", concurrency=2, duration=30.0, requests=4,
+                              turns_per_session=2, ws_pace=0, chunks_per_word=2, silence_chunks=3, ws_audio="webm",
+                              port=0, app_env=[], seed=0, json=None)
+    report = run(args)
+
+    phase = report["scenarios"]["ws"]
+    assert phase["requests"] >= 4 and phase["errors"] == 0, phase["top_errors"]
+    assert phase["stages"]["refused"]["n"] == phase["requests"]
+    assert "ws_turn" not in report["server_stages"]
+    assert report["providers"]["stt_realtime"]["audio_bytes"] == 0
+    print("✅ webm clients refused without starting a turn")
+
+if __name__ == "__main__":
+    test_profiles_and_report()
+    test_end_to_end_run()
+    test_webm_clients_refused()
+    print("\n🎉 All load test harness tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the event-loop lag monitor
+Blocks a local event loop on purpose, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.loop_monitor import LoopLagMonitor, loop_lag, loop_stalls
+
+def blocking_sdk_call():
+    time.sleep(0.3)  # stands in for a sync SDK call made from a coroutine
+
+async def handler():
+    blocking_sdk_call()
+
+def test_blocking_call_site_is_reported():
+    """A sync call on the loop is caught as a stall with its stack; awaiting does not count as lag"""
+    print("🐢 Testing event-loop lag monitor")
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+    lag_before, stalls_before = loop_lag.count(), loop_stalls.value()
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.2)
+        quiet = monitor.snapshot()
+        await handler()
+        await asyncio.sleep(0.05)
+        return quiet, monitor.snapshot()
+
+    try:
+        quiet, after = asyncio.run(scenario())
+    finally:
+        monitor.stop()
+
+    assert quiet["stalls"] == 0 and quiet["current_lag_ms"] < 100
+    assert after["stalls"] == 1 and loop_stalls.value() == stalls_before + 1
+    [stall] = after["recent_stalls"]
+    assert 250 <= stall["lag_ms"] < 1000, stall["lag_ms"]
+    assert stall["site"].startswith("test_loop_monitor.py:") and stall["site"].endswith("in blocking_sdk_call")
+    assert any("in handler" in line for line in stall["stack"])
+    assert any("time.sleep(0.3)" in line for line in stall["stack"])
+    assert after["blocking_sites"] == [{"site": stall["site"], "stalls": 1}]
+    assert loop_lag.count() - lag_before >= 10
+    print(f"✅ Stall of {stall['lag_ms']:.0f}ms traced to {stall['site']}")
+
+def test_current_lag_while_blocked():
+    """While the loop is stuck, current_lag reports how overdue it is, for health checks"""
+    print("⏱️ Testing current lag")
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    seen = []
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.2:
+            seen.append(monitor.current_lag())
+            time.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        monitor.stop()
+    assert max(seen) >= 0.15, max(seen)
+    assert monitor.current_lag() < 0.05
+    assert monitor.snapshot()["max_lag_ms"] >= 150
+    print(f"✅ Current lag peaked at {max(seen) * 1000:.0f}ms and recovered")
+
+if __name__ == "__main__":
+    test_blocking_call_site_is_reported()
+    test_current_lag_while_blocked()
+    print("\n🎉 All loop monitor tests passed!")
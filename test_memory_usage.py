@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for memory accounting and tracemalloc snapshot diffs
+Sizes local stores and a deliberate leak, no API keys needed
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.memory_usage import MemoryAccountant, deep_sizeof
+from services.recording_writer import BufferedRecordingWriter
+
+LEAKED = []
+
+def leak(n):
+    for _ in range(n):
+        LEAKED.append(bytearray(1024))
+
+def test_stores_and_connections_are_sized():
+    """Registered stores and open connections are sized; closed connections drop out"""
+    print("📦 Testing memory accounting")
+    sessions = {}
+    accountant = MemoryAccountant()
+    accountant.register("chat_sessions", sessions)
+    accountant.register("backlog", callback=lambda: 4096)
+    empty = accountant.report()["stores"]["chat_sessions"]["bytes"]
+
+    for i in range(50):
+        sessions[f"session-{i}"] = [{"role": "user", "content": f"{i:04d}" + "x" * 1000}]
+    report = accountant.report()
+    assert report["stores"]["chat_sessions"]["items"] == 50
+    assert report["stores"]["chat_sessions"]["bytes"] - empty >= 50 * 1000
+    assert report["stores"]["backlog"] == {"bytes": 4096, "exact": True}
+
+    recorder = BufferedRecordingWriter("/tmp/unused.wav", buffer_bytes=10 ** 9)
+    for _ in range(20):
+        recorder.write(os.urandom(3200))
+    handle = accountant.track_connection("ws-1", recorder=recorder, transcriber=None)
+    connections = accountant.report()["connections"]
+    assert connections["open"] == 1 and connections["bytes"] >= 64000
+    assert list(connections["largest"][0]["parts"]) == ["recorder"]
+    accountant.untrack_connection(handle)
+    assert accountant.report()["connections"] == {"open": 0, "bytes": 0, "largest": []}
+
+    # A shared object is counted once, and the walk stops at the cap
+    chunk = b"\0" * 10000
+    assert deep_sizeof([chunk, chunk])[0] < 2 * 10000
+    assert deep_sizeof(list(range(1000)), max_objects=100)[2] is True
+    print(f"✅ 50 sessions sized at {report['stores']['chat_sessions']['bytes']} bytes")
+
+def test_snapshot_diff_points_at_leaking_line():
+    """Diffing two snapshots ranks the allocating module:line first"""
+    print("🔎 Testing tracemalloc snapshot diff")
+    accountant = MemoryAccountant(trace_frames=3, snapshots_kept=2)
+    try:
+        base = accountant.take_snapshot()
+        assert base["tracing_started"] is True
+        leak(2000)
+        diff = accountant.diff(base["id"])
+        top = diff["grew"][0]
+        assert top["where"] == f"test_memory_usage:{leak.__code__.co_firstlineno + 2}", top
+        assert top["size_diff_bytes"] >= 2000 * 1024 and top["count_diff"] >= 2000
+
+        by_traceback = accountant.diff(base["id"], diff["target"], group_by="traceback")
+        assert by_traceback["grew"][0]["traceback"][-1] == top["where"]
+        try:
+            accountant.diff(base["id"], group_by="module")
+            assert False, "bad group_by accepted"
+        except ValueError:
+            pass
+        accountant.take_snapshot()  # only two snapshots are kept
+        try:
+            accountant.diff(base["id"])
+            assert False, "dropped snapshot still found"
+        except KeyError:
+            pass
+    finally:
+        accountant.stop_tracing()
+        LEAKED.clear()
+    assert accountant.tracing_status() == {"tracing": False, "snapshots": []}
+    print(f"✅ Leak traced to {top['where']} (+{top['size_diff_bytes']} bytes)")
+
+if __name__ == "__main__":
+    test_stores_and_connections_are_sized()
+    test_snapshot_diff_points_at_leaking_line()
+    print("\n🎉 All memory accounting tests passed!")
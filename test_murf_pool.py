@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled Murf REST client
+Runs against the local TLS Murf stand-in, no API keys needed
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.tts as tts
+from services.tts import MurfHTTPClient
+from mocks.murf_server import MockMurfServer
+
+HEADERS = {"api-key": "test-key", "Content-Type": "application/json"}
+PAYLOAD = {"voiceId": "en-US-marcus", "text": "Hello", "format": "mp3"}
+
+def test_sync_session_reuses_connection():
+    """Sequential sync calls share one TLS connection"""
+    print("🔌 Testing sync connection reuse")
+    server = MockMurfServer()
+    server.start()
+    try:
+        client = MurfHTTPClient(verify=server.cert_file)
+        for _ in range(5):
+            assert client.post(server.url, json=PAYLOAD, headers=HEADERS).status_code == 200
+        stats = client.stats()["sync"]
+        assert server.connections == 1
+        assert stats["requests"] == 5 and stats["connections_opened"] == 1 and stats["reuse_ratio"] == 0.8
+        client.close()
+    finally:
+        server.stop()
+    print("✅ 5 sync requests over 1 connection")
+
+def test_async_client_reuses_connection():
+    """Sequential async calls share one TLS connection and are counted"""
+    print("⚡ Testing async connection reuse")
+    server = MockMurfServer()
+    server.start()
+    try:
+        client = MurfHTTPClient(verify=server.cert_file)
+
+        async def run():
+            codes = [(await client.apost(server.url, json=PAYLOAD, headers=HEADERS)).status_code
+                     for _ in range(5)]
+            await client.aclose()
+            return codes
+
+        assert asyncio.run(run()) == [200] * 5
+        stats = client.stats()["async"]
+        assert server.connections == 1
+        assert stats["requests"] == 5 and stats["connections_opened"] == 1
+    finally:
+        server.stop()
+    print("✅ 5 async requests over 1 connection")
+
+def test_murf_tts_uses_pool():
+    """murf_tts and murf_tts_async return the audio URL through the shared client"""
+    print("🔊 Testing murf_tts through the pool")
+    server = MockMurfServer()
+    server.start()
+    saved = (tts.murf_http, tts.MURF_TTS_ENDPOINT, os.environ.get("MURF_API_KEY"))
+    try:
+        tts.murf_http = MurfHTTPClient(verify=server.cert_file)
+        tts.MURF_TTS_ENDPOINT = server.url
+        os.environ["MURF_API_KEY"] = "test-key"
+        assert tts.murf_tts("Hello there").endswith(".mp3")
+        assert asyncio.run(tts.murf_tts_async("Hello again")).endswith(".mp3")
+        assert server.texts == ["Hello there", "Hello again"]
+        tts.murf_http.close()
+    finally:
+        tts.murf_http, tts.MURF_TTS_ENDPOINT = saved[0], saved[1]
+        if saved[2] is None:
+            os.environ.pop("MURF_API_KEY", None)
+        else:
+            os.environ["MURF_API_KEY"] = saved[2]
+        server.stop()
+    print("✅ Audio URLs returned")
+
+if __name__ == "__main__":
+    test_sync_session_reuses_connection()
+    test_async_client_reuses_connection()
+    test_murf_tts_uses_pool()
+    print("\n🎉 All Murf pool tests passed!")
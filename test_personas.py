@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the persona registry
+Uses temporary config files, no API keys needed
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.personas import PersonaRegistry, persona_registry
+from services.tools import TOOL_INSTRUCTIONS
+
+def write_config(path, personas, default="default"):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"default_persona": default, "personas": personas}, fh)
+
+def test_bundled_config():
+    """The shipped config defines every persona with a voice and pre-assembled prompts"""
+    print("🎭 Testing bundled persona config")
+    assert set(persona_registry.names()) >= {"default", "pirate", "robot", "cowboy"}
+    pirate = persona_registry.get("pirate")
+    assert pirate.system_message.startswith("System: You are a pirate captain!")
+    assert pirate.system_message.endswith(TOOL_INSTRUCTIONS)
+    assert "web search" not in pirate.plain_system_message
+    assert pirate.voice_id and pirate.system_tokens > pirate.plain_system_tokens > 0
+    assert persona_registry.get("no-such-persona").name == "default"
+    assert {"weather", "news", "joke"} <= set(persona_registry.get().replies)
+    print("✅ Bundled personas loaded")
+
+def test_hot_reload():
+    """Edits to the config file are picked up without a restart; broken edits are ignored"""
+    print("🔄 Testing hot reload")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "personas.json")
+        write_config(path, {"default": {"prompt": "Be brief.", "voice_id": "en-US-marcus"}})
+        registry = PersonaRegistry(path, check_interval=0, tool_instructions="TOOLS")
+        assert registry.get().system_message == "System: Be brief.\n\nTOOLS"
+        assert "wizard" not in registry
+
+        write_config(path, {"default": {"prompt": "Be brief."},
+                            "wizard": {"prompt": "You are a wizard.", "voice_id": "en-UK-theo"}})
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        assert "wizard" in registry
+        assert registry.get("wizard").voice_id == "en-UK-theo"
+        assert registry.reloads == 2
+
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("{not json")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert registry.get("wizard").plain_system_message == "System: You are a wizard."
+        assert registry.reloads == 2
+    print("✅ Hot reload works")
+
+def test_lookup_is_cheap():
+    """Per-turn prompt lookup does no string assembly or file access"""
+    print("⚡ Testing lookup cost")
+    registry = PersonaRegistry(check_interval=60)
+    first = registry.get("robot").system_message
+    start = time.perf_counter()
+    for _ in range(10000):
+        message = registry.get("robot").system_message
+    elapsed = time.perf_counter() - start
+    assert message is first
+    assert elapsed < 0.5
+    print(f"✅ 10k lookups in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    test_bundled_config()
+    test_hot_reload()
+    test_lookup_is_cheap()
+    print("\n🎉 All persona registry tests passed!")
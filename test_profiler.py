@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-demand CPU profiler and admin token check
+Profiles a busy thread in this process, no API keys needed
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+import services.admin_auth as admin_auth
+from services.profiler import ProfilerBusy, SamplingProfiler
+
+def spin_hot_loop(stop):
+    n = 0
+    while not stop.is_set():
+        n += sum(i * i for i in range(200))
+
+def test_collapsed_stacks_and_no_overlap():
+    """A busy thread dominates the collapsed stacks, idle waits are dropped, and a second capture is refused"""
+    print("🔥 Testing sampling profiler")
+    profiler = SamplingProfiler(interval=0.005, max_seconds=5)
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_hot_loop, args=(stop,), name="hot-worker")
+    worker.start()
+    errors = []
+
+    def overlapping():
+        time.sleep(0.1)
+        try:
+            profiler.capture(0.1)
+        except ProfilerBusy as e:
+            errors.append(e)
+
+    late = threading.Thread(target=overlapping)
+    late.start()
+    try:
+        result = profiler.capture(0.5)
+    finally:
+        stop.set()
+        worker.join()
+        late.join()
+
+    assert len(errors) == 1 and not profiler.running
+    lines = result["collapsed"].splitlines()
+    assert result["samples"] >= 50 and result["stacks"] == len(lines)
+    counts = {}
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        counts[stack] = int(count)
+    hot = sum(c for s, c in counts.items() if s.startswith("hot-worker;") and "spin_hot_loop (test_profiler.py:" in s)
+    assert hot >= result["samples"] * 0.8, (hot, result["samples"])
+    # The waiting main thread (joining the capture) and parked threads are not reported
+    assert not any(s.rsplit(";", 1)[-1].startswith(("wait (threading.py", "_wait_for_tstate_lock")) for s in counts)
+    assert result["overhead"] < 0.5
+    assert profiler.snapshot()["captures"] == 1
+    print(f"✅ {result['samples']} samples, {hot} in the hot loop, overhead {result['overhead']:.1%}")
+
+def test_admin_token():
+    """Admin endpoints are off without ADMIN_TOKEN and need the exact token otherwise"""
+    print("🔐 Testing admin token check")
+    saved = admin_auth.ADMIN_TOKEN
+    try:
+        admin_auth.ADMIN_TOKEN = None
+        try:
+            admin_auth.require_admin(authorization="Bearer anything", x_admin_token=None)
+            assert False, "admin endpoints should be disabled"
+        except HTTPException as e:
+            assert e.status_code == 503
+
+        admin_auth.ADMIN_TOKEN = "s3cret"
+        admin_auth.require_admin(authorization="Bearer s3cret", x_admin_token=None)
+        admin_auth.require_admin(authorization=None, x_admin_token="s3cret")
+        for authorization, header in (("Bearer wrong", None), (None, None), ("Basic s3cret", None)):
+            try:
+                admin_auth.require_admin(authorization=authorization, x_admin_token=header)
+                assert False, "wrong token accepted"
+            except HTTPException as e:
+                assert e.status_code == 401
+    finally:
+        admin_auth.ADMIN_TOKEN = saved
+    print("✅ Admin token enforced")
+
+if __name__ == "__main__":
+    test_collapsed_stacks_and_no_overlap()
+    test_admin_token()
+    print("\n🎉 All profiler tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the client-side token-bucket rate limiter
+Uses a fake clock and short real waits, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.rate_limiter import RateLimiterRegistry, RateLimitExceeded, TokenBucket
+from services.deadlines import turn_deadline
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_bucket_reservations():
+    """Burst is free, then waiters get consecutive slots; long waits are rejected without a slot"""
+    print("🪣 Testing token bucket reservations")
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, burst=2, clock=clock)
+    assert [bucket.reserve(5), bucket.reserve(5)] == [0.0, 0.0]
+    assert bucket.reserve(5) == 1.0 and bucket.reserve(5) == 2.0
+    try:
+        bucket.reserve(2.5)
+        assert False, "expected RateLimitExceeded"
+    except RateLimitExceeded:
+        pass
+    clock.now = 10  # refilled, but never beyond the burst
+    assert bucket.snapshot()["tokens"] == 2.0
+    assert bucket.snapshot()["rejected"] == 1
+    print("✅ Slots handed out in order")
+
+def test_fifo_queue_and_throttle():
+    """Concurrent waiters are served in arrival order at the configured rate; a 429 pauses the bucket"""
+    print("🚦 Testing fair queueing")
+    bucket = TokenBucket(rate=20.0, burst=1)
+
+    async def run():
+        finished = []
+
+        async def request(i):
+            await bucket.acquire_async(max_wait=5)
+            finished.append((i, time.perf_counter()))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(6)))
+        return finished, start
+
+    finished, start = asyncio.run(run())
+    assert [i for i, _ in finished] == list(range(6))
+    assert 0.22 < finished[-1][1] - start < 0.4  # five waits of 50ms
+
+    bucket.throttle(retry_after=0.3)
+    start = time.perf_counter()
+    bucket.acquire(max_wait=5)
+    assert time.perf_counter() - start >= 0.28
+    assert bucket.snapshot()["throttled"] == 1
+    print("✅ FIFO order at 20 requests/s")
+
+def test_registry_per_key_and_turn_budget():
+    """Each key has its own bucket, keys are not exposed, and waits never exceed the turn budget"""
+    print("🔑 Testing per-key buckets")
+    registry = RateLimiterRegistry()
+    assert registry.bucket("murf", "key-a") is not registry.bucket("murf", "key-b")
+    assert registry.bucket("murf", "key-a") is registry.bucket("murf", "key-a")
+    snapshot = registry.snapshot()
+    assert len(snapshot["murf"]) == 2 and "key-a" not in str(snapshot)
+
+    bucket = registry.bucket("tavily", "key-a")
+    bucket.rate, bucket.burst = 1.0, 1
+    registry.acquire("tavily", "key-a")
+    with turn_deadline(0.2):
+        start = time.perf_counter()
+        try:
+            registry.acquire("tavily", "key-a")
+            assert False, "expected RateLimitExceeded"
+        except RateLimitExceeded:
+            pass
+        assert time.perf_counter() - start < 0.05
+    print("✅ Rejected early instead of overrunning the turn")
+
+if __name__ == "__main__":
+    test_bucket_reservations()
+    test_fifo_queue_and_throttle()
+    test_registry_per_key_and_turn_budget()
+    print("\n🎉 All rate limiter tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached readiness probe
+Uses scripted reachability checks and local breakers, no API keys needed
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.circuit_breaker import CircuitBreakerRegistry
+from services.key_pool import APIKeyPool, APIKeyPoolRegistry
+from services.readiness import ReadinessCache, tcp_probe
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_cache(down=(), lag=0.0):
+    probes = []
+
+    async def probe(host, port, timeout):
+        probes.append((host, port))
+        if host in down:
+            raise ConnectionRefusedError("connection refused")
+
+    keys = APIKeyPoolRegistry()
+    for provider in ("murf", "assemblyai", "gemini"):
+        keys._pools[provider] = APIKeyPool(provider, ["test-key"])
+    keys._pools["tavily"] = APIKeyPool("tavily", [])
+    clock = FakeClock()
+    cache = ReadinessCache(
+        probe_urls={"murf": "https://murf.test/v1/speech", "assemblyai": "wss://aai.test:8443/v3/ws",
+                    "gemini": "https://gemini.test", "tavily": "https://tavily.test"},
+        required=["murf", "assemblyai", "gemini"], refresh_secs=10,
+        breakers=CircuitBreakerRegistry(min_calls=1, clock=clock),
+        keys=keys, loop_lag=lambda: lag, probe=probe, clock=clock)
+    return cache, probes, clock
+
+def test_verdict_from_cached_checks():
+    """Providers are probed only by the refresher; status reflects reachability, breakers, lag and queues"""
+    print("🩺 Testing readiness verdict")
+    cache, probes, clock = make_cache()
+    assert cache.status()["status"] == "not_ready"  # nothing checked yet
+
+    asyncio.run(cache.refresh_once())
+    assert sorted(probes) == [("aai.test", 8443), ("gemini.test", 443), ("murf.test", 443), ("tavily.test", 443)]
+    for _ in range(100):
+        result = cache.status()
+    assert len(probes) == 4  # probes never fan out to providers
+    assert result["status"] == "ready" and result["reasons"] == [] and result["degraded"] == []
+    assert result["providers"]["tavily"]["configured"] is False  # optional and off, not degraded
+
+    cache._breakers.get("murf").record_failure()
+    depth = {"n": 0}
+    cache.register_queue("executor_backlog", lambda: depth["n"], limit=5)
+    assert cache.status()["reasons"] == ["murf: circuit open"]
+    cache._breakers.get("murf").reset()
+    depth["n"] = 6
+    result = cache.status()
+    assert result["status"] == "not_ready" and result["reasons"] == ["executor_backlog queue depth 6"]
+    assert result["queues"] == {"executor_backlog": {"depth": 6, "limit": 5}}
+
+    clock.now += 31
+    assert cache.status()["reasons"][0] == "provider checks are stale (31s old)"
+    print("✅ Readiness verdict follows cached state")
+
+def test_unreachable_and_degraded():
+    """A required provider that is down makes the worker not ready; an optional one only degrades it"""
+    print("🔌 Testing unreachable providers")
+    cache, _, _ = make_cache(down=("gemini.test",), lag=2.5)
+    asyncio.run(cache.refresh_once())
+    result = cache.status()
+    assert result["status"] == "not_ready"
+    assert result["reasons"] == ["gemini: unreachable", "event loop lag 2500ms"]
+    assert "ConnectionRefusedError" in result["providers"]["gemini"]["error"]
+
+    cache, _, _ = make_cache(down=("tavily.test",))
+    cache._keys._pools["tavily"] = APIKeyPool("tavily", ["test-key"])
+    asyncio.run(cache.refresh_once())
+    result = cache.status()
+    assert result["status"] == "degraded" and result["degraded"] == ["tavily"]
+
+    async def real_probe():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        await tcp_probe("127.0.0.1", port, 1.0)
+        server.close()
+        await server.wait_closed()
+        try:
+            await tcp_probe("127.0.0.1", port, 1.0)
+            return False
+        except OSError:
+            return True
+
+    assert asyncio.run(real_probe())
+    print("✅ Unreachable providers reported")
+
+if __name__ == "__main__":
+    test_verdict_from_cached_checks()
+    test_unreachable_and_degraded()
+    print("\n🎉 All readiness tests passed!")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the recording store
+Checks quotas, retention, compression and the index without touching uploads/
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.recording_store import RecordingStore, INDEX_FILENAME
+
+def _write(store, path, data):
+    if store.reserve(path, len(data)):
+        with open(path, "ab") as fh:
+            fh.write(data)
+        return True
+    return False
+
+def test_session_and_global_quota():
+    """Writes past the session or global quota are rejected"""
+    print("🧪 Testing recording quotas")
+    with tempfile.TemporaryDirectory() as root:
+        store = RecordingStore(root=root, session_quota_bytes=100, global_quota_bytes=150)
+        path = store.start_recording("session_a")
+        assert _write(store, path, b"x" * 80)
+        assert not _write(store, path, b"x" * 40), "session quota not enforced"
+
+        other = store.start_recording("session_b")
+        assert _write(store, other, b"x" * 60)
+        assert not _write(store, other, b"x" * 20), "global quota not enforced"
+        assert store.usage()["total_bytes"] == 140
+    print("✅ Quotas enforced")
+
+def test_retention_and_index():
+    """Expired recordings are removed using only the index"""
+    print("\n🧪 Testing retention cleanup")
+    with tempfile.TemporaryDirectory() as root:
+        store = RecordingStore(root=root, retention_secs=60)
+        path = store.start_recording("session_a")
+        _write(store, path, b"audio")
+        store.finish_recording(path)
+        assert os.path.exists(os.path.join(root, INDEX_FILENAME))
+
+        assert store.cleanup(now=time.time() + 10)["removed_files"] == 0
+        result = store.cleanup(now=time.time() + 120)
+        assert result == {"removed_files": 1, "removed_bytes": 5}
+        assert not os.path.exists(path)
+        assert store.list_session("session_a") == []
+    print("✅ Retention cleanup works")
+
+def test_bootstrap_from_existing_tree():
+    """A missing index is rebuilt from the files already on disk"""
+    print("\n🧪 Testing index bootstrap")
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "session_old"))
+        with open(os.path.join(root, "session_old", "streaming_audio_1.bin"), "wb") as fh:
+            fh.write(b"x" * 10)
+        store = RecordingStore(root=root)
+        files = store.list_session("old")
+        assert len(files) == 1 and files[0]["size_bytes"] == 10
+    print("✅ Index bootstrapped")
+
+def test_unfinished_after_crash_and_sanitized_ids():
+    """Recordings never finished by a dead process expire; sanitized session ids list and delete"""
+    print("\n🧪 Testing crash recovery and sanitized session ids")
+    with tempfile.TemporaryDirectory() as root:
+        store = RecordingStore(root=root, retention_secs=60)
+        finished = store.start_recording("session_b")
+        _write(store, finished, b"y" * 10)
+        store.finish_recording(finished)
+        orphan = store.start_recording("user@example.com")
+        with open(orphan, "wb") as fh:
+            fh.write(b"x" * 30)
+        # The process "crashes" mid-recording; only start_recording saved the orphan's index entry
+
+        restarted = RecordingStore(root=root, retention_secs=60)
+        files = restarted.list_session("user@example.com")
+        assert len(files) == 1 and files[0]["finished"] and files[0]["size_bytes"] == 30
+        assert restarted.usage()["total_bytes"] == 40
+        result = restarted.cleanup(now=time.time() + 120)
+        assert result == {"removed_files": 2, "removed_bytes": 40}
+        assert not os.path.exists(orphan)
+
+        path = restarted.start_recording("a/b c")
+        _write(restarted, path, b"z" * 5)
+        assert len(restarted.list_session("a/b c")) == 1
+        assert restarted.delete_session("a/b c") == 5
+        assert restarted.list_session("a/b c") == [] and not os.path.exists(path)
+    print("✅ Orphaned recordings expire and sanitized ids resolve")
+
+def test_compression_and_disabled():
+    """Finished recordings are gzipped; disabled stores record nothing"""
+    print("\n🧪 Testing compression and disabled mode")
+    with tempfile.TemporaryDirectory() as root:
+        store = RecordingStore(root=root, compress=True)
+        path = store.start_recording("session_a")
+        _write(store, path, b"\x00" * 4096)
+        store.finish_recording(path)
+        store._executor.shutdown(wait=True)
+        files = store.list_session("session_a")
+        assert files[0]["compressed"] and files[0]["filename"].endswith(".bin.gz")
+        assert files[0]["size_bytes"] < 4096
+        assert os.path.exists(path + ".gz") and not os.path.exists(path)
+
+        disabled = RecordingStore(root=root, enabled=False)
+        assert disabled.start_recording("session_a") is None
+    print("✅ Compression and disabled mode work")
+
+if __name__ == "__main__":
+    test_session_and_global_quota()
+    test_retention_and_index()
+    test_bootstrap_from_existing_tree()
+    test_unfinished_after_crash_and_sanitized_ids()
+    test_compression_and_disabled()
+    print("\n🎉 All recording store tests passed!")
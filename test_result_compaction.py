@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for search result compaction
+Uses canned Tavily-style results, no API keys needed
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.result_compaction import (CompactionStats, compact_results, dedupe_results,
+                                        relevant_sentences, query_terms)
+from services.tokens import estimate_tokens
+
+RESULTS = [
+    {"title": "SpaceX launches Starship", "url": "https://example.com/a", "score": 0.72,
+     "content": "Subscribe to our newsletter. SpaceX launched Starship from Texas on Tuesday. "
+                "The rocket reached orbit for the first time. Cookies help us deliver our services."},
+    {"title": "Starship reaches orbit", "url": "https://mirror.example.org/a", "score": 0.41,
+     "content": "Subscribe to our newsletter. SpaceX launched Starship from Texas on Tuesday! "
+                "The rocket reached orbit for the first time. Cookies help us deliver our services."},
+    {"title": "NASA budget news", "url": "https://example.com/b", "score": 0.93,
+     "content": "Congress approved the NASA budget. The budget funds the Artemis moon program. "
+                "Analysts expect delays. Read more below."},
+]
+
+def test_dedupe_and_rank():
+    """Near-identical snippets collapse to the best-scored one; order follows score"""
+    print("🧹 Testing dedupe and ranking")
+    kept = dedupe_results(RESULTS)
+    assert [r["title"] for r in kept] == ["NASA budget news", "SpaceX launches Starship"]
+    print("✅ Duplicates dropped")
+
+def test_relevant_sentences():
+    """The sentences that mention the query survive, boilerplate does not"""
+    print("🎯 Testing sentence selection")
+    picked = relevant_sentences(RESULTS[0]["content"], query_terms("starship launch orbit"), 2)
+    assert picked == ["SpaceX launched Starship from Texas on Tuesday.",
+                      "The rocket reached orbit for the first time."]
+    print("✅ Relevant sentences kept in order")
+
+def test_budget_and_savings():
+    """Output fits the token budget, drops URLs, and is much smaller than the old format"""
+    print("📉 Testing token budget")
+    stats = CompactionStats()
+    text = compact_results(RESULTS, "starship orbit", heading="Here's what I found:", stats=stats)
+    assert "http" not in text and "Cookies" not in text
+    assert text.splitlines()[1].startswith("- NASA budget news:")
+
+    old = "Here's what I found:\n\n"
+    for i, result in enumerate(RESULTS, 1):
+        old += f"{i}. {result['title']}\n   {result['content'][:200]}...\n   Source: {result['url']}\n\n"
+    assert estimate_tokens(text) < estimate_tokens(old) * 0.7
+
+    tight = compact_results(RESULTS, "starship", token_budget=20, stats=stats)
+    assert estimate_tokens(tight) <= 20 and tight.startswith("- NASA budget news")
+    snapshot = stats.snapshot()
+    assert snapshot["calls"] == 2 and snapshot["saved_ratio"] > 0.3
+    print(f"✅ {estimate_tokens(old)} -> {estimate_tokens(text)} tokens")
+
+if __name__ == "__main__":
+    test_dedupe_and_rank()
+    test_relevant_sentences()
+    test_budget_and_savings()
+    print("\n🎉 All result compaction tests passed!")
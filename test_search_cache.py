@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the search cache and popular-query refresher
+Uses fake fetchers and the local mock Tavily server, no API keys needed
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.search_cache import SearchCache, SearchRefresher
+from services.web_search_async import AsyncWebSearchService
+from mocks.tavily_server import MockTavilyServer
+
+def fake_results(query, n):
+    return [{"title": f"{query} {i}", "url": f"https://example.com/{i}", "content": query, "score": 1 - i / 10}
+            for i in range(n)]
+
+def test_cache_ttl_and_sizes():
+    """Fresh entries serve equal or smaller requests and expire after the TTL"""
+    print("🗄️ Testing cache TTL")
+    cache = SearchCache(ttl=100)
+    assert cache.get("news", "Tech", 5, now=0) is None
+    cache.put("news", "tech", 5, fake_results("tech", 5), now=0)
+    assert len(cache.get("news", " TECH ", 3, now=50)) == 3
+    assert cache.get("news", "tech", 8, now=50) is None
+    assert cache.get("news", "tech", 5, now=101) is None
+    snapshot = cache.snapshot()
+    assert snapshot["hits"] == 1 and snapshot["misses"] == 3
+    print("✅ TTL and result counts respected")
+
+def test_refresh_popular_within_budget():
+    """Only popular entries near expiry are refreshed, most popular first, within the budget"""
+    print("🔥 Testing popular-query refresh")
+    cache = SearchCache(ttl=600, half_life=3600)
+    for _ in range(5):
+        cache.get("weather", "London", 1, now=0)
+    for _ in range(3):
+        cache.get("news", "sports", 5, now=0)
+    cache.get("news", "knitting", 5, now=0)  # asked once, not worth a call
+
+    fetched = []
+
+    async def fetch(query, n):
+        fetched.append(query)
+        return fake_results(query, n)
+
+    refresher = SearchRefresher(cache, fetch, budget_per_hour=3)
+    assert asyncio.run(refresher.refresh_once(now=10)) == 2
+    assert fetched == ["current weather in london", "latest news about sports"]
+    assert cache.get("weather", "london", 1, now=20) is not None
+
+    # Nothing is due until entries approach expiry
+    assert asyncio.run(refresher.refresh_once(now=100)) == 0
+    assert asyncio.run(refresher.refresh_once(now=500)) == 1
+    assert refresher.budget_skips == 1 and refresher.budget_left(now=500) == 0
+    assert refresher.budget_left(now=4200) == 3
+    print(f"✅ Refreshed {fetched}")
+
+def test_service_serves_hot_results():
+    """Repeated news and weather lookups hit Tavily once"""
+    print("♨️ Testing cached service lookups")
+    server = MockTavilyServer(latency=0.0)
+    server.start()
+    try:
+        service = AsyncWebSearchService(api_key="test-key", base_url=server.url, cache=SearchCache())
+
+        async def run():
+            for _ in range(3):
+                await service.get_weather_info("Paris")
+                await service.get_latest_news("space", 3)
+            merged = await service.get_news_many(["space", "music"], 3)
+            await service.aclose()
+            return merged
+
+        merged = asyncio.run(run())
+        assert server.requests == 3 and merged
+    finally:
+        server.stop()
+    print("✅ 3 Tavily calls for 8 lookups")
+
+if __name__ == "__main__":
+    test_cache_ttl_and_sizes()
+    test_refresh_popular_within_budget()
+    test_service_serves_hot_results()
+    print("\n🎉 All search cache tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for realtime streaming STT
+Runs against the local AssemblyAI stand-in, no API key or network needed
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.stt_streaming import StreamingTranscriber
+from mocks.assemblyai_realtime import MockRealtimeSTTServer
+
+CHUNK = b"\x00\x00" * 1600  # 100ms of 16kHz PCM
+
+async def _transcribe(server, chunks, force_endpoint=False):
+    url = await server.start()
+    events = []
+
+    async def on_transcript(event):
+        events.append(event)
+
+    transcriber = StreamingTranscriber(on_transcript=on_transcript, api_key="test-key", url=url)
+    try:
+        await transcriber.connect()
+        for _ in range(chunks):
+            await transcriber.send_audio(CHUNK)
+        if force_endpoint:
+            await transcriber.force_endpoint()
+        await asyncio.sleep(0.2)
+    finally:
+        await transcriber.close()
+        await server.stop()
+    return events
+
+def test_partials_then_final():
+    """Partials grow word by word, then one formatted final with timestamps"""
+    print("🎤 Testing streaming partial and final transcripts")
+    server = MockRealtimeSTTServer(utterances=["what is the weather"], silence_chunks=2)
+    events = asyncio.run(_transcribe(server, chunks=6))
+
+    partials = [e for e in events if not e.is_final]
+    finals = [e for e in events if e.is_final]
+    assert [e.text for e in partials] == ["what", "what is", "what is the", "what is the weather"]
+    assert len(finals) == 1 and finals[0].text == "What is the weather."
+    assert finals[0].start_ms is not None and finals[0].end_ms > finals[0].start_ms
+    assert all(a.received_at <= b.received_at for a, b in zip(events, events[1:]))
+    print("✅ Partial and final transcripts received")
+
+def test_force_endpoint_finalizes_immediately():
+    """ForceEndpoint yields the final transcript without waiting for silence"""
+    print("\n🎤 Testing forced endpoint")
+    server = MockRealtimeSTTServer(utterances=["tell me a joke"], silence_chunks=100)
+    events = asyncio.run(_transcribe(server, chunks=4, force_endpoint=True))
+    assert events[-1].is_final and events[-1].text == "Tell me a joke."
+    print("✅ Forced endpoint produced a final transcript")
+
+def test_disabled_without_api_key():
+    """Without an API key the transcriber disables itself instead of failing"""
+    async def run():
+        transcriber = StreamingTranscriber(api_key="")
+        await transcriber.connect()
+        await transcriber.send_audio(CHUNK)
+        return transcriber.enabled
+    assert asyncio.run(run()) is False
+
+if __name__ == "__main__":
+    test_partials_then_final()
+    test_force_endpoint_finalizes_immediately()
+    test_disabled_without_api_key()
+    print("\n🎉 All streaming STT tests passed!")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test script for the parallel tool-execution engine
+Uses fake tools and a fake LLM provider, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.llm as llm
+from services.tools import (ToolCall, parse_tool_calls, strip_tool_calls,
+                            run_tool_calls, run_tool_calls_sync, ToolCallStreamParser)
+from services.llm_providers import HedgedLLMClient, LLMProvider
+
+def slow_tool(name, arguments):
+    time.sleep(arguments.get("delay", 0.2))
+    return f"{name} result for {arguments.get('query') or arguments.get('location')}"
+
+def test_parse_tool_calls():
+    """Tool directives are found, deduplicated and stripped from text"""
+    text = (
+        'TOOL_CALL: {"name": "get_weather", "arguments": {"location": "Paris"}}\n'
+        '`TOOL_CALL: {"name": "search_web", "arguments": {"query": "AI news"}}`\n'
+        'TOOL_CALL: {"name": "get_weather", "arguments": {"location": "Paris"}}\n'
+        'TOOL_CALL: {not json}\n'
+    )
+    calls = parse_tool_calls(text)
+    assert [c.name for c in calls] == ["get_weather", "search_web"]
+    assert calls[1].arguments == {"query": "AI news"}
+    assert strip_tool_calls("Hello\n" + text.splitlines()[0]) == "Hello"
+    assert parse_tool_calls("Just a normal answer.") == []
+
+def test_calls_run_in_parallel_with_timeouts():
+    """Three 0.2s tools take one wait, and a slow tool is cut off at its timeout"""
+    print("🛠️  Testing parallel tool execution")
+    calls = [ToolCall("search_web", {"query": q}) for q in ("a", "b", "c")]
+    calls.append(ToolCall("get_weather", {"location": "Oslo", "delay": 2}))
+    timeouts = {"get_weather": 0.3}
+
+    start = time.perf_counter()
+    results = asyncio.run(run_tool_calls(calls, slow_tool, timeouts))
+    async_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sync_results = run_tool_calls_sync(calls, slow_tool, timeouts)
+    sync_elapsed = time.perf_counter() - start
+
+    for batch, elapsed in ((results, async_elapsed), (sync_results, sync_elapsed)):
+        assert elapsed < 0.5, f"tools ran serially ({elapsed:.2f}s)"
+        assert [r.timed_out for r in batch] == [False, False, False, True]
+        assert batch[0].output == "search_web result for a"
+    print(f"✅ 4 tools finished in {async_elapsed:.2f}s (async) / {sync_elapsed:.2f}s (sync)")
+
+class FakeProvider(LLMProvider):
+    """Answers with scripted replies and records the conversations it was sent"""
+    name = "fake"
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.sent = []
+
+    def generate(self, conversation):
+        self.sent.append([dict(message) for message in conversation])
+        return self.replies.pop(0)
+
+def test_generate_llm_response_runs_tools():
+    """The model's tool requests are executed and the results fed back in one round"""
+    print("\n🛠️  Testing tool-calling loop in generate_llm_response")
+    provider = FakeProvider([
+        'TOOL_CALL: {"name": "get_weather", "arguments": {"location": "Paris"}}\n'
+        'TOOL_CALL: {"name": "get_latest_news", "arguments": {"topic": "space"}}',
+        "It's sunny in Paris, and a rocket launched today.",
+    ])
+    executed = []
+
+    def fake_execute(name, arguments):
+        executed.append(name)
+        return f"{name} ok"
+
+    saved = (llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call)
+    try:
+        llm.GEMINI_API_KEY = "test-key"
+        llm.llm_client = HedgedLLMClient(provider, hedging=False)
+        llm.execute_function_call = fake_execute
+        reply = llm.generate_llm_response([{"role": "user", "content": "Weather in Paris and space news?"}])
+    finally:
+        llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call = saved
+
+    assert reply == "It's sunny in Paris, and a rocket launched today."
+    assert sorted(executed) == ["get_latest_news", "get_weather"]
+    assert len(provider.sent) == 2
+    assert provider.sent[0][-1]["parts"] == ["Weather in Paris and space news?"]
+    assert provider.sent[1][-1]["parts"][0].startswith("Tool results:")
+    print("✅ Tools executed in one round")
+
+def test_stream_parser_detects_calls_early():
+    """Plain text passes through at once; a tool call is reported as soon as its JSON closes"""
+    print("\n🔎 Testing incremental tool-call parser")
+    parser = ToolCallStreamParser()
+    assert parser.feed("Sure, ") == ("Sure, ", [])
+    assert parser.feed("let me check.\nTOOL") == ("let me check.\n", [])
+    assert parser.feed('_CALL: {"name": "get_weather", "arguments": {"loca') == ("", [])
+    text, calls = parser.feed('tion": "Paris"}}')
+    assert text == "" and [c.arguments for c in calls] == [{"location": "Paris"}]
+    assert parser.saw_tool_call and not parser.done
+    assert parser.feed("\nOK here it is") == ("", [])
+    assert parser.done
+
+    parser = ToolCallStreamParser()
+    assert parser.feed("T") == ("", [])
+    assert parser.feed("oday is sunny") == ("Today is sunny", [])
+    assert parser.close() == ""
+    parser = ToolCallStreamParser()
+    parser.feed("TOOL")
+    assert parser.close() == "TOOL"
+    print("✅ Parser streams text and catches calls mid-stream")
+
+class FakeStreamProvider(LLMProvider):
+    """Streams scripted chunk lists, one per call, sleeping between chunks"""
+    name = "fake-stream"
+
+    def __init__(self, rounds, delay=0.1):
+        self.rounds = rounds
+        self.delay = delay
+        self.sent = []
+        self.yielded_at = []
+        self.exhausted = 0
+
+    def stream(self, conversation):
+        self.sent.append(conversation[-1]["parts"][0])
+        self.yielded_at.append([])
+        for chunk in self.rounds.pop(0):
+            self.yielded_at[-1].append(time.perf_counter())
+            yield chunk
+            time.sleep(self.delay)
+        self.exhausted += 1
+
+def test_streaming_response_starts_tools_early():
+    """Tools start while the model is still streaming, and their results drive a second round"""
+    print("\n🌊 Testing tool calls in generate_streaming_response")
+    provider = FakeStreamProvider([
+        ['TOOL_CALL: {"name": "get_weather", ', '"arguments": {"location": "Paris"}}', "\n",
+         'TOOL_CALL: {"name": "search_web", "arguments": {"query": "louvre hours"}}', "\n", "(waiting)"],
+        ["It's sunny ", "and the Louvre ", "opens at nine."],
+    ])
+    started = {}
+
+    async def fake_execute(name, arguments):
+        started[name] = time.perf_counter()
+        return f"{name} ok"
+
+    async def collect():
+        return [chunk async for chunk in llm.generate_streaming_response(
+            [{"role": "user", "content": "Weather in Paris and Louvre hours?"}])]
+
+    saved = (llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call_async)
+    try:
+        llm.GEMINI_API_KEY = "test-key"
+        llm.llm_client = HedgedLLMClient(provider)
+        llm.execute_function_call_async = fake_execute
+        chunks = asyncio.run(collect())
+    finally:
+        llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call_async = saved
+
+    assert "".join(chunks) == "It's sunny and the Louvre opens at nine."
+    assert set(started) == {"get_weather", "search_web"}
+    # The first tool began while the first round was still streaming...
+    assert provider.yielded_at[0][-1] - started["get_weather"] > 0.25
+    # ...and that round was abandoned once text followed the calls
+    assert provider.exhausted == 1
+    assert provider.sent[1].startswith("Tool results:") and "search_web ok" in provider.sent[1]
+    print("✅ Tools started mid-stream; tool-call text never reached the output")
+
+if __name__ == "__main__":
+    test_parse_tool_calls()
+    test_calls_run_in_parallel_with_timeouts()
+    test_generate_llm_response_runs_tools()
+    test_stream_parser_detects_calls_early()
+    test_streaming_response_starts_tools_early()
+    print("\n🎉 All tool engine tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for per-turn trace spans
+Uses a scripted LLM provider and a fake search service, no API keys needed
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.llm as llm
+import services.tracing as tracing
+from services.tracing import Tracer, current_span, span
+from services.llm_providers import HedgedLLMClient, LLMProvider
+
+class ScriptedStreamProvider(LLMProvider):
+    name = "trace-test"
+
+    def __init__(self, rounds):
+        self.rounds = list(rounds)
+
+    def stream(self, conversation):
+        for chunk in self.rounds.pop(0):
+            time.sleep(0.01)
+            yield chunk
+
+class FakeSearch:
+    async def get_weather_info(self, location):
+        await asyncio.sleep(0.05)
+        return [{"title": f"Weather in {location}", "url": "https://weather.example.com",
+                 "content": f"It is sunny in {location} today.", "score": 0.9}]
+
+def test_spans_nest_across_tasks_and_threads():
+    """Spans join the current turn from tasks and copied thread contexts; outside a turn they are no-ops"""
+    print("🧵 Testing span propagation")
+    tracer = Tracer(buffer_size=2)
+
+    def in_thread():
+        with span("thread_stage"):
+            time.sleep(0.01)
+
+    async def turn():
+        with tracer.trace_turn("demo_turn", "session-a"):
+            with span("outer", size=3):
+                await asyncio.create_task(asyncio.sleep(0.01))
+                with ThreadPoolExecutor(1) as pool:
+                    pool.submit(contextvars.copy_context().run, in_thread).result()
+            try:
+                with span("failing"):
+                    raise ValueError("provider down")
+            except ValueError:
+                pass
+
+    asyncio.run(turn())
+    with span("outside") as s:
+        assert s is tracing.NOOP_SPAN and current_span() is None
+
+    [summary] = tracer.recent()
+    trace = tracer.get(summary["trace_id"])
+    names = {s["name"]: s for s in trace["spans"]}
+    assert set(names) == {"demo_turn", "outer", "thread_stage", "failing"}
+    assert names["thread_stage"]["parent_id"] == names["outer"]["span_id"]
+    assert names["outer"]["parent_id"] == names["demo_turn"]["span_id"]
+    assert names["failing"]["status"] == "error" and names["failing"]["error"] == "provider down"
+    assert summary["session_id"] == "session-a" and summary["status"] == "error"
+    assert summary["stages_ms"]["outer"] >= 10
+
+    for i in range(3):
+        with tracer.trace_turn("demo_turn", f"session-{i}"):
+            pass
+    assert len(tracer.recent()) == 2  # ring buffer keeps the newest
+    assert [t["session_id"] for t in tracer.recent(session_id="session-2")] == ["session-2"]
+    print("✅ Spans nested and buffered")
+
+def test_streaming_turn_trace_and_otlp_export():
+    """A streamed reply traces each LLM round and the tool it started, and is exported as OTLP/JSON"""
+    print("📡 Testing streaming trace and export")
+    export_file = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    tracer = Tracer(buffer_size=10, export_file=export_file)
+    provider = ScriptedStreamProvider([
+        ['TOOL_CALL: {"name": "get_weather", "arguments": {"location": "Paris"}}', "\n"],
+        ["It is ", "sunny."],
+    ])
+
+    async def turn():
+        with tracer.trace_turn("ws_turn", "session-b"):
+            return [chunk async for chunk in llm.generate_streaming_response(
+                [{"role": "user", "content": "Weather in Paris?"}])]
+
+    saved = (llm.GEMINI_API_KEY, llm.llm_client, llm.async_web_search_service)
+    try:
+        llm.GEMINI_API_KEY = "test-key"
+        llm.llm_client = HedgedLLMClient(provider)
+        llm.async_web_search_service = FakeSearch()
+        chunks = asyncio.run(turn())
+    finally:
+        llm.GEMINI_API_KEY, llm.llm_client, llm.async_web_search_service = saved
+    assert "".join(chunks) == "It is sunny."
+
+    trace = tracer.get(tracer.recent()[0]["trace_id"])
+    spans = trace["spans"]
+    rounds = [s for s in spans if s["name"] == "llm.stream"]
+    [tool] = [s for s in spans if s["name"] == "tool.get_weather"]
+    assert [r["attributes"]["round"] for r in rounds] == [0, 1]
+    assert tool["parent_id"] == rounds[0]["span_id"] and tool["duration_ms"] >= 50
+    assert "Paris" in tool["attributes"]["arguments"]
+    assert [e["name"] for e in rounds[0]["events"]] == ["first_chunk", "tool_started"]
+
+    tracer._exporter.shutdown(wait=True)
+    with open(export_file) as f:
+        exported = json.loads(f.readline())
+    otlp_spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp_spans) == len(spans)
+    assert all(len(s["traceId"]) == 32 and len(s["spanId"]) == 16 for s in otlp_spans)
+    root = next(s for s in otlp_spans if "parentSpanId" not in s)
+    assert {"key": "session_id", "value": {"stringValue": "session-b"}} in root["attributes"]
+    assert int(root["endTimeUnixNano"]) > int(root["startTimeUnixNano"])
+    print(f"✅ {len(spans)} spans traced and exported")
+
+if __name__ == "__main__":
+    test_spans_nest_across_tasks_and_threads()
+    test_streaming_turn_trace_and_otlp_export()
+    print("\n🎉 All tracing tests passed!")
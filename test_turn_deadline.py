@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for end-to-end turn deadlines
+Uses scripted providers and tools, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.llm as llm
+from services.deadlines import turn_deadline, current_deadline, time_left, has_time
+from services.llm_providers import HedgedLLMClient, LLMProvider, stream_async
+from services.tools import ToolCall, run_tool_calls, run_tool_calls_sync
+
+class SlowStreamProvider(LLMProvider):
+    """Streams words with a fixed delay between them"""
+    name = "slow"
+
+    def __init__(self, replies, delay=0.1):
+        self.replies = list(replies)
+        self.delay = delay
+
+    def generate(self, conversation):
+        return self.replies.pop(0)
+
+    def stream(self, conversation):
+        for word in self.replies.pop(0).split(" "):
+            time.sleep(self.delay)
+            yield word + " "
+
+def test_deadline_follows_the_turn():
+    """The budget caps stage timeouts inside a turn, reaches tasks and threads, and is gone afterwards"""
+    print("⏳ Testing deadline propagation")
+    assert time_left(30) == 30 and has_time(1000)
+
+    async def turn():
+        with turn_deadline(2) as deadline:
+            in_task = await asyncio.create_task(asyncio.sleep(0, result=current_deadline()))
+            in_thread = await asyncio.to_thread(current_deadline)
+            return deadline, in_task, in_thread, time_left(30), has_time(5)
+
+    deadline, in_task, in_thread, left, enough = asyncio.run(turn())
+    assert in_task is deadline and in_thread is deadline
+    assert 1.5 < left <= 2 and not enough
+    assert current_deadline() is None
+    print("✅ Deadline visible in tasks and threads")
+
+def test_tools_bounded_by_budget():
+    """A slow tool is abandoned when the turn budget runs out, well before its own timeout"""
+    print("🛠️ Testing tool timeouts under a turn budget")
+    seen = []
+
+    def slow_tool(name, arguments):
+        seen.append(current_deadline())
+        time.sleep(1)
+        return "late"
+
+    with turn_deadline(0.2) as deadline:
+        start = time.perf_counter()
+        results = run_tool_calls_sync([ToolCall("search_web", {"query": "x"})], slow_tool)
+        elapsed = time.perf_counter() - start
+    assert results[0].timed_out and elapsed < 0.5
+    assert seen == [deadline]
+    print(f"✅ Tool cut off after {elapsed:.2f}s")
+
+    def steady_tool(name, arguments):
+        time.sleep(0.4)
+        return "done"
+
+    # Both finish well inside the budget; the later one must not lose the elapsed time twice
+    calls = [ToolCall("search_web", {"query": "a"}), ToolCall("search_web", {"query": "b"})]
+    with turn_deadline(0.7):
+        results = run_tool_calls_sync(calls, steady_tool)
+    assert [r.output for r in results] == ["done", "done"], results
+
+    async def run_async():
+        with turn_deadline(0.7):
+            return await run_tool_calls(calls, steady_tool)
+    assert [r.output for r in asyncio.run(run_async())] == ["done", "done"]
+    print("✅ Parallel tools get the whole budget once")
+
+def test_llm_degrades_instead_of_overrunning():
+    """Tools are skipped when the budget is nearly spent and a slow stream is cut short"""
+    print("✂️ Testing LLM degradation")
+    provider = SlowStreamProvider(['TOOL_CALL: {"name": "search_web", "arguments": {"query": "news"}}'])
+    executed = []
+    saved = (llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call)
+    try:
+        llm.GEMINI_API_KEY = "test-key"
+        llm.llm_client = HedgedLLMClient(provider)
+        llm.execute_function_call = lambda name, args: executed.append(name) or "results"
+        with turn_deadline(llm.TURN_TOOL_MIN_SECS / 2) as deadline:
+            reply = llm.generate_llm_response([{"role": "user", "content": "Any news?"}])
+    finally:
+        llm.GEMINI_API_KEY, llm.llm_client, llm.execute_function_call = saved
+    assert reply == llm.OUT_OF_TIME_REPLY and executed == []
+    assert "tools" in deadline.degraded
+
+    async def collect():
+        provider = SlowStreamProvider(["one two three four five six seven eight"], delay=0.1)
+        with turn_deadline(0.35) as deadline:
+            start = time.perf_counter()
+            chunks = [chunk async for chunk in stream_async(provider, [{"role": "user", "parts": ["hi"]}])]
+            return chunks, time.perf_counter() - start, deadline
+
+    chunks, elapsed, deadline = asyncio.run(collect())
+    assert 1 <= len(chunks) < 8 and elapsed < 0.5
+    assert deadline.degraded == {"llm": "reply cut short"}
+    print(f"✅ Reply cut to {''.join(chunks).strip()!r} after {elapsed:.2f}s")
+
+def test_stt_respects_budget():
+    """No upload once the budget is spent; a budget timeout neither trips the breaker nor pulls the file away"""
+    print("🎙️ Testing STT under a turn budget")
+    import threading
+    import services.stt as stt
+    from services.circuit_breaker import CircuitBreakerRegistry
+    from services.key_pool import APIKeyPool
+
+    uploads, finished = [], threading.Event()
+
+    class SlowTranscriber:
+        def __init__(self, api_key):
+            pass
+
+        def transcribe(self, path):
+            time.sleep(0.3)
+            with open(path, "rb") as f:
+                uploads.append(f.read())
+            finished.set()
+            return type("Transcript", (), {"error": None, "text": "late"})()
+
+    keys = APIKeyPool("assemblyai", ["test-key"])
+    breaker = CircuitBreakerRegistry(min_calls=1).get("assemblyai")
+    saved = stt.stt_keys, stt.stt_breaker, stt.aai.Transcriber
+    stt.stt_keys, stt.stt_breaker, stt.aai.Transcriber = keys, breaker, SlowTranscriber
+    try:
+        with turn_deadline(0) as deadline:
+            reply = stt.transcribe_audio(b"audio")
+        assert deadline.degraded == {"stt": "no turn budget left"}
+        assert "took too long" in reply and uploads == []
+        assert list(keys.snapshot().values())[0]["outstanding"] == 0
+
+        with turn_deadline(0.1):
+            reply = stt.transcribe_audio(b"audio")
+        assert "took too long" in reply
+        assert list(keys.snapshot().values())[0]["outstanding"] == 1, "key held until the upload ends"
+        assert finished.wait(2) and uploads == [b"audio"]
+        time.sleep(0.05)
+        assert list(keys.snapshot().values())[0]["outstanding"] == 0
+        assert breaker.snapshot()["window_calls"] == 0 and breaker.state == breaker.CLOSED
+    finally:
+        stt.stt_keys, stt.stt_breaker, stt.aai.Transcriber = saved
+    print("✅ Budget timeouts spare the breaker and the temp file")
+
+if __name__ == "__main__":
+    test_deadline_follows_the_turn()
+    test_tools_bounded_by_budget()
+    test_llm_degrades_instead_of_overrunning()
+    test_stt_respects_budget()
+    print("\n🎉 All turn deadline tests passed!")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Tavily client
+Runs against the local mock Tavily server, no API keys needed
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.web_search_async import AsyncWebSearchService
+from services.web_search import merge_results
+from services.circuit_breaker import CircuitBreaker
+from services.deadlines import turn_deadline
+from mocks.tavily_server import MockTavilyServer, SHARED_URL
+
+def make_service(server, **kwargs):
+    return AsyncWebSearchService(api_key="test-key", base_url=server.url,
+                                 breaker=CircuitBreaker("tavily-test"), **kwargs)
+
+def test_search_reuses_connections():
+    """Sequential searches share one pooled keep-alive connection"""
+    print("🔌 Testing connection reuse")
+    server = MockTavilyServer(latency=0.01)
+    server.start()
+    try:
+        service = make_service(server)
+
+        async def run():
+            results = [await service.search_web(f"query {i}", 3) for i in range(5)]
+            await service.aclose()
+            return results
+
+        results = asyncio.run(run())
+        assert all(len(r) == 3 for r in results)
+        assert set(results[0][0]) == {"title", "url", "content", "score"}
+        assert server.requests == 5 and server.connections == 1
+    finally:
+        server.stop()
+    print("✅ 5 requests over 1 connection")
+
+def test_search_many_merges_concurrently():
+    """Fan-out runs queries at once, bounded by the concurrency limit, and dedupes results"""
+    print("🌐 Testing multi-query fan-out")
+    server = MockTavilyServer(latency=0.2)
+    server.start()
+    try:
+        service = make_service(server, max_concurrency=2)
+
+        async def run():
+            start = time.perf_counter()
+            merged = await service.get_news_many(["space", "sports", "science", "music"], 3)
+            elapsed = time.perf_counter() - start
+            await service.aclose()
+            return merged, elapsed
+
+        merged, elapsed = asyncio.run(run())
+        assert server.max_in_flight == 2
+        assert 0.35 < elapsed < 0.7  # two waves of two, not four sequential calls
+        urls = [r["url"] for r in merged]
+        assert len(urls) == len(set(urls)) == 9 and urls.count(SHARED_URL) == 1
+        scores = [r["score"] for r in merged]
+        assert scores == sorted(scores, reverse=True)
+        assert all(r["query"].startswith("latest news about") for r in merged)
+    finally:
+        server.stop()
+    print(f"✅ 4 queries merged into {len(merged)} results in {elapsed:.2f}s")
+
+def test_deadline_and_failures():
+    """Slow or failing queries return None without sinking the rest of a batch"""
+    print("⏱️ Testing deadlines and failures")
+    server = MockTavilyServer(latency=0.0, slow_delay=1.0)
+    server.start()
+    try:
+        service = make_service(server, deadline=0.2)
+
+        async def run():
+            start = time.perf_counter()
+            slow = await service.search_web("slow query")
+            slow_elapsed = time.perf_counter() - start
+            failed = await service.search_web("fail query")
+            merged = await service.search_many(["slow one", "fail two", "fine three"], 2)
+            await service.aclose()
+            return slow, slow_elapsed, failed, merged
+
+        slow, slow_elapsed, failed, merged = asyncio.run(run())
+        assert slow is None and slow_elapsed < 0.5
+        assert failed is None
+        assert [r["query"] for r in merged] == ["fine three", "fine three"]
+        assert AsyncWebSearchService(api_key="").is_available() is False
+    finally:
+        server.stop()
+    print("✅ Deadlines and errors handled")
+
+def test_turn_budget_timeouts_spare_the_breaker():
+    """A search cut short by the turn budget is not held against Tavily; its own deadline still is"""
+    print("🛡️ Testing budget timeouts and the circuit breaker")
+    server = MockTavilyServer(latency=0.0, slow_delay=1.0)
+    server.start()
+    try:
+        service = make_service(server, deadline=5.0)
+        service.breaker = CircuitBreaker("tavily-test", min_calls=1)
+
+        async def run():
+            with turn_deadline(0.2):
+                budget_cut = await service.search_web("slow query")
+            state_after_budget = service.breaker.state
+            provider_slow = await service.search_web("slow query", deadline=0.2)
+            await service.aclose()
+            return budget_cut, state_after_budget, provider_slow
+
+        budget_cut, state_after_budget, provider_slow = asyncio.run(run())
+        assert budget_cut is None and provider_slow is None
+        assert state_after_budget == CircuitBreaker.CLOSED
+        assert service.breaker.state == CircuitBreaker.OPEN
+    finally:
+        server.stop()
+    print("✅ Only the provider's own timeouts count as failures")
+
+def test_merge_results_keeps_best_score():
+    """Duplicate URLs keep the higher score and the first query that found them"""
+    merged = merge_results(["a", "b", "c"], [
+        [{"title": "x", "url": "https://x.com/page/", "content": "", "score": 0.4}],
+        [{"title": "x", "url": "https://X.com/page", "content": "", "score": 0.9}],
+        None,
+    ])
+    assert len(merged) == 1 and merged[0]["score"] == 0.9 and merged[0]["query"] == "a"
+
+if __name__ == "__main__":
+    test_search_reuses_connections()
+    test_search_many_merges_concurrently()
+    test_deadline_and_failures()
+    test_turn_budget_timeouts_spare_the_breaker()
+    test_merge_results_keeps_best_score()
+    print("\n🎉 All async web search tests passed!")
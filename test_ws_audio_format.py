@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the /ws audio format negotiation
+Streams raw PCM and a real browser webm recording through /ws against the
+local realtime STT mock, no API keys needed
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import functools
+import threading
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("RECORDING_DIRECTORY", tempfile.mkdtemp(prefix="ws-format-"))
+
+from fastapi.testclient import TestClient
+
+from mocks.assemblyai_realtime import MockRealtimeSTTServer
+from services.circuit_breaker import circuit_breakers
+from services.endpointing import Endpointer
+from services.recording_store import RecordingStore
+from services.recording_writer import open_recording
+from services.stt_streaming import AudioFormat, StreamingTranscriber, sniff_container
+
+# Recorded from Chrome's MediaRecorder by the original MediaRecorder client
+WEBM_RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "uploads", "session_1755440869982", "streaming_audio_1755440870.webm")
+
+def start_mock():
+    loop = asyncio.new_event_loop()
+    server = MockRealtimeSTTServer(utterances=["hello there friend"], silence_chunks=50)
+    loop.run_until_complete(server.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server, loop
+
+def stop_mock(server, loop):
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+
+class CountingEndpointer(Endpointer):
+    """Counts the chunks fed to energy-based silence detection"""
+    audio_chunks = 0
+
+    def on_audio(self, chunk, now=None):
+        CountingEndpointer.audio_chunks += 1
+        return super().on_audio(chunk, now)
+
+def run_session(server, path, chunks, until):
+    """Stream chunks through /ws and collect messages until one of type `until` arrives"""
+    import app as app_module
+    original = app_module.StreamingTranscriber, app_module.Endpointer, app_module.open_recording
+    app_module.StreamingTranscriber = functools.partial(StreamingTranscriber, url=server.url, api_key="test-key")
+    app_module.Endpointer = CountingEndpointer
+    # app may have been imported before RECORDING_DIRECTORY was set; never record into uploads/
+    app_module.open_recording = functools.partial(open_recording, store=RecordingStore(root=tempfile.mkdtemp()))
+    CountingEndpointer.audio_chunks = 0
+    circuit_breakers.get("assemblyai").reset()
+    messages = []
+    try:
+        with TestClient(app_module.app) as client:
+            with client.websocket_connect(path) as ws:
+                messages.append(ws.receive_json())
+                for chunk in chunks:
+                    ws.send_bytes(chunk)
+                while messages[-1]["type"] != until:
+                    messages.append(ws.receive_json())
+    finally:
+        app_module.StreamingTranscriber, app_module.Endpointer, app_module.open_recording = original
+    return messages
+
+def test_format_negotiation():
+    """Query parameters pick the realtime encoding; containers are recognised from their first bytes"""
+    print("🧪 Testing audio format negotiation...")
+
+    assert AudioFormat.negotiate() == AudioFormat()
+    assert not AudioFormat.negotiate().declared
+    declared = AudioFormat.negotiate("pcm_s16le", 16000)
+    assert declared.declared and declared.is_pcm16 and declared.sample_rate == 16000
+    for encoding, rate in (("webm", None), ("opus", 48000), ("pcm_s16le", 4000)):
+        try:
+            AudioFormat.negotiate(encoding, rate)
+            assert False, f"{encoding}@{rate} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Only raw encodings the realtime API accepts are negotiated")
+
+    with open(WEBM_RECORDING, "rb") as f:
+        assert sniff_container(f.read(4096)) == "webm"
+    assert sniff_container(b"OggS\0\2") == "ogg"
+    assert sniff_container(b"\0\0\0\x20ftypisom") == "mp4"
+    assert sniff_container(os.urandom(3200).replace(b"\x1a", b"\0")) is None
+    print("✅ webm, ogg and mp4 recognised, raw PCM not")
+
+def test_ws_streams():
+    """Declared PCM reaches the realtime STT; a real webm stream is refused instead of mis-transcribed"""
+    print("🧪 Testing /ws with PCM and webm audio...")
+
+    server, loop = start_mock()
+    try:
+        messages = run_session(server, "/ws/format-pcm?encoding=pcm_s16le&sample_rate=16000",
+                               [os.urandom(3200) for _ in range(2)], until="transcript")
+        assert messages[0]["type"] == "ready"
+        assert messages[-1]["content"].lower().startswith("hello")
+        assert server.sessions[-1]["encoding"] == "pcm_s16le"
+        assert server.sessions[-1]["sample_rate"] == "16000"
+        assert server.audio_bytes >= 6400
+        assert CountingEndpointer.audio_chunks == 2
+        print("✅ PCM streamed to the realtime STT with the declared format")
+
+        # Undeclared audio is forwarded in the server's format but never read as PCM energy
+        run_session(server, "/ws/format-undeclared", [os.urandom(3200) for _ in range(2)], until="transcript")
+        assert CountingEndpointer.audio_chunks == 0
+        print("✅ Energy endpointing only for declared PCM16")
+
+        with open(WEBM_RECORDING, "rb") as f:
+            webm = f.read(3 * 4000)
+        before = server.audio_bytes
+        for path in ("/ws/format-webm", "/ws/format-webm-declared?encoding=pcm_s16le"):
+            messages = run_session(server, path, [webm[i:i + 4000] for i in range(0, len(webm), 4000)],
+                                   until="error")
+            assert "webm" in messages[-1]["message"], messages
+            assert not any(m["type"] == "transcript" for m in messages)
+            assert CountingEndpointer.audio_chunks == 0, "webm must not be read as PCM energy"
+        assert server.audio_bytes == before, "webm bytes must never reach the realtime STT"
+        print("✅ webm from MediaRecorder refused, nothing forwarded")
+
+        messages = run_session(server, "/ws/format-bad?encoding=opus", [], until="error")
+        assert "Unsupported audio encoding" in messages[-1]["message"]
+        print("✅ Unsupported encodings rejected at connect")
+    finally:
+        stop_mock(server, loop)
+
+if __name__ == "__main__":
+    test_format_negotiation()
+    test_ws_streams()
+    print("\n🎉 All /ws audio format tests passed!")